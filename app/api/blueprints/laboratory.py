@@ -1,6 +1,4 @@
-import random
-
-from quart import Blueprint, jsonify
+from quart import Blueprint, Response, current_app, jsonify, make_response
 from quart_schema import tag_blueprint
 
 from application.dto.input.transaction import WithdrawTransactionInput
@@ -8,6 +6,8 @@ from application.usecases.list_laboratory_balance import ListLaboratoryBalanceIn
 from application.usecases.list_procedures import ListProceduresInput
 from application.middleware.context import get_context
 from application.container import container
+from application.services.event_hub import GLOBAL_CHANNEL, encode_event
+from domain.value_objects.ids import LaboratoryId
 
 laboratory_bp = Blueprint('laboratory', __name__, url_prefix='/laboratory')
 tag_blueprint(laboratory_bp, ["Laboratory"])
@@ -27,6 +27,19 @@ async def list_balance(laboratory_id: str):
         return jsonify(result.model_dump() if hasattr(result, 'model_dump') else result)
 
 
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+def _get_idempotency_key(header_value):
+    if header_value is None or not header_value.strip():
+        return None
+
+    key = header_value.strip()
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise ValueError(f"Idempotency-Key must have at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+    return key
+
+
 @laboratory_bp.post("/<string:laboratory_id>/withdraw/<string:procedure_id>")
 async def withdraw(laboratory_id: str, procedure_id: str):
     from quart import request
@@ -43,27 +56,60 @@ async def withdraw(laboratory_id: str, procedure_id: str):
         input_data = WithdrawTransactionInput(
             laboratory_id=laboratory_id,
             procedure_id=procedure_id,
+            idempotency_key=_get_idempotency_key(request.headers.get('Idempotency-Key'))
         )
         result = await container.withdraw_transaction_use_case.execute(context, input_data)
         return jsonify(result.model_dump() if hasattr(result, 'model_dump') else result)
 
 
+async def _event_stream_response(channel: str, initial_snapshot: bytes):
+    async def generate():
+        # Assina só quando o corpo começa a ser consumido; se a resposta for
+        # descartada antes disso, nenhuma fila fica órfã no hub
+        subscription = container.event_hub.subscribe(channel)
+        try:
+            # Estado atual primeiro, para a tela não precisar de um poll inicial
+            yield encode_event("monitoring", initial_snapshot)
+            async for frame in subscription:
+                yield frame
+        finally:
+            subscription.close()
+
+    response = await make_response(generate(), 200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None
+    return response
+
+
+@laboratory_bp.get("/events")
+async def stream_events():
+    return await _event_stream_response(
+        GLOBAL_CHANNEL,
+        current_app.monitoring_service.get_global_snapshot()
+    )
+
+
+@laboratory_bp.get("/<string:laboratory_id>/events")
+async def stream_laboratory_events(laboratory_id: str):
+    laboratory_id = str(LaboratoryId.from_string(laboratory_id).value)
+    return await _event_stream_response(
+        laboratory_id,
+        current_app.monitoring_service.get_laboratory_snapshot(laboratory_id)
+    )
+
+
 @laboratory_bp.get("/monitoring")
 async def get_monitoring():
-    temperature_value = round(random.uniform(20.0, 25.0), 1)
-
-    humidity_value = random.randint(40, 60)
-
-    return jsonify({
-        "temperature": {
-            "value": temperature_value,
-            "unit": "°C",
-            "status": "Normal"
-        },
-        "humidity": {
-            "value": humidity_value,
-            "unit": "%",
-            "status": "Normal"
-        },
-        "operationalStatus": "Operacional"
-    })
\ No newline at end of file
+    # Snapshot já serializado, atualizado na ingestão de telemetria e nos heartbeats
+    body = current_app.monitoring_service.get_global_snapshot()
+    return Response(body, mimetype='application/json')
+
+
+@laboratory_bp.get("/<string:laboratory_id>/monitoring")
+async def get_laboratory_monitoring(laboratory_id: str):
+    laboratory_id = str(LaboratoryId.from_string(laboratory_id).value)
+    body = current_app.monitoring_service.get_laboratory_snapshot(laboratory_id)
+    return Response(body, mimetype='application/json')
\ No newline at end of file
@@ -1,4 +1,8 @@
-from quart import Blueprint, jsonify, request
+import csv
+import io
+import json
+
+from quart import Blueprint, jsonify, request, make_response
 from quart_schema import tag_blueprint, validate_querystring
 from typing import Optional
 from datetime import datetime
@@ -23,12 +27,24 @@ class ListTransactionsQueryParams:
     status: Optional[str] = None
     start_date: Optional[str] = None  # ISO 8601 format
     end_date: Optional[str] = None  # ISO 8601 format
+    cursor: Optional[str] = None  # nextCursor da página anterior
+    limit: Optional[int] = None
 
 
-@transactions_bp.get("/")
-async def list_transactions():
-    args = request.args
+def _parse_pagination_args(args):
+    limit = None
+    if args.get('limit'):
+        try:
+            limit = int(args.get('limit'))
+        except ValueError:
+            return None, None, (jsonify({"error": "Invalid limit. Use a positive integer"}), 400)
+        if limit <= 0:
+            return None, None, (jsonify({"error": "Invalid limit. Use a positive integer"}), 400)
+
+    return limit, args.get('cursor'), None
 
+
+def _parse_date_args(args):
     start_date = None
     end_date = None
 
@@ -36,13 +52,89 @@ async def list_transactions():
         try:
             start_date = datetime.fromisoformat(args.get('start_date').replace('Z', '+00:00'))
         except ValueError:
-            return jsonify({"error": "Invalid start_date format. Use ISO 8601"}), 400
+            return None, None, (jsonify({"error": "Invalid start_date format. Use ISO 8601"}), 400)
 
     if args.get('end_date'):
         try:
             end_date = datetime.fromisoformat(args.get('end_date').replace('Z', '+00:00'))
         except ValueError:
-            return jsonify({"error": "Invalid end_date format. Use ISO 8601"}), 400
+            return None, None, (jsonify({"error": "Invalid end_date format. Use ISO 8601"}), 400)
+
+    return start_date, end_date, None
+
+
+def _serialize_transaction(transaction):
+    return {
+        "employeeId": transaction.employee_id,
+        "procedure": {
+            "id": transaction.procedure.id,
+            "name": transaction.procedure.name,
+            "items": [
+                {
+                    "id": item.id,
+                    "name": item.name,
+                    "quantity": item.quantity
+                }
+                for item in transaction.procedure.items
+            ]
+        } if transaction.procedure else None,
+        "timestamp": transaction.timestamp.isoformat()
+    }
+
+
+def _build_transactions_response(result):
+    return {
+        "transactions": [_serialize_transaction(transaction) for transaction in result.transactions],
+        "nextCursor": result.next_cursor
+    }
+
+
+_CSV_EXPORT_HEADER = [
+    "employeeId", "timestamp", "procedureId", "procedureName", "materialId", "materialName", "quantity"
+]
+
+
+def _transaction_csv_rows(transaction):
+    # Uma linha por material; transações sem procedimento saem com as colunas vazias
+    timestamp = transaction.timestamp.isoformat()
+    procedure = transaction.procedure
+
+    if not procedure or not procedure.items:
+        return [[
+            transaction.employee_id,
+            timestamp,
+            procedure.id if procedure else "",
+            procedure.name if procedure else "",
+            "", "", ""
+        ]]
+
+    return [
+        [transaction.employee_id, timestamp, procedure.id, procedure.name, item.id, item.name, item.quantity]
+        for item in procedure.items
+    ]
+
+
+def _encode_ndjson_batch(batch):
+    return "".join(json.dumps(_serialize_transaction(transaction)) + "\n" for transaction in batch)
+
+
+def _encode_csv_rows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+@transactions_bp.get("/")
+async def list_transactions():
+    args = request.args
+
+    start_date, end_date, error_response = _parse_date_args(args)
+    if error_response:
+        return error_response
+
+    limit, cursor, error_response = _parse_pagination_args(args)
+    if error_response:
+        return error_response
 
     # Monta input
     input_data = ListTransactionsInput(
@@ -51,7 +143,9 @@ async def list_transactions():
         transaction_type=args.get('transaction_type'),
         status=args.get('status'),
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        cursor=cursor,
+        limit=limit
     )
 
     context = get_context()
@@ -59,39 +153,85 @@ async def list_transactions():
     async with container.get_session():
         result = await container.list_transactions_use_case.execute(context, input_data)
 
-        response = [
-            {
-                "employeeId": transaction.employee_id,
-                "procedure": {
-                    "id": transaction.procedure.id,
-                    "name": transaction.procedure.name,
-                    "items": [
-                        {
-                            "id": item.id,
-                            "name": item.name,
-                            "quantity": item.quantity
-                        }
-                        for item in transaction.procedure.items
-                    ]
-                } if transaction.procedure else None,
-                "timestamp": transaction.timestamp.isoformat()
-            }
-            for transaction in result.transactions
-        ]
-
-        return jsonify(response)
+        return jsonify(_build_transactions_response(result))
+
+
+@transactions_bp.get("/export")
+async def export_transactions():
+    """
+    Exporta o histórico filtrado em NDJSON (padrão) ou CSV, em streaming.
+    A sessão é aberta dentro do gerador, pois o corpo é enviado depois que a view retorna.
+    """
+    args = request.args
+
+    export_format = (args.get('format') or 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"error": "Invalid format. Use ndjson or csv"}), 400
+
+    start_date, end_date, error_response = _parse_date_args(args)
+    if error_response:
+        return error_response
+
+    input_data = ListTransactionsInput(
+        laboratory_id=args.get('laboratory_id'),
+        user_id=args.get('user_id'),
+        transaction_type=args.get('transaction_type'),
+        status=args.get('status'),
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    context = get_context()
+
+    async def generate():
+        if export_format == 'csv':
+            # Cabeçalho sai antes da primeira consulta, o cliente recebe o primeiro byte de imediato
+            yield _encode_csv_rows([_CSV_EXPORT_HEADER])
+
+        async with container.get_session():
+            async for batch in container.list_transactions_use_case.stream(context, input_data):
+                if not batch:
+                    continue
+
+                if export_format == 'csv':
+                    yield _encode_csv_rows(
+                        row for transaction in batch for row in _transaction_csv_rows(transaction)
+                    )
+                else:
+                    yield _encode_ndjson_batch(batch)
+
+    if export_format == 'csv':
+        mimetype = 'text/csv'
+        filename = 'transactions.csv'
+    else:
+        mimetype = 'application/x-ndjson'
+        filename = 'transactions.ndjson'
+
+    response = await make_response(generate(), 200, {
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+    response.mimetype = mimetype
+    # Exportações longas não podem ser cortadas pelo timeout padrão de resposta
+    response.timeout = None
+    return response
 
 
 @transactions_bp.get("/recent")
 async def list_recent_transactions():
     from datetime import timedelta
 
+    limit, cursor, error_response = _parse_pagination_args(request.args)
+    if error_response:
+        return error_response
+
     now = datetime.now()
     yesterday = now - timedelta(days=1)
 
     input_data = ListTransactionsInput(
         start_date=yesterday,
-        end_date=now
+        end_date=now,
+        cursor=cursor,
+        limit=limit
     )
 
     context = get_context()
@@ -99,33 +239,19 @@ async def list_recent_transactions():
     async with container.get_session():
         result = await container.list_transactions_use_case.execute(context, input_data)
 
-        response = [
-            {
-                "employeeId": transaction.employee_id,
-                "procedure": {
-                    "id": transaction.procedure.id,
-                    "name": transaction.procedure.name,
-                    "items": [
-                        {
-                            "id": item.id,
-                            "name": item.name,
-                            "quantity": item.quantity
-                        }
-                        for item in transaction.procedure.items
-                    ]
-                } if transaction.procedure else None,
-                "timestamp": transaction.timestamp.isoformat()
-            }
-            for transaction in result.transactions
-        ]
-
-        return jsonify(response)
+        return jsonify(_build_transactions_response(result))
 
 
 @transactions_bp.get("/laboratory/<string:laboratory_id>")
 async def list_laboratory_transactions(laboratory_id: str):
+    limit, cursor, error_response = _parse_pagination_args(request.args)
+    if error_response:
+        return error_response
+
     input_data = ListTransactionsInput(
-        laboratory_id=laboratory_id
+        laboratory_id=laboratory_id,
+        cursor=cursor,
+        limit=limit
     )
 
     context = get_context()
@@ -133,27 +259,7 @@ async def list_laboratory_transactions(laboratory_id: str):
     async with container.get_session():
         result = await container.list_transactions_use_case.execute(context, input_data)
 
-        response = [
-            {
-                "employeeId": transaction.employee_id,
-                "procedure": {
-                    "id": transaction.procedure.id,
-                    "name": transaction.procedure.name,
-                    "items": [
-                        {
-                            "id": item.id,
-                            "name": item.name,
-                            "quantity": item.quantity
-                        }
-                        for item in transaction.procedure.items
-                    ]
-                } if transaction.procedure else None,
-                "timestamp": transaction.timestamp.isoformat()
-            }
-            for transaction in result.transactions
-        ]
-
-        return jsonify(response)
+        return jsonify(_build_transactions_response(result))
 
 procedures_bp = Blueprint('procedures', __name__, url_prefix='/procedures')
 tag_blueprint(procedures_bp, ["Procedures"])
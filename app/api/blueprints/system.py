@@ -2,11 +2,13 @@ import time
 import datetime
 from typing import Optional
 
-from quart import Blueprint, current_app, jsonify
+from quart import Blueprint, current_app, jsonify, request
 from quart_schema import tag_blueprint, validate_response
 from pydantic import BaseModel, Field
 
+from application.container import container
 from application.middleware.context import get_context
+from infrastructure.mqtt import mqtt_dispatcher
 
 
 class HealthResponse(BaseModel):
@@ -91,6 +93,59 @@ async def version():
         return jsonify(error_response.model_dump()), 500
 
 
+@system_bp.get("/cache/stats")
+async def cache_stats():
+    return jsonify(container.cache_stats()), 200
+
+
+@system_bp.get("/events/stats")
+async def events_stats():
+    return jsonify(container.event_hub.metrics()), 200
+
+
+@system_bp.get("/devices/routes/stats")
+async def device_routes_stats():
+    return jsonify(container.device_routing_service.metrics()), 200
+
+
+@system_bp.get("/devices/whitelist")
+async def get_device_whitelist():
+    return jsonify({"device_ids": sorted(current_app.device_service.device_whitelist)}), 200
+
+
+@system_bp.put("/devices/whitelist")
+async def update_device_whitelist():
+    body = await request.get_json(silent=True) or {}
+    device_ids = body.get("device_ids")
+
+    if not isinstance(device_ids, list) or not all(isinstance(d, str) and d.strip() for d in device_ids):
+        return jsonify({"error": "device_ids must be a list of non-empty strings"}), 400
+
+    device_ids = sorted({device_id.strip() for device_id in device_ids})
+    await current_app.device_service.update_device_whitelist(device_ids)
+    return jsonify({"device_ids": device_ids}), 200
+
+
+@system_bp.get("/outbox/stats")
+async def outbox_stats():
+    return jsonify(container.outbox_relay.metrics()), 200
+
+
+@system_bp.get("/dispense-acks/stats")
+async def dispense_ack_stats():
+    return jsonify(container.dispense_ack_processor.metrics()), 200
+
+
+@system_bp.get("/reservations/sweeper/stats")
+async def reservation_sweeper_stats():
+    return jsonify(container.reservation_sweeper.metrics()), 200
+
+
+@system_bp.get("/mqtt/stats")
+async def mqtt_stats():
+    return jsonify(mqtt_dispatcher.metrics()), 200
+
+
 @system_bp.errorhandler(Exception)
 async def handle_exception(e):
     try:
@@ -1,18 +1,24 @@
-import asyncio
 import logging
+from datetime import timedelta
 from quart import Quart
 from sqlalchemy import text
 from quart_cors import cors
 
 from application.config import get_config
+from application.container import container
 from app.api.error_handlers import register_error_handlers
 from app.api.routes import register_blueprints
 from application.middleware.context import ContextMiddleware
-from infrastructure.mqtt import initialize_mqtt, shutdown_mqtt
+from infrastructure.mqtt import initialize_mqtt, shutdown_mqtt, mqtt_dispatcher, mqtt_client
 from infrastructure.mqtt.integration import setup_mqtt_integration
 from application.services.device_service import DeviceService
+from application.services.device_heartbeat_writer import DeviceHeartbeatWriter
 from application.services.temperature_service import TemperatureService
-from infrastructure.storage.postgres.database import engine
+from application.services.temperature_batcher import TemperatureBatcher
+from application.services.monitoring_service import MonitoringService
+from infrastructure.storage.postgres.database import engine, async_session_factory
+from infrastructure.storage.repositories.temperature_repository import TemperatureRepositoryImpl
+from infrastructure.storage.repositories.device_repository import DeviceRepositoryImpl
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -23,11 +29,39 @@ app = Quart(__name__)
 app.config.from_object(config)
 app.json.ensure_ascii = False
 
-device_service = DeviceService()
+device_repository = DeviceRepositoryImpl(async_session_factory)
+device_heartbeat_writer = DeviceHeartbeatWriter(
+    device_repository,
+    flush_interval_seconds=config.DEVICE_HEARTBEAT_FLUSH_SECONDS
+)
+device_service = DeviceService(heartbeat_timeout=timedelta(seconds=config.DEVICE_HEARTBEAT_TIMEOUT_SECONDS))
+device_service.set_heartbeat_writer(device_heartbeat_writer)
+device_service.set_device_repository(device_repository)
+device_routing_service = container.device_routing_service
+device_routing_service.set_device_service(device_service)
+device_routing_service.set_broker_status(mqtt_client.is_connected)
 temperature_service = TemperatureService()
+temperature_batcher = TemperatureBatcher(
+    TemperatureRepositoryImpl(async_session_factory),
+    batch_size=config.TEMPERATURE_BATCH_SIZE,
+    flush_interval_ms=config.TEMPERATURE_FLUSH_INTERVAL_MS,
+    max_pending=config.TEMPERATURE_MAX_PENDING
+)
+temperature_service.set_repositories(None, temperature_batcher)
+monitoring_service = MonitoringService(
+    temperature_service,
+    device_service,
+    event_hub=container.event_hub,
+    publish_interval_ms=config.MONITORING_PUBLISH_INTERVAL_MS
+)
+device_routing_service.add_routes_listener(monitoring_service.set_device_laboratories)
 
 app.device_service = device_service
+app.device_heartbeat_writer = device_heartbeat_writer
+app.device_routing_service = device_routing_service
 app.temperature_service = temperature_service
+app.temperature_batcher = temperature_batcher
+app.monitoring_service = monitoring_service
 
 context_middleware = ContextMiddleware(app)
 
@@ -50,19 +84,29 @@ async def startup():
             logger.error(f"✗ Erro ao conectar no PostgreSQL: {db_error}")
             raise RuntimeError("Database connection failed") from db_error
 
+        await temperature_batcher.start()
+
+        # Restaura o índice antes do MQTT para que o restart não pareça uma queda dos dispositivos
+        device_service.load_registry(await device_repository.find_all())
+        await device_heartbeat_writer.start()
+        await device_service.start()
+        await device_routing_service.start()
+        await container.idempotency_cleaner.start()
+        await container.dispense_ack_processor.start()
+        await container.reservation_sweeper.start()
+
+        # Precisa estar no ar antes da conexão para que nenhuma mensagem rode no thread da paho
+        await mqtt_dispatcher.start()
+
         logger.info("Inicializando conexão MQTT...")
         mqtt_client_instance = initialize_mqtt()
         logger.info(f"MQTT inicializado. Status: {mqtt_client_instance.get_status().value}")
 
-        await asyncio.sleep(2)
+        # Subscrições ficam pendentes até a conexão; comandos esperam no outbox se o broker estiver fora
+        setup_mqtt_integration(device_service, temperature_service, container.dispense_ack_processor)
+        logger.info("Integração MQTT configurada")
 
-        if mqtt_client_instance.is_connected():
-            logger.info("✓ MQTT conectado com sucesso!")
-            setup_mqtt_integration(device_service, temperature_service)
-            logger.info("Integração MQTT configurada")
-        else:
-            logger.error("✗ MQTT não conseguiu conectar. Aplicação não pode continuar.")
-            raise RuntimeError("MQTT connection failed")
+        await container.outbox_relay.start()
 
     except Exception as e:
         logger.error(f"Erro crítico ao inicializar aplicação: {e}")
@@ -73,6 +117,9 @@ async def startup():
 async def shutdown():
     logger.info("Finalizando aplicação SmartLab")
 
+    # Antes do MQTT: um lote interrompido é desfeito e reenviado pela próxima instância
+    await container.outbox_relay.stop()
+
     try:
         logger.info("Desconectando MQTT...")
         shutdown_mqtt()
@@ -80,6 +127,31 @@ async def shutdown():
     except Exception as e:
         logger.error(f"Erro ao desconectar MQTT: {e}")
 
+    await mqtt_dispatcher.stop()
+    await device_routing_service.stop()
+    await container.idempotency_cleaner.stop()
+    await container.reservation_sweeper.stop()
+
+    try:
+        logger.info("Aplicando acks de dispensação pendentes...")
+        await container.dispense_ack_processor.stop()
+    except Exception as e:
+        logger.error(f"Erro ao aplicar acks de dispensação pendentes: {e}")
+
+    await device_service.stop()
+
+    try:
+        logger.info("Gravando heartbeats pendentes...")
+        await device_heartbeat_writer.stop()
+    except Exception as e:
+        logger.error(f"Erro ao gravar heartbeats pendentes: {e}")
+
+    try:
+        logger.info("Gravando temperaturas pendentes...")
+        await temperature_batcher.stop()
+    except Exception as e:
+        logger.error(f"Erro ao gravar temperaturas pendentes: {e}")
+
     try:
         logger.info("Fechando conexões do PostgreSQL...")
         await engine.dispose()
@@ -89,4 +161,4 @@ async def shutdown():
 
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5000, debug=config.DEBUG)
+    app.run(host='0.0.0.0', port=5000, debug=config.DEBUG)
\ No newline at end of file
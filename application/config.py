@@ -25,6 +25,47 @@ class Config:
     POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
     POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'postgres')
 
+    # Backend dos repositórios quentes: 'orm' (SQLAlchemy) ou 'asyncpg' (statements preparados)
+    REPOSITORY_BACKEND = os.getenv('REPOSITORY_BACKEND', 'orm').lower()
+
+    # Transaction listing pagination
+    TRANSACTIONS_PAGE_SIZE = int(os.getenv('TRANSACTIONS_PAGE_SIZE', '50'))
+    TRANSACTIONS_MAX_PAGE_SIZE = int(os.getenv('TRANSACTIONS_MAX_PAGE_SIZE', '200'))
+    TRANSACTIONS_EXPORT_BATCH_SIZE = int(os.getenv('TRANSACTIONS_EXPORT_BATCH_SIZE', '500'))
+
+    # Cache em memória do catálogo (procedimentos e composição dos kits)
+    PROCEDURE_CACHE_TTL_SECONDS = float(os.getenv('PROCEDURE_CACHE_TTL_SECONDS', '300'))
+    PROCEDURE_CACHE_MAX_SIZE = int(os.getenv('PROCEDURE_CACHE_MAX_SIZE', '1024'))
+    MATERIAL_CACHE_TTL_SECONDS = float(os.getenv('MATERIAL_CACHE_TTL_SECONDS', '300'))
+    MATERIAL_CACHE_MAX_SIZE = int(os.getenv('MATERIAL_CACHE_MAX_SIZE', '4096'))
+
+    # Idempotency-Key da retirada: resposta guardada no banco por IDEMPOTENCY_TTL_SECONDS,
+    # com um LRU em memória na frente
+    IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+    IDEMPOTENCY_CACHE_MAX_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_MAX_SIZE', '10000'))
+    IDEMPOTENCY_CACHE_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_CACHE_TTL_SECONDS', '600'))
+    IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS = float(os.getenv('IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS', '300'))
+    IDEMPOTENCY_CLEANUP_BATCH_SIZE = int(os.getenv('IDEMPOTENCY_CLEANUP_BATCH_SIZE', '1000'))
+
+    # Ingestão de temperatura
+    TEMPERATURE_HISTORY_SIZE = int(os.getenv('TEMPERATURE_HISTORY_SIZE', '1000'))
+    TEMPERATURE_BATCH_SIZE = int(os.getenv('TEMPERATURE_BATCH_SIZE', '500'))
+    TEMPERATURE_FLUSH_INTERVAL_MS = int(os.getenv('TEMPERATURE_FLUSH_INTERVAL_MS', '500'))
+    TEMPERATURE_MAX_PENDING = int(os.getenv('TEMPERATURE_MAX_PENDING', '50000'))
+
+    # Dispositivo é considerado desconectado após este tempo sem heartbeat
+    DEVICE_HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv('DEVICE_HEARTBEAT_TIMEOUT_SECONDS', '120'))
+    # Heartbeats são coalescidos em memória e gravados no registro a cada intervalo
+    DEVICE_HEARTBEAT_FLUSH_SECONDS = float(os.getenv('DEVICE_HEARTBEAT_FLUSH_SECONDS', '10'))
+    # Intervalo de releitura da tabela device_routes (laboratório/slot -> dispositivo)
+    DEVICE_ROUTES_REFRESH_SECONDS = float(os.getenv('DEVICE_ROUTES_REFRESH_SECONDS', '60'))
+
+    # Push de eventos (SSE)
+    EVENTS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv('EVENTS_SUBSCRIBER_QUEUE_SIZE', '100'))
+    EVENTS_KEEPALIVE_SECONDS = float(os.getenv('EVENTS_KEEPALIVE_SECONDS', '15'))
+    # Snapshots de monitoramento publicados no máximo uma vez por intervalo e canal
+    MONITORING_PUBLISH_INTERVAL_MS = int(os.getenv('MONITORING_PUBLISH_INTERVAL_MS', '1000'))
+
     # MQTT Configuration
     MQTT_BROKER_HOST = os.getenv('MQTT_BROKER_HOST', 'localhost')
     MQTT_BROKER_PORT = int(os.getenv('MQTT_BROKER_PORT', '1883'))
@@ -33,6 +74,42 @@ class Config:
     MQTT_CLIENT_ID = os.getenv('MQTT_CLIENT_ID', f'smartlab-{uuid.uuid4().hex[:8]}')
     MQTT_QOS = int(os.getenv('MQTT_QOS', '1'))
     MQTT_KEEPALIVE = int(os.getenv('MQTT_KEEPALIVE', '60'))
+    MQTT_PUBLISH_TIMEOUT_SECONDS = float(os.getenv('MQTT_PUBLISH_TIMEOUT_SECONDS', '5'))
+    MQTT_MAX_INFLIGHT = int(os.getenv('MQTT_MAX_INFLIGHT', '100'))
+
+    # Retiradas sem confirmação do dispositivo após este tempo são falhadas e a reserva liberada
+    RESERVATION_TTL_SECONDS = float(os.getenv('RESERVATION_TTL_SECONDS', '900'))
+    # Já iniciadas pelo dispositivo: prazo maior, só para o ack final perdido (queda de energia, fila cheia)
+    RESERVATION_IN_PROGRESS_TTL_SECONDS = float(os.getenv('RESERVATION_IN_PROGRESS_TTL_SECONDS', '3600'))
+    RESERVATION_SWEEP_INTERVAL_SECONDS = float(os.getenv('RESERVATION_SWEEP_INTERVAL_SECONDS', '60'))
+    RESERVATION_SWEEP_BATCH_SIZE = int(os.getenv('RESERVATION_SWEEP_BATCH_SIZE', '100'))
+
+    # Acks de dispensação aplicados em lote
+    DISPENSE_ACK_BATCH_SIZE = int(os.getenv('DISPENSE_ACK_BATCH_SIZE', '200'))
+    DISPENSE_ACK_FLUSH_INTERVAL_MS = int(os.getenv('DISPENSE_ACK_FLUSH_INTERVAL_MS', '200'))
+    DISPENSE_ACK_MAX_PENDING = int(os.getenv('DISPENSE_ACK_MAX_PENDING', '10000'))
+    DISPENSE_ACK_MAX_ATTEMPTS = int(os.getenv('DISPENSE_ACK_MAX_ATTEMPTS', '5'))
+
+    # Outbox dos comandos aos dispositivos
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+    OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv('OUTBOX_POLL_INTERVAL_SECONDS', '1'))
+    OUTBOX_RETRY_BASE_SECONDS = float(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '1'))
+    OUTBOX_RETRY_MAX_SECONDS = float(os.getenv('OUTBOX_RETRY_MAX_SECONDS', '60'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '20'))
+    OUTBOX_RETENTION_SECONDS = float(os.getenv('OUTBOX_RETENTION_SECONDS', '604800'))
+    # Prazo de uma publicação reivindicada; precisa ser maior que MQTT_PUBLISH_TIMEOUT_SECONDS
+    OUTBOX_CLAIM_LEASE_SECONDS = float(os.getenv('OUTBOX_CLAIM_LEASE_SECONDS', '30'))
+    # Dispositivos cujo firmware aceita o comando de retirada em JSON com transaction_id, separados
+    # por vírgula ('*' = todos). Os demais recebem só o slot, como sempre
+    WITHDRAW_JSON_PAYLOAD_DEVICES = os.getenv('WITHDRAW_JSON_PAYLOAD_DEVICES', '')
+
+    # Despacho das mensagens recebidas para o event loop, por família de tópico
+    MQTT_CONTROL_CONCURRENCY = int(os.getenv('MQTT_CONTROL_CONCURRENCY', '4'))
+    MQTT_CONTROL_QUEUE_SIZE = int(os.getenv('MQTT_CONTROL_QUEUE_SIZE', '1000'))
+    MQTT_HEARTBEAT_CONCURRENCY = int(os.getenv('MQTT_HEARTBEAT_CONCURRENCY', '1'))
+    MQTT_HEARTBEAT_QUEUE_SIZE = int(os.getenv('MQTT_HEARTBEAT_QUEUE_SIZE', '1000'))
+    MQTT_TELEMETRY_CONCURRENCY = int(os.getenv('MQTT_TELEMETRY_CONCURRENCY', '2'))
+    MQTT_TELEMETRY_QUEUE_SIZE = int(os.getenv('MQTT_TELEMETRY_QUEUE_SIZE', '5000'))
 
     def DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
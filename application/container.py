@@ -1,24 +1,73 @@
+import datetime
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from application.config import get_config
+from application.services.device_routing_service import DeviceRoutingService
+from application.services.dispense_ack_processor import DispenseAckProcessor
+from application.services.event_hub import EventHub
+from application.services.idempotency_cleaner import IdempotencyCleaner
+from application.services.outbox_relay import OutboxRelay
+from application.services.request_coalescer import RequestCoalescer
+from application.services.reservation_sweeper import ReservationSweeper
 from application.usecases.list_laboratory_balance import ListLaboratoryBalanceUseCase
 from application.usecases.list_procedure_materials import ListProcedureMaterialsUseCase
 from application.usecases.withdraw import WithdrawTransactionUseCase
 from application.usecases.list_transactions import ListTransactionsUseCase
+from infrastructure.mqtt import mqtt_client
+from infrastructure.mqtt.integration import deliver_outbox_message
+from infrastructure.storage.asyncpg.material_balance_repository import AsyncpgMaterialBalanceRepository
+from infrastructure.storage.asyncpg.procedure_repository import AsyncpgProcedureRepository
+from infrastructure.storage.asyncpg.transaction_repository import AsyncpgTransactionRepository
 from infrastructure.storage.postgres.database import async_session_factory
+from infrastructure.storage.postgres.unit_of_work import SqlAlchemyUnitOfWork
+from infrastructure.storage.repositories.cached_idempotency_repository import CachedIdempotencyRepository
+from infrastructure.storage.repositories.cached_material_repository import CachedMaterialRepository
+from infrastructure.storage.repositories.cached_procedure_repository import CachedProcedureRepository
+from infrastructure.storage.repositories.device_route_repository import DeviceRouteRepositoryImpl
+from infrastructure.storage.repositories.idempotency_repository import IdempotencyRepositoryImpl
 from infrastructure.storage.repositories.material_balance_repository import MaterialBalanceRepositoryImpl
 from infrastructure.storage.repositories.material_repository import MaterialRepositoryImpl
+from infrastructure.storage.repositories.outbox_repository import OutboxRepositoryImpl
 from infrastructure.storage.repositories.procedure_repository import ProcedureRepositoryImpl
 from infrastructure.storage.repositories.transaction_repository import TransactionRepositoryImpl
 from application.usecases.list_procedures import ListProceduresUseCase
 
+config = get_config()
+
+if config.REPOSITORY_BACKEND not in ('orm', 'asyncpg'):
+    raise ValueError(f"REPOSITORY_BACKEND inválido: {config.REPOSITORY_BACKEND!r} (use 'orm' ou 'asyncpg')")
+
+_use_asyncpg = config.REPOSITORY_BACKEND == 'asyncpg'
+
+# Cada request (task do event loop) enxerga apenas a própria sessão
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar('current_session', default=None)
+
 
 class Container:
+    """
+    Repositórios e use cases são montados uma única vez e compartilhados entre
+    requests; a sessão é resolvida por request através de current_session().
+    """
+
     def __init__(self):
-        self._session = None
+        self._unit_of_work = None
+        self._event_hub = None
+        self._device_routing_service = None
+        self._request_coalescer = None
+        self._idempotency_cleaner = None
+        self._outbox_relay = None
+        self._dispense_ack_processor = None
+        self._reservation_sweeper = None
         self._procedure_repository = None
         self._material_repository = None
         self._material_balance_repository = None
         self._transaction_repository = None
+        self._idempotency_repository = None
+        self._outbox_repository = None
 
         self._list_procedures_use_case = None
         self._list_procedure_materials_use_case = None
@@ -29,53 +78,178 @@ class Container:
     @asynccontextmanager
     async def get_session(self):
         async with async_session_factory() as session:
-            self._session = session
+            token = _current_session.set(session)
             try:
                 yield session
+            except Exception:
+                await session.rollback()
+                raise
             finally:
-                self._session = None
-                self._procedure_repository = None
-                self._material_repository = None
-                self._material_balance_repository = None
-                self._transaction_repository = None
-                self._list_procedures_use_case = None
-                self._list_procedure_materials_use_case = None
-                self._list_laboratory_balance_use_case = None
-                self._withdraw_transaction_use_case = None
-                self._list_transactions_use_case = None
-
-    @property
-    def procedure_repository(self) -> ProcedureRepositoryImpl:
+                _current_session.reset(token)
+
+    @staticmethod
+    def current_session() -> AsyncSession:
+        session = _current_session.get()
+        if session is None:
+            raise RuntimeError("Session not initialized. Use get_session() context manager.")
+        return session
+
+    @property
+    def event_hub(self) -> EventHub:
+        if self._event_hub is None:
+            self._event_hub = EventHub(
+                queue_size=config.EVENTS_SUBSCRIBER_QUEUE_SIZE,
+                keepalive_seconds=config.EVENTS_KEEPALIVE_SECONDS
+            )
+        return self._event_hub
+
+    @property
+    def device_routing_service(self) -> DeviceRoutingService:
+        if self._device_routing_service is None:
+            self._device_routing_service = DeviceRoutingService(
+                DeviceRouteRepositoryImpl(async_session_factory),
+                refresh_seconds=config.DEVICE_ROUTES_REFRESH_SECONDS
+            )
+        return self._device_routing_service
+
+    @property
+    def unit_of_work(self) -> SqlAlchemyUnitOfWork:
+        if self._unit_of_work is None:
+            self._unit_of_work = SqlAlchemyUnitOfWork(self.current_session)
+        return self._unit_of_work
+
+    @property
+    def procedure_repository(self) -> CachedProcedureRepository:
         if self._procedure_repository is None:
-            if self._session is None:
-                raise RuntimeError("Session not initialized. Use get_session() context manager.")
-            self._procedure_repository = ProcedureRepositoryImpl(self._session)
+            self._procedure_repository = CachedProcedureRepository(
+                (AsyncpgProcedureRepository if _use_asyncpg else ProcedureRepositoryImpl)(self.current_session),
+                ttl_seconds=config.PROCEDURE_CACHE_TTL_SECONDS,
+                max_size=config.PROCEDURE_CACHE_MAX_SIZE
+            )
         return self._procedure_repository
 
     @property
-    def material_repository(self) -> MaterialRepositoryImpl:
+    def material_repository(self) -> CachedMaterialRepository:
         if self._material_repository is None:
-            if self._session is None:
-                raise RuntimeError("Session not initialized. Use get_session() context manager.")
-            self._material_repository = MaterialRepositoryImpl(self._session)
+            self._material_repository = CachedMaterialRepository(
+                MaterialRepositoryImpl(self.current_session),
+                ttl_seconds=config.MATERIAL_CACHE_TTL_SECONDS,
+                max_size=config.MATERIAL_CACHE_MAX_SIZE,
+                unit_of_work=self.unit_of_work
+            )
         return self._material_repository
 
     @property
     def material_balance_repository(self):
         if self._material_balance_repository is None:
-            if self._session is None:
-                raise RuntimeError("Session not initialized. Use get_session() context manager.")
-            self._material_balance_repository = MaterialBalanceRepositoryImpl(self._session)
+            repository_class = AsyncpgMaterialBalanceRepository if _use_asyncpg else MaterialBalanceRepositoryImpl
+            self._material_balance_repository = repository_class(self.current_session)
         return self._material_balance_repository
 
     @property
     def transaction_repository(self):
         if self._transaction_repository is None:
-            if self._session is None:
-                raise RuntimeError("Session not initialized. Use get_session() context manager.")
-            self._transaction_repository = TransactionRepositoryImpl(self._session)
+            repository_class = AsyncpgTransactionRepository if _use_asyncpg else TransactionRepositoryImpl
+            self._transaction_repository = repository_class(self.current_session)
         return self._transaction_repository
 
+    @property
+    def idempotency_repository(self) -> CachedIdempotencyRepository:
+        if self._idempotency_repository is None:
+            self._idempotency_repository = CachedIdempotencyRepository(
+                IdempotencyRepositoryImpl(self.current_session),
+                max_size=config.IDEMPOTENCY_CACHE_MAX_SIZE,
+                ttl_seconds=config.IDEMPOTENCY_CACHE_TTL_SECONDS
+            )
+        return self._idempotency_repository
+
+    @property
+    def request_coalescer(self) -> RequestCoalescer:
+        if self._request_coalescer is None:
+            self._request_coalescer = RequestCoalescer()
+        return self._request_coalescer
+
+    @property
+    def idempotency_cleaner(self) -> IdempotencyCleaner:
+        if self._idempotency_cleaner is None:
+            self._idempotency_cleaner = IdempotencyCleaner(
+                self.get_session,
+                self.idempotency_repository,
+                self.unit_of_work,
+                interval_seconds=config.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+                batch_size=config.IDEMPOTENCY_CLEANUP_BATCH_SIZE
+            )
+        return self._idempotency_cleaner
+
+    @property
+    def outbox_repository(self) -> OutboxRepositoryImpl:
+        if self._outbox_repository is None:
+            self._outbox_repository = OutboxRepositoryImpl(self.current_session)
+        return self._outbox_repository
+
+    @property
+    def outbox_relay(self) -> OutboxRelay:
+        if self._outbox_relay is None:
+            self._outbox_relay = OutboxRelay(
+                self.get_session,
+                self.outbox_repository,
+                self.unit_of_work,
+                publisher=deliver_outbox_message,
+                is_available=mqtt_client.is_connected,
+                batch_size=config.OUTBOX_BATCH_SIZE,
+                poll_interval_seconds=config.OUTBOX_POLL_INTERVAL_SECONDS,
+                retry_base_seconds=config.OUTBOX_RETRY_BASE_SECONDS,
+                retry_max_seconds=config.OUTBOX_RETRY_MAX_SECONDS,
+                max_attempts=config.OUTBOX_MAX_ATTEMPTS,
+                retention_seconds=config.OUTBOX_RETENTION_SECONDS,
+                lease_seconds=config.OUTBOX_CLAIM_LEASE_SECONDS
+            )
+        return self._outbox_relay
+
+    @property
+    def dispense_ack_processor(self) -> DispenseAckProcessor:
+        if self._dispense_ack_processor is None:
+            self._dispense_ack_processor = DispenseAckProcessor(
+                self.get_session,
+                self.transaction_repository,
+                self.material_balance_repository,
+                self.outbox_repository,
+                self.unit_of_work,
+                self.event_hub,
+                batch_size=config.DISPENSE_ACK_BATCH_SIZE,
+                flush_interval_ms=config.DISPENSE_ACK_FLUSH_INTERVAL_MS,
+                max_pending=config.DISPENSE_ACK_MAX_PENDING,
+                max_attempts=config.DISPENSE_ACK_MAX_ATTEMPTS
+            )
+        return self._dispense_ack_processor
+
+    @property
+    def reservation_sweeper(self) -> ReservationSweeper:
+        if self._reservation_sweeper is None:
+            self._reservation_sweeper = ReservationSweeper(
+                self.get_session,
+                self.transaction_repository,
+                self.material_balance_repository,
+                self.outbox_repository,
+                self.unit_of_work,
+                self.event_hub,
+                ttl_seconds=config.RESERVATION_TTL_SECONDS,
+                in_progress_ttl_seconds=config.RESERVATION_IN_PROGRESS_TTL_SECONDS,
+                interval_seconds=config.RESERVATION_SWEEP_INTERVAL_SECONDS,
+                batch_size=config.RESERVATION_SWEEP_BATCH_SIZE
+            )
+        return self._reservation_sweeper
+
+    def cache_stats(self) -> dict:
+        return {
+            "procedures": self.procedure_repository.stats(),
+            "materials": self.material_repository.stats(),
+            "idempotency": {
+                **self.idempotency_repository.stats(),
+                **self.request_coalescer.metrics()
+            }
+        }
+
     @property
     def list_procedures_use_case(self) -> ListProceduresUseCase:
         if self._list_procedures_use_case is None:
@@ -107,7 +281,15 @@ class Container:
                 self.transaction_repository,
                 self.procedure_repository,
                 self.material_balance_repository,
-                self.material_repository
+                self.material_repository,
+                self.unit_of_work,
+                self.event_hub,
+                self.device_routing_service,
+                self.idempotency_repository,
+                self.request_coalescer,
+                datetime.timedelta(seconds=config.IDEMPOTENCY_TTL_SECONDS),
+                self.outbox_repository,
+                self.outbox_relay
             )
         return self._withdraw_transaction_use_case
 
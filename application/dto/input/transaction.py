@@ -7,6 +7,7 @@ from typing import Optional
 class WithdrawTransactionInput:
     laboratory_id: str
     procedure_id: str
+    idempotency_key: Optional[str] = None
 
 @dataclass
 class ListTransactionsInput:
@@ -15,4 +16,6 @@ class ListTransactionsInput:
     transaction_type: Optional[str] = None  # "WITHDRAW" ou "DEPOSIT"
     status: Optional[str] = None  # "AUTHORIZED", "IN_PROGRESS", "COMPLETED", "FAILED"
     start_date: Optional[datetime.datetime] = None
-    end_date: Optional[datetime.datetime] = None
\ No newline at end of file
+    end_date: Optional[datetime.datetime] = None
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
\ No newline at end of file
@@ -57,4 +57,5 @@ class TransactionListItemOutput:
 
 @dataclass
 class ListTransactionsOutput:
-    transactions: List[TransactionListItemOutput]
\ No newline at end of file
+    transactions: List[TransactionListItemOutput]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -81,4 +81,31 @@ class TransactionCreationError(ApplicationError):
                 "original_error": original_error,
                 "transaction_data": transaction_data or {}
             }
+        )
+
+
+class NoDeviceAvailableError(ApplicationError):
+    def __init__(self, laboratory_id: str, slot_id: int):
+        super().__init__(
+            message=f"No connected device serves slot {slot_id} in laboratory {laboratory_id}",
+            details={
+                "laboratory_id": laboratory_id,
+                "slot_id": slot_id
+            }
+        )
+
+
+class IdempotencyKeyConflictError(ApplicationError):
+    def __init__(self, idempotency_key: str):
+        super().__init__(
+            message="Idempotency key was already used with a different request",
+            details={"idempotency_key": idempotency_key}
+        )
+
+
+class InvalidCursorError(ApplicationError):
+    def __init__(self, cursor: str):
+        super().__init__(
+            message="Invalid pagination cursor",
+            details={"cursor": cursor}
         )
\ No newline at end of file
@@ -0,0 +1,21 @@
+import base64
+import datetime
+import uuid
+from typing import Tuple
+
+from application.exceptions import InvalidCursorError
+from domain.value_objects.ids import TransactionId
+
+
+def encode_cursor(created_at: datetime.datetime, transaction_id: TransactionId) -> str:
+    raw = f"{created_at.isoformat()}|{transaction_id.value}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, TransactionId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, transaction_id = raw.split('|')
+        return datetime.datetime.fromisoformat(created_at), TransactionId(uuid.UUID(transaction_id))
+    except (ValueError, UnicodeError):
+        raise InvalidCursorError(cursor)
\ No newline at end of file
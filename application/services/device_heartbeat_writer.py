@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+from domain.repositories.device import DeviceRepository
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceHeartbeatWriter:
+    """
+    Write-behind dos heartbeats: cada ping só sobrescreve o último contato do
+    dispositivo em um dicionário, e a cada flush_interval_seconds o conteúdo é
+    gravado em um único statement. Vários pings no mesmo intervalo viram uma
+    única linha atualizada por dispositivo.
+    """
+
+    def __init__(self, device_repository: DeviceRepository, flush_interval_seconds: float):
+        self.device_repository = device_repository
+        self.flush_interval = flush_interval_seconds
+
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.received = 0
+        self.saved = 0
+        self.failed_flushes = 0
+
+    def record(self, device_id: str, seen_at: datetime) -> None:
+        """Chamado no event loop a cada heartbeat; nunca aguarda o banco."""
+        self.received += 1
+        self._pending[device_id] = seen_at
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.create_task(self._run(), name="device-heartbeat-writer")
+        logger.info(f"Gravação de heartbeats iniciada (intervalo={self.flush_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        await self.flush()
+        logger.info("Gravação de heartbeats finalizada")
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+
+        try:
+            self.saved += await self.device_repository.save_heartbeats(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Erro ao gravar heartbeats de {len(batch)} dispositivos: {e}")
+
+            # Heartbeats que chegaram durante a falha são mais novos e prevalecem
+            for device_id, seen_at in batch.items():
+                self._pending.setdefault(device_id, seen_at)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "saved": self.saved,
+            "failed_flushes": self.failed_flushes
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erro no ciclo de gravação de heartbeats: {e}")
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+import datetime
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any
+from uuid import UUID
+
+from domain.entities.device_route import DeviceRoute
+from domain.repositories.device_route import DeviceRouteRepository
+from domain.value_objects.ids import LaboratoryId
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceRoutingService:
+    """
+    Resolve laboratório/slot -> dispositivo a partir da tabela device_routes.
+
+    As rotas ficam indexadas em memória por (laboratory_id, slot_id), então a
+    resolução é um acesso a dicionário mais uma volta curta pelos dispositivos
+    daquele slot. Com mais de um dispensador abastecido, a escolha é round-robin
+    entre os que estão conectados. A tabela é relida a cada refresh_seconds;
+    o índice novo substitui o antigo de uma vez.
+
+    Com o broker fora, nenhum heartbeat chega e todos os dispositivos acabam
+    parecendo desconectados. Nesse caso a retirada vai para o dispositivo do slot
+    visto por último e o outbox segura o comando até o broker voltar.
+
+    A mesma tabela é a fonte do mapa dispositivo -> laboratórios usado no
+    monitoramento, entregue aos listeners a cada carga.
+    """
+
+    def __init__(self, device_route_repository: DeviceRouteRepository, refresh_seconds: float):
+        self.device_route_repository = device_route_repository
+        self.refresh_seconds = refresh_seconds
+        self.device_service = None
+        self.broker_connected: Optional[Callable[[], bool]] = None
+
+        self._routes: Dict[Tuple[UUID, int], List[DeviceRoute]] = {}
+        self._cursors: Dict[Tuple[UUID, int], int] = {}
+        self._device_laboratories: Dict[str, Set[str]] = {}
+        self._routes_listeners: List[Callable[[Dict[str, Set[str]]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+        self.resolved = 0
+        self.unavailable = 0
+        self.resolved_offline = 0
+
+    def set_device_service(self, device_service):
+        self.device_service = device_service
+
+    def set_broker_status(self, broker_connected: Callable[[], bool]):
+        self.broker_connected = broker_connected
+
+    def add_routes_listener(self, callback: Callable[[Dict[str, Set[str]]], None]):
+        """Callback(device_id -> laboratórios) chamado a cada carga da tabela."""
+        self._routes_listeners.append(callback)
+
+    def device_laboratories(self) -> Dict[str, Set[str]]:
+        return {device_id: set(laboratory_ids) for device_id, laboratory_ids in self._device_laboratories.items()}
+
+    def load(self, routes: List[DeviceRoute]) -> None:
+        index: Dict[Tuple[UUID, int], List[DeviceRoute]] = {}
+        device_laboratories: Dict[str, Set[str]] = {}
+        for route in routes:
+            # O dispositivo pertence ao laboratório mesmo com o slot desabastecido
+            device_laboratories.setdefault(route.device_id, set()).add(str(route.laboratory_id.value))
+            if route.is_stocked:
+                index.setdefault((route.laboratory_id.value, route.slot_id), []).append(route)
+
+        self._routes = index
+        self._cursors = {key: self._cursors.get(key, 0) for key in index}
+        self._device_laboratories = device_laboratories
+        logger.info(f"Rotas de dispositivos carregadas: {len(routes)} rotas, {len(index)} slots atendidos")
+
+        for callback in self._routes_listeners:
+            try:
+                callback(self.device_laboratories())
+            except Exception as e:
+                logger.error(f"Erro ao notificar listener de rotas: {e}")
+
+    async def reload(self) -> None:
+        self.load(await self.device_route_repository.find_all())
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        await self.reload()
+        self._task = asyncio.create_task(self._run(), name="device-routing-refresh")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def resolve(self, laboratory_id: LaboratoryId, slot_id: int) -> Optional[DeviceRoute]:
+        key = (laboratory_id.value, slot_id)
+        candidates = self._routes.get(key)
+        if not candidates:
+            self.unavailable += 1
+            return None
+
+        start = self._cursors.get(key, 0)
+        count = len(candidates)
+
+        for offset in range(count):
+            route = candidates[(start + offset) % count]
+            if self.device_service is None or self.device_service.is_device_connected(route.device_id):
+                self._cursors[key] = (start + offset + 1) % count
+                self.resolved += 1
+                return route
+
+        if self.broker_connected is not None and not self.broker_connected():
+            # Presença sem valor com o broker fora: o comando espera no outbox
+            route = self._last_seen(candidates)
+            self.resolved += 1
+            self.resolved_offline += 1
+            return route
+
+        self.unavailable += 1
+        return None
+
+    def _last_seen(self, candidates: List[DeviceRoute]) -> DeviceRoute:
+        oldest = datetime.datetime.min.replace(tzinfo=datetime.UTC)
+        return max(candidates, key=lambda route: self.device_service.get_last_seen(route.device_id) or oldest)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "slots": len(self._routes),
+            "routes": sum(len(routes) for routes in self._routes.values()),
+            "resolved": self.resolved,
+            "resolved_offline": self.resolved_offline,
+            "unavailable": self.unavailable
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Erro ao recarregar rotas de dispositivos: {e}")
\ No newline at end of file
@@ -1,29 +1,125 @@
+import asyncio
+import heapq
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Callable, Set, Tuple
+
+from domain.entities.device import Device
 
 logger = logging.getLogger(__name__)
 
 
 class DeviceService:
-
-    def __init__(self):
+    """
+    Rastreia a presença dos dispositivos pelos heartbeats.
+
+    Cada dispositivo online tem um prazo (último heartbeat + heartbeat_timeout) e
+    uma única entrada em um heap de expiração. Heartbeats só atualizam o prazo no
+    dicionário; a entrada do heap é reposicionada de forma preguiçosa quando chega
+    ao topo. Uma task em background dorme até o próximo prazo e emite as transições
+    de conectado/desconectado para os listeners.
+
+    O estado é espelhado na tabela devices: heartbeats passam pelo writer
+    (write-behind, coalescido por dispositivo) e load_registry() restaura o
+    índice no startup, inclusive o prazo restante dos dispositivos que estavam
+    online antes do restart.
+    """
+
+    def __init__(self, heartbeat_timeout: timedelta = timedelta(minutes=2)):
+        # device_id -> último contato (para exibição); inclui dispositivos offline
         self.connected_devices: Dict[str, datetime] = {}
-        self.device_whitelist: List[str] = []
-        self.heartbeat_timeout = timedelta(minutes=2)
+        self.device_whitelist: Set[str] = set()
+        self.heartbeat_timeout = heartbeat_timeout
+
+        # Só dispositivos online: device_id -> prazo em time.monotonic()
+        self._deadlines: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._in_heap: Set[str] = set()
+
+        self._status_listeners: List[Callable[[str, bool], None]] = []
+        self._heartbeat_writer = None
+        self._device_repository = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_status_listener(self, callback: Callable[[str, bool], None]):
+        """Callback(device_id, connected) chamado apenas nas transições de estado."""
+        self._status_listeners.append(callback)
+
+    def set_heartbeat_writer(self, heartbeat_writer):
+        self._heartbeat_writer = heartbeat_writer
+
+    def set_device_repository(self, device_repository):
+        self._device_repository = device_repository
+
+    def load_registry(self, devices: List[Device]) -> int:
+        """Carrega o registro persistido; chamado antes de start() e do MQTT."""
+        self.device_whitelist.update(device.device_id for device in devices if device.is_whitelisted)
+
+        now = datetime.now(timezone.utc)
+        now_monotonic = time.monotonic()
+        restored = 0
+
+        for device in devices:
+            if device.last_seen_at is None:
+                continue
+            if self.device_whitelist and device.device_id not in self.device_whitelist:
+                continue
+
+            self.connected_devices[device.device_id] = device.last_seen_at
+
+            remaining = self.heartbeat_timeout - (now - device.last_seen_at)
+            if remaining <= timedelta(0):
+                continue
+
+            deadline = now_monotonic + remaining.total_seconds()
+            self._deadlines[device.device_id] = deadline
+            self._in_heap.add(device.device_id)
+            heapq.heappush(self._expiry_heap, (deadline, device.device_id))
+            self._notify_status(device.device_id, True)
+            restored += 1
+
+        logger.info(f"Registro de dispositivos carregado: {len(devices)} dispositivos, {restored} online")
+        return restored
+
+    async def start(self):
+        if self._task is not None:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="device-liveness")
+        logger.info(f"Monitoramento de presença iniciado (timeout={self.heartbeat_timeout.total_seconds()}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def get_last_seen(self, device_id: str) -> Optional[datetime]:
+        return self.connected_devices.get(device_id)
 
     def set_device_whitelist(self, whitelist: List[str]):
-        self.device_whitelist = whitelist
+        self.device_whitelist = set(whitelist)
         logger.info(f"Whitelist de dispositivos configurada: {whitelist}")
 
+    async def update_device_whitelist(self, whitelist: List[str]):
+        """Grava a whitelist no registro e só então aplica em memória."""
+        if self._device_repository is not None:
+            await self._device_repository.save_whitelist(whitelist)
+        self.set_device_whitelist(whitelist)
+
     def authorize_device(self, device_id: str) -> bool:
         if not self.device_whitelist:
             logger.debug(f"Sem whitelist configurada, autorizando {device_id}")
-            self.connected_devices[device_id] = datetime.now()
+            self._touch(device_id)
             return True
 
         if device_id in self.device_whitelist:
-            self.connected_devices[device_id] = datetime.now()
+            self._touch(device_id)
             logger.info(f"Dispositivo {device_id} autorizado (whitelist)")
             return True
         else:
@@ -32,37 +128,22 @@ class DeviceService:
 
     def update_device_heartbeat(self, device_id: str):
         if device_id in self.connected_devices:
-            self.connected_devices[device_id] = datetime.now()
+            self._touch(device_id)
             logger.debug(f"Heartbeat atualizado para {device_id}")
         else:
             logger.warning(f"Heartbeat recebido de dispositivo não autorizado: {device_id}")
 
     def get_connected_devices(self) -> List[str]:
-        now = datetime.now()
-        active_devices = []
-
-        for device_id, last_seen in self.connected_devices.items():
-            if now - last_seen <= self.heartbeat_timeout:
-                active_devices.append(device_id)
-
-        return active_devices
+        now = time.monotonic()
+        return [device_id for device_id, deadline in self._deadlines.items() if deadline > now]
 
     def get_disconnected_devices(self) -> List[str]:
-        now = datetime.now()
-        disconnected_devices = []
-
-        for device_id, last_seen in self.connected_devices.items():
-            if now - last_seen > self.heartbeat_timeout:
-                disconnected_devices.append(device_id)
-
-        return disconnected_devices
+        return [device_id for device_id in self.connected_devices if not self.is_device_connected(device_id)]
 
     def is_device_connected(self, device_id: str) -> bool:
-        if device_id not in self.connected_devices:
-            return False
-
-        last_seen = self.connected_devices[device_id]
-        return datetime.now() - last_seen <= self.heartbeat_timeout
+        # O(1); o prazo é conferido aqui também para não depender do atraso da task
+        deadline = self._deadlines.get(device_id)
+        return deadline is not None and deadline > time.monotonic()
 
     def get_device_status(self, device_id: str) -> Dict:
         if device_id not in self.connected_devices:
@@ -79,23 +160,90 @@ class DeviceService:
             "device_id": device_id,
             "status": "connected" if is_connected else "disconnected",
             "last_seen": last_seen.isoformat(),
-            "last_seen_seconds_ago": int((datetime.now() - last_seen).total_seconds())
+            "last_seen_seconds_ago": int((datetime.now(timezone.utc) - last_seen).total_seconds())
         }
 
     def get_all_devices_status(self) -> List[Dict]:
         return [self.get_device_status(device_id) for device_id in self.connected_devices.keys()]
 
     def cleanup_old_devices(self, max_age_days: int = 7):
-        now = datetime.now()
-        cutoff = now - timedelta(days=max_age_days)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
 
-        to_remove = []
-        for device_id, last_seen in self.connected_devices.items():
-            if last_seen < cutoff:
-                to_remove.append(device_id)
+        # Dispositivos online nunca são candidatos, só os que já saíram do índice
+        to_remove = [
+            device_id
+            for device_id, last_seen in self.connected_devices.items()
+            if device_id not in self._deadlines and last_seen < cutoff
+        ]
 
         for device_id in to_remove:
             del self.connected_devices[device_id]
             logger.info(f"Dispositivo {device_id} removido (inativo há {max_age_days} dias)")
 
-        return len(to_remove)
\ No newline at end of file
+        return len(to_remove)
+
+    def _touch(self, device_id: str):
+        seen_at = datetime.now(timezone.utc)
+        self.connected_devices[device_id] = seen_at
+
+        if self._heartbeat_writer is not None:
+            self._heartbeat_writer.record(device_id, seen_at)
+
+        deadline = time.monotonic() + self.heartbeat_timeout.total_seconds()
+        was_online = device_id in self._deadlines
+        self._deadlines[device_id] = deadline
+
+        if device_id not in self._in_heap:
+            self._in_heap.add(device_id)
+            heapq.heappush(self._expiry_heap, (deadline, device_id))
+
+            # Novo topo do heap: a task precisa recalcular quanto dormir
+            if self._wakeup is not None and self._expiry_heap[0][1] == device_id:
+                self._wakeup.set()
+
+        if not was_online:
+            logger.info(f"Dispositivo {device_id} conectado")
+            self._notify_status(device_id, True)
+
+    def _expire_due(self):
+        now = time.monotonic()
+
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, device_id = heapq.heappop(self._expiry_heap)
+            deadline = self._deadlines.get(device_id)
+
+            if deadline is not None and deadline > now:
+                # Recebeu heartbeat depois que a entrada foi criada; reposiciona com o prazo atual
+                heapq.heappush(self._expiry_heap, (deadline, device_id))
+                continue
+
+            self._in_heap.discard(device_id)
+            self._deadlines.pop(device_id, None)
+            logger.warning(f"Dispositivo {device_id} sem heartbeat há {self.heartbeat_timeout.total_seconds()}s, desconectado")
+            self._notify_status(device_id, False)
+
+    def _notify_status(self, device_id: str, connected: bool):
+        for callback in self._status_listeners:
+            try:
+                callback(device_id, connected)
+            except Exception as e:
+                logger.error(f"Erro ao notificar listener de dispositivo: {e}")
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+
+            timeout = None
+            if self._expiry_heap:
+                timeout = max(0.0, self._expiry_heap[0][0] - time.monotonic())
+
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            try:
+                self._expire_due()
+            except Exception as e:
+                logger.error(f"Erro ao verificar expiração de dispositivos: {e}")
\ No newline at end of file
@@ -0,0 +1,336 @@
+import asyncio
+import datetime
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncContextManager, Callable, Deque, Dict, List, Optional, Set, Tuple, Any
+from uuid import UUID
+
+from application.services.event_hub import EventHub
+from application.services.reservation_settlement import OPEN_STATUSES, reservation_changes, publish_status_events
+from domain.entities.transaction import Transaction
+from domain.exceptions import InvalidTransactionStateError
+from domain.repositories.material import MaterialBalanceRepository
+from domain.repositories.outbox import OutboxRepository
+from domain.repositories.transaction import TransactionRepository
+from domain.repositories.unit_of_work import UnitOfWork
+from domain.value_objects.enums import TransactionStatus
+from domain.value_objects.ids import TransactionId
+
+logger = logging.getLogger(__name__)
+
+# Últimos acks descartados, expostos nas métricas para conferência manual
+DEAD_LETTER_LIMIT = 100
+
+
+@dataclass(frozen=True)
+class DispenseAck:
+    device_id: str
+    slot: int
+    status: TransactionStatus
+    received_at: datetime.datetime
+    transaction_id: Optional[UUID] = None
+
+
+@dataclass
+class _QueuedAck:
+    ack: DispenseAck
+    attempts: int = 0
+
+
+class DispenseAckProcessor:
+    """
+    Aplica as confirmações de dispensação dos dispositivos em lote.
+
+    Os acks se acumulam em memória e a cada batch_size acks ou flush_interval_ms
+    um lote inteiro vira, em uma transação: uma leitura das transações (travadas),
+    um UPDATE de status para todas e um UPDATE de saldos com as baixas/liberações
+    somadas por material. Acks sem transaction_id são atribuídos, por
+    dispositivo/slot, à transação aberta mais antiga cujo comando já foi publicado,
+    mesmo que o relay ainda não tenha registrado a entrega: o dispensador atende os
+    comandos em ordem. Firmwares que devolvem o transaction_id do comando casam direto.
+
+    Um lote que falha é reaplicado ack a ack. Contam tentativa os acks que falham
+    enquanto o banco responde; se nada passa, o problema é o banco e a rodada para
+    (só os acks já culpados antes contam). Após max_attempts eles vão para as dead
+    letters em vez de travar a fila.
+    """
+
+    def __init__(
+            self,
+            session_scope: Callable[[], AsyncContextManager],
+            transaction_repository: TransactionRepository,
+            material_balance_repository: MaterialBalanceRepository,
+            outbox_repository: OutboxRepository,
+            unit_of_work: UnitOfWork,
+            event_hub: EventHub,
+            batch_size: int,
+            flush_interval_ms: int,
+            max_pending: int,
+            max_attempts: int
+    ):
+        self.session_scope = session_scope
+        self.transaction_repository = transaction_repository
+        self.material_balance_repository = material_balance_repository
+        self.outbox_repository = outbox_repository
+        self.unit_of_work = unit_of_work
+        self.event_hub = event_hub
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+
+        self._pending: Deque[_QueuedAck] = deque()
+        self._dead_letters: Deque[DispenseAck] = deque(maxlen=DEAD_LETTER_LIMIT)
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.applied = 0
+        self.ignored = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+
+    def add(self, ack: DispenseAck) -> None:
+        """Chamado no event loop pelo handler MQTT; nunca aguarda o banco."""
+        if len(self._pending) >= self.max_pending:
+            # Ao contrário da telemetria, um ack descartado deixa reserva presa: descarta o mais novo e avisa
+            self.dropped += 1
+            logger.error(f"Fila de acks cheia, ack de {ack.device_id}/{ack.slot} descartado")
+            return
+
+        self._pending.append(_QueuedAck(ack))
+
+        if self._flush_requested is not None and len(self._pending) >= self.batch_size:
+            self._flush_requested.set()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._flush_requested = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="dispense-ack-processor")
+        logger.info(f"Processamento de acks de dispensação iniciado (lote={self.batch_size}, intervalo={self.flush_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        # Sem cancel: o ciclo termina o lote em andamento e sai
+        self._stopping = True
+        self._flush_requested.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        await self.flush()
+        logger.info("Processamento de acks de dispensação finalizado")
+
+    async def flush(self) -> None:
+        retry: List[_QueuedAck] = []
+        # O banco respondeu desde a última vez que um lote falhou por inteiro
+        healthy = False
+
+        while self._pending:
+            count = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+
+            try:
+                failed = await self._apply_or_isolate(batch)
+            except BaseException:
+                # Cancelado no meio do lote: os acks voltam para a fila; reaplicar um ack é inofensivo
+                self._pending.extendleft(reversed(batch))
+                self._pending.extendleft(reversed(retry))
+                raise
+
+            if len(failed) < len(batch):
+                healthy = True
+            elif healthy:
+                healthy = False
+            else:
+                # Nada passou: deve ser o banco. Só contam os acks que já falharam com ele respondendo
+                failed = [queued for queued in batch if queued.attempts > 0]
+                unproven = [queued for queued in batch if queued.attempts == 0]
+                if unproven:
+                    self._count_attempts(failed, retry)
+                    self._pending.extendleft(reversed(retry + unproven))
+                    return
+
+            self._count_attempts(failed, retry)
+
+        self._pending.extendleft(reversed(retry))
+
+    def _count_attempts(self, failed: List[_QueuedAck], retry: List[_QueuedAck]) -> None:
+        for queued in failed:
+            queued.attempts += 1
+            if queued.attempts >= self.max_attempts:
+                self._dead_letter(queued)
+            else:
+                retry.append(queued)
+
+    async def _apply_or_isolate(self, batch: List[_QueuedAck]) -> List[_QueuedAck]:
+        """Aplica o lote; se falhar, reaplica ack a ack. Devolve os acks que falharam."""
+        try:
+            await self._apply_batch([queued.ack for queued in batch])
+            return []
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Erro ao aplicar lote de {len(batch)} acks de dispensação: {e}")
+
+        if len(batch) == 1:
+            return batch
+
+        # Separa os acks que derrubam o lote dos demais
+        failed: List[_QueuedAck] = []
+        for queued in batch:
+            try:
+                await self._apply_batch([queued.ack])
+            except Exception as e:
+                logger.warning(f"Ack de {queued.ack.device_id}/{queued.ack.slot} falhou sozinho: {e}")
+                failed.append(queued)
+        return failed
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "applied": self.applied,
+            "ignored": self.ignored,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+            "dead_letters": [
+                {
+                    "device_id": ack.device_id,
+                    "slot": ack.slot,
+                    "status": ack.status.value,
+                    "transaction_id": str(ack.transaction_id) if ack.transaction_id else None,
+                    "received_at": ack.received_at.isoformat()
+                }
+                for ack in self._dead_letters
+            ]
+        }
+
+    def _dead_letter(self, queued: _QueuedAck) -> None:
+        ack = queued.ack
+        self.dead_lettered += 1
+        self._dead_letters.append(ack)
+        logger.error(
+            f"Ack {ack.status.value} de {ack.device_id}/{ack.slot} "
+            f"(transação {ack.transaction_id}) descartado após {queued.attempts} tentativas"
+        )
+
+    async def _apply_batch(self, batch: List[DispenseAck]) -> None:
+        async with self.session_scope():
+            assignments = await self._assign_transactions(batch)
+
+            transactions = {
+                transaction.transaction_id.value: transaction
+                for transaction in await self.transaction_repository.find_by_ids(
+                    [TransactionId(transaction_id) for transaction_id in set(assignments.values())],
+                    for_update=True
+                )
+            }
+
+            changed: Dict[UUID, Transaction] = {}
+            settled: List[Transaction] = []
+            ignored = 0
+
+            for index, ack in enumerate(batch):
+                transaction = transactions.get(assignments.get(index))
+                if transaction is None:
+                    ignored += 1
+                    logger.warning(f"Ack de {ack.device_id}/{ack.slot} sem transação aberta correspondente")
+                    continue
+
+                was_open = transaction.status in OPEN_STATUSES
+                if not self._apply_ack(transaction, ack):
+                    ignored += 1
+                    continue
+
+                changed[transaction.transaction_id.value] = transaction
+                if was_open and transaction.status not in OPEN_STATUSES:
+                    settled.append(transaction)
+
+            await self.transaction_repository.update_statuses(list(changed.values()))
+
+            changes = reservation_changes(settled)
+            updated = await self.material_balance_repository.apply_reservation_changes(changes)
+            if updated < len(changes):
+                logger.warning(f"{len(changes) - updated} saldos com reserva menor que a baixa; mantidos sem alteração")
+
+            await self.unit_of_work.commit()
+
+        self.applied += len(batch) - ignored
+        self.ignored += ignored
+        publish_status_events(self.event_hub, changed.values())
+
+    async def _assign_transactions(self, batch: List[DispenseAck]) -> Dict[int, UUID]:
+        """Posição do ack no lote -> transaction_id."""
+        assignments: Dict[int, UUID] = {}
+        explicit: Set[UUID] = set()
+
+        for index, ack in enumerate(batch):
+            if ack.transaction_id is not None:
+                assignments[index] = ack.transaction_id
+                explicit.add(ack.transaction_id)
+
+        anonymous = [index for index, ack in enumerate(batch) if ack.transaction_id is None]
+        if not anonymous:
+            return assignments
+
+        queues: Dict[Tuple[str, int], Deque[UUID]] = {}
+        for device_id, slot, transaction_id in await self.outbox_repository.find_open_dispatches(
+                sorted({batch[index].device_id for index in anonymous})
+        ):
+            if transaction_id not in explicit:
+                queues.setdefault((device_id, slot), deque()).append(transaction_id)
+
+        for index in anonymous:
+            ack = batch[index]
+            queue = queues.get((ack.device_id, ack.slot))
+            if not queue:
+                continue
+
+            # "Iniciado" se refere ao comando da frente; só o ack final avança a fila
+            assignments[index] = queue[0]
+            if ack.status != TransactionStatus.IN_PROGRESS:
+                queue.popleft()
+
+        return assignments
+
+    @staticmethod
+    def _apply_ack(transaction: Transaction, ack: DispenseAck) -> bool:
+        try:
+            if ack.status == TransactionStatus.IN_PROGRESS:
+                transaction.start_processing()
+            elif ack.status == TransactionStatus.COMPLETED:
+                # O dispositivo pode não enviar o "iniciado"
+                if transaction.is_authorized():
+                    transaction.start_processing()
+                transaction.complete()
+            elif ack.status == TransactionStatus.FAILED:
+                if transaction.status == TransactionStatus.FAILED:
+                    return False
+                transaction.fail()
+            else:
+                return False
+            return True
+        except InvalidTransactionStateError as e:
+            # Ack repetido ou fora de ordem: o estado já registrado prevalece
+            logger.info(f"Ack {ack.status.value} ignorado para transação {transaction.transaction_id.value}: {e}")
+            return False
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erro no ciclo de processamento de acks: {e}")
\ No newline at end of file
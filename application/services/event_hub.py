@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Canal que recebe eventos de todos os laboratórios (telas globais, ex.: /transactions/recent)
+GLOBAL_CHANNEL = "*"
+
+
+def encode_event(event_type: str, data: Any) -> bytes:
+    """Monta o frame SSE uma única vez; o mesmo bytes é entregue a todos os assinantes."""
+    if isinstance(data, bytes):
+        payload = data.decode('utf-8')
+    else:
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event_type}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class Subscription:
+    def __init__(self, hub: "EventHub", channel: str, queue_size: int, keepalive_seconds: float):
+        self._hub = hub
+        self.channel = channel
+        self.keepalive_seconds = keepalive_seconds
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+
+        try:
+            frame = await asyncio.wait_for(self.queue.get(), timeout=self.keepalive_seconds)
+        except asyncio.TimeoutError:
+            # Comentário SSE mantém proxies e o navegador com a conexão aberta
+            return b": keepalive\n\n"
+
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+
+class EventHub:
+    """
+    Pub/sub em memória por canal (id do laboratório). Cada assinante tem fila
+    limitada; quem não acompanha o ritmo é desconectado em vez de segurar
+    memória ou atrasar os demais. O cliente SSE reconecta e recarrega o estado.
+    """
+
+    def __init__(self, queue_size: int = 100, keepalive_seconds: float = 15.0):
+        self.queue_size = queue_size
+        self.keepalive_seconds = keepalive_seconds
+        self._channels: Dict[str, Set[Subscription]] = {}
+
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.queue_size, self.keepalive_seconds)
+        self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+        subscription.closed = True
+
+    def publish(self, channel: Optional[str], event_type: str, data: Any) -> None:
+        """Não bloqueia; chamado no event loop."""
+        subscribers = self._channels.get(channel)
+        if not subscribers:
+            return
+
+        frame = encode_event(event_type, data)
+        self.published += 1
+
+        for subscription in list(subscribers):
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.dropped_subscribers += 1
+        logger.warning(f"Assinante lento desconectado do canal {subscription.channel}")
+
+        self.unsubscribe(subscription)
+
+        # Descarta o atraso acumulado e sinaliza o fim do stream
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(subscribers) for subscribers in self._channels.values()),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers
+        }
\ No newline at end of file
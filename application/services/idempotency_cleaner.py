@@ -0,0 +1,73 @@
+import asyncio
+import datetime
+import logging
+from typing import AsyncContextManager, Callable, Optional
+
+from domain.repositories.idempotency import IdempotencyRepository
+from domain.repositories.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyCleaner:
+    """Remove chaves de idempotência expiradas em lotes, a cada interval_seconds."""
+
+    def __init__(
+            self,
+            session_scope: Callable[[], AsyncContextManager],
+            idempotency_repository: IdempotencyRepository,
+            unit_of_work: UnitOfWork,
+            interval_seconds: float,
+            batch_size: int
+    ):
+        self.session_scope = session_scope
+        self.idempotency_repository = idempotency_repository
+        self.unit_of_work = unit_of_work
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+
+        self._task: Optional[asyncio.Task] = None
+        self.deleted = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.create_task(self._run(), name="idempotency-cleaner")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def cleanup(self) -> int:
+        total = 0
+        now = datetime.datetime.now(datetime.UTC)
+
+        while True:
+            # Um commit por lote para não segurar locks de muitas linhas de uma vez
+            async with self.session_scope():
+                deleted = await self.idempotency_repository.delete_expired(now, self.batch_size)
+                await self.unit_of_work.commit()
+
+            total += deleted
+            if deleted < self.batch_size:
+                break
+
+        if total:
+            self.deleted += total
+            logger.info(f"{total} chaves de idempotência expiradas removidas")
+
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                await self.cleanup()
+            except Exception as e:
+                logger.error(f"Erro ao remover chaves de idempotência expiradas: {e}")
\ No newline at end of file
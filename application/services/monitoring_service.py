@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from application.services.device_service import DeviceService
+from application.services.event_hub import EventHub, GLOBAL_CHANNEL
+from application.services.temperature_service import TemperatureService
+
+logger = logging.getLogger(__name__)
+
+_TEMPERATURE_STATUS = {
+    "normal": "Normal",
+    "high": "Alta",
+    "low": "Baixa"
+}
+
+
+@dataclass
+class _Snapshot:
+    body: bytes
+    latest: Optional[Tuple[float, float]] = None
+    operational: bool = False
+
+
+@dataclass
+class _LaboratoryState:
+    device_ids: Set[str] = field(default_factory=set)
+    snapshot: Optional[_Snapshot] = None
+
+
+class MonitoringService:
+    """
+    Mantém o payload de /monitoring pronto, por laboratório e global.
+
+    Os snapshots são recalculados quando chegam leituras de temperatura ou quando
+    um dispositivo conecta/desconecta (via listeners dos services) e guardados já
+    serializados, então uma consulta só devolve bytes prontos.
+
+    O mapa dispositivo -> laboratórios vem da tabela device_routes, a mesma usada
+    no roteamento das retiradas (ver set_device_laboratories).
+
+    A publicação no EventHub é agrupada: em uma rajada de telemetria cada canal
+    recebe no máximo um snapshot por publish_interval_ms, e só se o corpo mudou
+    desde o último enviado. Assim as filas dos assinantes SSE não enchem.
+    """
+
+    def __init__(
+            self,
+            temperature_service: TemperatureService,
+            device_service: DeviceService,
+            event_hub: Optional[EventHub] = None,
+            publish_interval_ms: int = 1000
+    ):
+        self.temperature_service = temperature_service
+        self.device_service = device_service
+        self.event_hub = event_hub
+        self.publish_interval = publish_interval_ms / 1000
+
+        self._dirty_channels: Set[str] = set()
+        self._published: Dict[str, bytes] = {}
+        self._publish_handle: Optional[asyncio.TimerHandle] = None
+        self._device_laboratories: Dict[str, Set[str]] = {}
+
+        # Chave None agrupa dispositivos sem laboratório; entram só no snapshot global
+        self._laboratories: Dict[Optional[str], _LaboratoryState] = {}
+
+        self._empty_body = self._serialize(None, False)
+        self._global_snapshot = _Snapshot(body=self._empty_body)
+
+        temperature_service.add_listener(self.refresh_device)
+        device_service.add_status_listener(lambda device_id, connected: self.refresh_device(device_id))
+
+    def set_device_laboratories(self, device_laboratories: Dict[str, Set[str]]) -> None:
+        """Listener do DeviceRoutingService: reagrupa os dispositivos quando as rotas mudam."""
+        if device_laboratories == self._device_laboratories:
+            return
+
+        known_devices: Set[str] = set()
+        for state in self._laboratories.values():
+            known_devices |= state.device_ids
+
+        laboratories: Dict[Optional[str], _LaboratoryState] = {}
+        for device_id, laboratory_ids in device_laboratories.items():
+            for laboratory_id in laboratory_ids:
+                laboratories.setdefault(laboratory_id, _LaboratoryState()).device_ids.add(device_id)
+
+        # Dispositivos já vistos que saíram das rotas continuam no snapshot global
+        for device_id in known_devices - device_laboratories.keys():
+            laboratories.setdefault(None, _LaboratoryState()).device_ids.add(device_id)
+
+        for state in laboratories.values():
+            state.snapshot = self._build_laboratory_snapshot(state.device_ids)
+
+        self._device_laboratories = {device_id: set(ids) for device_id, ids in device_laboratories.items()}
+        self._laboratories = laboratories
+        self._global_snapshot = self._build_global_snapshot()
+
+    def refresh_device(self, device_id: str) -> None:
+        laboratory_ids = self._device_laboratories.get(device_id) or {None}
+
+        states = []
+        for laboratory_id in laboratory_ids:
+            state = self._laboratories.setdefault(laboratory_id, _LaboratoryState())
+            state.device_ids.add(device_id)
+            state.snapshot = self._build_laboratory_snapshot(state.device_ids)
+            states.append((laboratory_id, state))
+
+        self._global_snapshot = self._build_global_snapshot()
+
+        if self.event_hub is not None:
+            self._dirty_channels.update(laboratory_id for laboratory_id, _ in states if laboratory_id is not None)
+            self._dirty_channels.add(GLOBAL_CHANNEL)
+            self._schedule_publish()
+
+    def _schedule_publish(self) -> None:
+        if self._publish_handle is not None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Fora do event loop não há como agendar; publica na hora
+            self._publish_dirty()
+            return
+
+        self._publish_handle = loop.call_later(self.publish_interval, self._publish_dirty)
+
+    def _publish_dirty(self) -> None:
+        self._publish_handle = None
+        channels, self._dirty_channels = self._dirty_channels, set()
+
+        for channel in channels:
+            if channel == GLOBAL_CHANNEL:
+                body = self._global_snapshot.body
+            else:
+                body = self.get_laboratory_snapshot(channel)
+
+            if self._published.get(channel) == body:
+                continue
+
+            self._published[channel] = body
+            self.event_hub.publish(channel, "monitoring", body)
+
+    def get_laboratory_snapshot(self, laboratory_id: str) -> bytes:
+        state = self._laboratories.get(laboratory_id)
+        if state is None:
+            return self._empty_body
+
+        if state.snapshot is None:
+            state.snapshot = self._build_laboratory_snapshot(state.device_ids)
+
+        return state.snapshot.body
+
+    def get_global_snapshot(self) -> bytes:
+        return self._global_snapshot.body
+
+    def _build_laboratory_snapshot(self, device_ids: Set[str]) -> _Snapshot:
+        latest = None
+        operational = False
+
+        for device_id in device_ids:
+            reading = self.temperature_service.get_latest_reading(device_id)
+            if reading is not None and (latest is None or reading[1] > latest[1]):
+                latest = reading
+
+            operational = operational or self.device_service.is_device_connected(device_id)
+
+        return _Snapshot(
+            body=self._serialize(latest, operational),
+            latest=latest,
+            operational=operational
+        )
+
+    def _build_global_snapshot(self) -> _Snapshot:
+        snapshots: List[_Snapshot] = [
+            state.snapshot for state in self._laboratories.values() if state.snapshot is not None
+        ]
+
+        latest = None
+        operational = False
+
+        for snapshot in snapshots:
+            if snapshot.latest is not None and (latest is None or snapshot.latest[1] > latest[1]):
+                latest = snapshot.latest
+            operational = operational or snapshot.operational
+
+        return _Snapshot(
+            body=self._serialize(latest, operational),
+            latest=latest,
+            operational=operational
+        )
+
+    def _serialize(self, latest: Optional[Tuple[float, float]], operational: bool) -> bytes:
+        if latest is None:
+            temperature = {"value": None, "unit": "°C", "status": "Sem dados"}
+            last_reading_at = None
+        else:
+            value, timestamp = latest
+            temperature = {
+                "value": round(value, 1),
+                "unit": "°C",
+                "status": _TEMPERATURE_STATUS[self.temperature_service.classify_temperature(value)]
+            }
+            last_reading_at = datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+        payload = {
+            "temperature": temperature,
+            # Nenhum dispositivo envia umidade ainda
+            "humidity": {"value": None, "unit": "%", "status": "Sem dados"},
+            "operationalStatus": "Operacional" if operational else "Inoperante",
+            "lastReadingAt": last_reading_at
+        }
+
+        return json.dumps(payload, ensure_ascii=False).encode('utf-8')
\ No newline at end of file
@@ -0,0 +1,193 @@
+import asyncio
+import datetime
+import logging
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Tuple, Any
+
+from domain.entities.outbox_message import OutboxMessage
+from domain.repositories.outbox import OutboxRepository
+from domain.repositories.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """
+    Drena a tabela outbox_messages para o broker.
+
+    Cada ciclo reivindica um lote de mensagens prontas (FOR UPDATE SKIP LOCKED,
+    com prazo de lease_seconds) e faz commit; só então publica todas em paralelo,
+    aguardando a confirmação do broker sem travar linhas nem segurar conexão do
+    pool. Em uma segunda transação curta marca as entregues e reagenda as que
+    falharam com backoff exponencial. Depois de max_attempts tentativas a
+    mensagem é marcada como falha e sai da fila. Se o processo morrer no meio, a
+    reivindicação vence e a mensagem é reenviada: a entrega é pelo menos uma vez,
+    e o payload leva o transaction_id para o dispositivo descartar repetidos.
+
+    O relay é acordado por notify() logo após o commit de uma retirada; o
+    polling a cada poll_interval_seconds cobre reagendamentos, outras instâncias
+    e o período em que o broker esteve fora.
+    """
+
+    PURGE_INTERVAL_SECONDS = 3600
+
+    def __init__(
+            self,
+            session_scope: Callable[[], AsyncContextManager],
+            outbox_repository: OutboxRepository,
+            unit_of_work: UnitOfWork,
+            publisher: Callable[[OutboxMessage], Awaitable[bool]],
+            is_available: Callable[[], bool],
+            batch_size: int,
+            poll_interval_seconds: float,
+            retry_base_seconds: float,
+            retry_max_seconds: float,
+            max_attempts: int,
+            retention_seconds: float,
+            lease_seconds: float
+    ):
+        self.session_scope = session_scope
+        self.outbox_repository = outbox_repository
+        self.unit_of_work = unit_of_work
+        self.publisher = publisher
+        self.is_available = is_available
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval_seconds
+        self.retry_base = retry_base_seconds
+        self.retry_max = retry_max_seconds
+        self.max_attempts = max_attempts
+        self.retention = datetime.timedelta(seconds=retention_seconds)
+        self.lease = datetime.timedelta(seconds=lease_seconds)
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge: Optional[float] = None
+
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dead = 0
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-relay")
+        logger.info(f"Relay do outbox iniciado (lote={self.batch_size}, intervalo={self.poll_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Relay do outbox finalizado")
+
+    async def relay_batch(self) -> int:
+        # Broker fora: nem trava linhas, as mensagens esperam na tabela
+        if not self.is_available():
+            return 0
+
+        now = datetime.datetime.now(datetime.UTC)
+        async with self.session_scope():
+            messages = await self.outbox_repository.claim_pending(now, now + self.lease, self.batch_size)
+            await self.unit_of_work.commit()
+
+        if not messages:
+            return 0
+
+        # Fora de transação: a espera pelo PUBACK não trava linhas nem prende conexão
+        results = await asyncio.gather(*(self._deliver(message) for message in messages))
+
+        now = datetime.datetime.now(datetime.UTC)
+        delivered_ids = []
+        failed = []
+
+        for message, (success, error) in zip(messages, results):
+            if success:
+                delivered_ids.append(message.message_id)
+                continue
+
+            # attempts já foi incrementado na reivindicação
+            message.last_error = error
+            if message.attempts >= self.max_attempts:
+                message.failed_at = now
+                self.dead += 1
+                logger.error(
+                    f"Comando {message.command_type} para {message.device_id} descartado após "
+                    f"{message.attempts} tentativas (mensagem {message.message_id}): {error}"
+                )
+            else:
+                message.available_at = now + self._backoff(message.attempts)
+            failed.append(message)
+
+        async with self.session_scope():
+            await self.outbox_repository.mark_delivered(delivered_ids, now)
+            await self.outbox_repository.save_attempts(failed)
+            await self.unit_of_work.commit()
+
+        self.delivered += len(delivered_ids)
+        self.failed_attempts += len(failed)
+        return len(messages)
+
+    async def purge_delivered(self) -> int:
+        cutoff = datetime.datetime.now(datetime.UTC) - self.retention
+        total = 0
+
+        while True:
+            async with self.session_scope():
+                deleted = await self.outbox_repository.delete_delivered_before(cutoff, self.batch_size * 10)
+                await self.unit_of_work.commit()
+
+            total += deleted
+            if deleted < self.batch_size * 10:
+                break
+
+        if total:
+            logger.info(f"{total} mensagens entregues removidas do outbox")
+        return total
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+            "dead": self.dead,
+            "broker_available": self.is_available()
+        }
+
+    def _backoff(self, attempts: int) -> datetime.timedelta:
+        return datetime.timedelta(seconds=min(self.retry_base * (2 ** (attempts - 1)), self.retry_max))
+
+    async def _deliver(self, message: OutboxMessage) -> Tuple[bool, Optional[str]]:
+        try:
+            if await self.publisher(message):
+                return True, None
+            return False, "publicação não confirmada pelo broker"
+        except Exception as e:
+            return False, str(e)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+
+            try:
+                # Em rajadas, segue drenando enquanto os lotes vierem cheios
+                while await self.relay_batch() == self.batch_size:
+                    pass
+
+                if self._last_purge is None or loop.time() - self._last_purge >= self.PURGE_INTERVAL_SECONDS:
+                    self._last_purge = loop.time()
+                    await self.purge_delivered()
+            except Exception as e:
+                logger.error(f"Erro no ciclo do relay do outbox: {e}")
\ No newline at end of file
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from application.exceptions import IdempotencyKeyConflictError
+
+
+class RequestCoalescer:
+    """
+    Junta requisições concorrentes com a mesma chave de idempotência: a primeira
+    executa e as demais aguardam o mesmo future, recebendo o mesmo resultado ou
+    a mesma exceção. Vale apenas dentro do processo; entre instâncias quem
+    decide é a constraint da tabela idempotency_keys.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, fingerprint: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, future = in_flight
+            if in_flight_fingerprint != fingerprint:
+                raise IdempotencyKeyConflictError(key)
+
+            self.coalesced += 1
+            # shield: o cancelamento de um retry não pode cancelar a execução original
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+
+        try:
+            result = await operation()
+        except BaseException as e:
+            future.set_exception(e)
+            # Marca a exceção como consumida mesmo quando ninguém mais aguardava
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "coalesced": self.coalesced
+        }
\ No newline at end of file
@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, Tuple
+
+from application.services.event_hub import EventHub, GLOBAL_CHANNEL
+from domain.entities.transaction import Transaction
+from domain.value_objects.enums import TransactionStatus
+from domain.value_objects.ids import LaboratoryId, MaterialId
+
+OPEN_STATUSES = (TransactionStatus.AUTHORIZED, TransactionStatus.IN_PROGRESS)
+
+
+def reservation_changes(
+        settled: Iterable[Transaction]
+) -> Dict[Tuple[LaboratoryId, MaterialId], Tuple[int, int]]:
+    """
+    Soma, por laboratório/material, o que cada transação encerrada faz com a reserva:
+    COMPLETED consome (sai da reserva e do estoque), FAILED só libera. Parte do que
+    foi reservado, não dos itens: materiais inativos são reservados sem virar item.
+    O resultado vai inteiro para MaterialBalanceRepository.apply_reservation_changes.
+    """
+    changes: Dict[Tuple[LaboratoryId, MaterialId], Tuple[int, int]] = {}
+
+    for transaction in settled:
+        if transaction.status == TransactionStatus.COMPLETED:
+            consumed_factor, released_factor = 1, 0
+        elif transaction.status == TransactionStatus.FAILED:
+            consumed_factor, released_factor = 0, 1
+        else:
+            continue
+
+        for material_id, quantity in transaction.get_reserved_quantities():
+            key = (transaction.laboratory_id, material_id)
+            consumed, released = changes.get(key, (0, 0))
+            changes[key] = (
+                consumed + quantity * consumed_factor,
+                released + quantity * released_factor
+            )
+
+    return changes
+
+
+def publish_status_events(event_hub: EventHub, transactions: Iterable[Transaction]) -> None:
+    for transaction in transactions:
+        laboratory_channel = str(transaction.laboratory_id.value)
+        event = {
+            "transactionId": str(transaction.transaction_id.value),
+            "laboratoryId": laboratory_channel,
+            "status": transaction.status.value,
+            "completedAt": transaction.completed_at.isoformat() if transaction.completed_at else None
+        }
+        event_hub.publish(laboratory_channel, "transaction_status", event)
+        event_hub.publish(GLOBAL_CHANNEL, "transaction_status", event)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import logging
+from typing import AsyncContextManager, Callable, Optional, Dict, Any, Tuple
+
+from application.services.event_hub import EventHub
+from application.services.reservation_settlement import reservation_changes, publish_status_events
+from domain.repositories.material import MaterialBalanceRepository
+from domain.repositories.outbox import OutboxRepository
+from domain.repositories.transaction import TransactionRepository
+from domain.repositories.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationSweeper:
+    """
+    Falha as retiradas que ficaram abertas além do prazo e devolve o que estava
+    reservado: AUTHORIZED após ttl_seconds, IN_PROGRESS após in_progress_ttl_seconds.
+    O prazo maior das iniciadas dá tempo ao ack final, mas um ack perdido (queda do
+    dispositivo, fila de acks cheia, dead letter) não prende a reserva para sempre.
+
+    A varredura anda em lotes de batch_size transações, cada um em uma transação
+    curta: busca pelo índice parcial de abertas (SKIP LOCKED, sem disputar com o
+    processamento de acks), cancelamento dos comandos ainda não enviados (também
+    SKIP LOCKED; a transação cujo comando o relay está publicando fica para a
+    próxima varredura), um UPDATE de status e, por último, um UPDATE de saldos com
+    as liberações somadas por material/laboratório. Nenhum passo espera trava de
+    outro processo, e os saldos mais disputados ficam travados só até o commit.
+    """
+
+    CANCEL_REASON = "transação expirada antes do envio"
+
+    def __init__(
+            self,
+            session_scope: Callable[[], AsyncContextManager],
+            transaction_repository: TransactionRepository,
+            material_balance_repository: MaterialBalanceRepository,
+            outbox_repository: OutboxRepository,
+            unit_of_work: UnitOfWork,
+            event_hub: EventHub,
+            ttl_seconds: float,
+            in_progress_ttl_seconds: float,
+            interval_seconds: float,
+            batch_size: int
+    ):
+        self.session_scope = session_scope
+        self.transaction_repository = transaction_repository
+        self.material_balance_repository = material_balance_repository
+        self.outbox_repository = outbox_repository
+        self.unit_of_work = unit_of_work
+        self.event_hub = event_hub
+        self.ttl = datetime.timedelta(seconds=ttl_seconds)
+        self.in_progress_ttl = datetime.timedelta(seconds=in_progress_ttl_seconds)
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.expired = 0
+        self.sweeps = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.create_task(self._run(), name="reservation-sweeper")
+        logger.info(
+            f"Expiração de reservas iniciada (ttl={self.ttl.total_seconds()}s, "
+            f"em andamento={self.in_progress_ttl.total_seconds()}s, intervalo={self.interval}s)"
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def sweep(self) -> int:
+        # Cortes fixos na varredura: o que abrir durante ela fica para a próxima
+        now = datetime.datetime.now(datetime.UTC)
+        authorized_before = now - self.ttl
+        in_progress_before = now - self.in_progress_ttl
+        total = 0
+
+        while True:
+            expired, exhausted = await self._sweep_batch(authorized_before, in_progress_before)
+            total += expired
+            if exhausted:
+                break
+
+        self.sweeps += 1
+        if total:
+            self.expired += total
+            logger.warning(f"{total} retiradas expiradas sem confirmação do dispositivo; reservas liberadas")
+
+        return total
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl.total_seconds(),
+            "in_progress_ttl_seconds": self.in_progress_ttl.total_seconds(),
+            "sweeps": self.sweeps,
+            "expired": self.expired
+        }
+
+    async def _sweep_batch(
+            self,
+            authorized_before: datetime.datetime,
+            in_progress_before: datetime.datetime
+    ) -> Tuple[int, bool]:
+        """(transações expiradas, se não há mais o que varrer nesta rodada)."""
+        async with self.session_scope():
+            found = await self.transaction_repository.find_stale_open(
+                authorized_before, in_progress_before, self.batch_size
+            )
+            if not found:
+                return 0, True
+
+            # Comandos primeiro: o que estiver em publicação mantém a transação aberta
+            busy = await self.outbox_repository.cancel_pending(
+                [transaction.transaction_id.value for transaction in found],
+                self.CANCEL_REASON,
+                datetime.datetime.now(datetime.UTC)
+            )
+            transactions = [transaction for transaction in found if transaction.transaction_id.value not in busy]
+
+            for transaction in transactions:
+                transaction.fail()
+
+            await self.transaction_repository.update_statuses(transactions)
+
+            changes = reservation_changes(transactions)
+            updated = await self.material_balance_repository.apply_reservation_changes(changes)
+            if updated < len(changes):
+                logger.warning(f"{len(changes) - updated} saldos com reserva menor que a liberação; mantidos sem alteração")
+
+            await self.unit_of_work.commit()
+
+        if busy:
+            logger.info(f"{len(busy)} retiradas expiradas com comando em publicação; ficam para a próxima varredura")
+
+        publish_status_events(self.event_hub, transactions)
+        # Com transações puladas, o próximo lote as encontraria de novo
+        return len(transactions), bool(busy) or len(found) < self.batch_size
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Erro na varredura de reservas expiradas: {e}")
+
+            await asyncio.sleep(self.interval)
\ No newline at end of file
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Any
+
+from domain.entities.temperature_reading import TemperatureReading
+from domain.repositories.temperature import TemperatureRepository
+
+logger = logging.getLogger(__name__)
+
+
+class TemperatureBatcher:
+    """
+    Acumula leituras e grava em lote a cada batch_size leituras ou flush_interval_ms,
+    o que vier primeiro. A fila pendente é limitada: se o banco ficar para trás,
+    as leituras mais antigas são descartadas e contabilizadas.
+    """
+
+    def __init__(
+            self,
+            temperature_repository: TemperatureRepository,
+            batch_size: int,
+            flush_interval_ms: int,
+            max_pending: int
+    ):
+        self.temperature_repository = temperature_repository
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+
+        self._pending: Deque[TemperatureReading] = deque(maxlen=max_pending)
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.saved = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def add(self, readings: Iterable[TemperatureReading]) -> None:
+        """Chamado no event loop pelos handlers MQTT; nunca aguarda o banco."""
+        for reading in readings:
+            if len(self._pending) == self.max_pending:
+                self.dropped += 1
+            self._pending.append(reading)
+
+        if self._flush_requested is not None and len(self._pending) >= self.batch_size:
+            self._flush_requested.set()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._flush_requested = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="temperature-batcher")
+        logger.info(f"Gravação de temperaturas em lote iniciada (lote={self.batch_size}, intervalo={self.flush_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        # Sem cancel: o ciclo termina o lote em andamento e sai
+        self._stopping = True
+        self._flush_requested.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        # Grava o que ainda estiver pendente antes de encerrar
+        await self.flush()
+        logger.info("Gravação de temperaturas em lote finalizada")
+
+    async def flush(self) -> None:
+        while self._pending:
+            count = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+
+            try:
+                self.saved += await self.temperature_repository.save_batch(batch)
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"Erro ao gravar lote de {len(batch)} temperaturas: {e}")
+                self._requeue(batch)
+                return
+            except BaseException:
+                # Cancelado no meio da gravação: o lote não pode sumir junto
+                self._requeue(batch)
+                raise
+
+    def _requeue(self, batch) -> None:
+        # Devolve o lote à frente da fila se couber; senão ele é descartado
+        if len(self._pending) + len(batch) <= self.max_pending:
+            self._pending.extendleft(reversed(batch))
+        else:
+            self.dropped += len(batch)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "saved": self.saved,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erro no ciclo de gravação de temperaturas: {e}")
\ No newline at end of file
@@ -0,0 +1,145 @@
+import math
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+class _BucketedWindow:
+    """
+    Janela deslizante de buckets_count buckets de bucket_seconds cada.
+    Cada bucket guarda count/sum/min/max; consultar a janela custa O(buckets_count),
+    constante e independente de quantas leituras chegaram.
+    """
+
+    __slots__ = ("bucket_seconds", "buckets_count", "_ids", "_counts", "_sums", "_mins", "_maxs")
+
+    def __init__(self, bucket_seconds: float, buckets_count: int):
+        self.bucket_seconds = bucket_seconds
+        self.buckets_count = buckets_count
+        self._ids = array('q', [-1]) * buckets_count
+        self._counts = array('q', [0]) * buckets_count
+        self._sums = array('d', [0.0]) * buckets_count
+        self._mins = array('d', [math.inf]) * buckets_count
+        self._maxs = array('d', [-math.inf]) * buckets_count
+
+    def add(self, timestamp: float, value: float) -> None:
+        bucket_id = int(timestamp // self.bucket_seconds)
+        slot = bucket_id % self.buckets_count
+
+        if self._ids[slot] != bucket_id:
+            # Bucket reaproveitado de uma volta anterior do anel
+            self._ids[slot] = bucket_id
+            self._counts[slot] = 0
+            self._sums[slot] = 0.0
+            self._mins[slot] = math.inf
+            self._maxs[slot] = -math.inf
+
+        self._counts[slot] += 1
+        self._sums[slot] += value
+        if value < self._mins[slot]:
+            self._mins[slot] = value
+        if value > self._maxs[slot]:
+            self._maxs[slot] = value
+
+    def stats(self, now: float) -> Dict:
+        oldest_id = int(now // self.bucket_seconds) - self.buckets_count + 1
+
+        count = 0
+        total = 0.0
+        minimum = math.inf
+        maximum = -math.inf
+
+        for slot in range(self.buckets_count):
+            if self._ids[slot] < oldest_id or self._counts[slot] == 0:
+                continue
+            count += self._counts[slot]
+            total += self._sums[slot]
+            minimum = min(minimum, self._mins[slot])
+            maximum = max(maximum, self._maxs[slot])
+
+        return _summary(count, total, minimum, maximum)
+
+
+class TemperatureHistory:
+    """
+    Histórico de um dispositivo em dois arrays('d') paralelos usados como anel
+    (valor e instante de recebimento, 16 bytes por leitura), com agregados
+    mantidos a cada inserção: totais desde o início e janelas de 1 minuto e 1 hora.
+    """
+
+    __slots__ = ("capacity", "_values", "_timestamps", "_head", "_size",
+                 "count", "_sum", "_min", "_max", "_last_minute", "_last_hour")
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self._values = array('d', [0.0]) * capacity
+        self._timestamps = array('d', [0.0]) * capacity
+        self._head = 0
+        self._size = 0
+
+        self.count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+        self._last_minute = _BucketedWindow(bucket_seconds=1, buckets_count=60)
+        self._last_hour = _BucketedWindow(bucket_seconds=60, buckets_count=60)
+
+    def append(self, value: float, timestamp: float) -> None:
+        self._values[self._head] = value
+        self._timestamps[self._head] = timestamp
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+        self.count += 1
+        self._sum += value
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+        self._last_minute.add(timestamp, value)
+        self._last_hour.add(timestamp, value)
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """(valor, timestamp) da leitura mais recente."""
+        if not self._size:
+            return None
+        index = (self._head - 1) % self.capacity
+        return self._values[index], self._timestamps[index]
+
+    def recent(self, limit: int) -> List[Tuple[float, float]]:
+        """Até limit leituras (valor, timestamp), da mais antiga para a mais recente."""
+        limit = min(limit, self._size)
+        start = self._head - limit
+        return [
+            (self._values[i % self.capacity], self._timestamps[i % self.capacity])
+            for i in range(start, self._head)
+        ]
+
+    def stats(self) -> Dict:
+        return _summary(self.count, self._sum, self._min, self._max)
+
+    def window_stats(self, now: float) -> Dict[str, Dict]:
+        return {
+            "last_minute": self._last_minute.stats(now),
+            "last_hour": self._last_hour.stats(now)
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def _summary(count: int, total: float, minimum: float, maximum: float) -> Dict:
+    if not count:
+        return {"count": 0, "avg": None, "min": None, "max": None}
+
+    return {
+        "count": count,
+        "avg": total / count,
+        "min": minimum,
+        "max": maximum
+    }
\ No newline at end of file
@@ -1,20 +1,52 @@
 import logging
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from application.config import get_config
+from application.services.temperature_history import TemperatureHistory
+from domain.entities.temperature_reading import TemperatureReading
 
 logger = logging.getLogger(__name__)
 
+config = get_config()
+
 
 class TemperatureService:
+    HIGH_TEMPERATURE_THRESHOLD = 30.0
+    LOW_TEMPERATURE_THRESHOLD = 5.0
 
-    def __init__(self):
-        self.temperature_buffer: Dict[str, List[Dict]] = {}
+    def __init__(self, history_size: int = None):
+        # Histórico em memória limitado por dispositivo; o histórico completo fica no banco
+        self.history_size = history_size or config.TEMPERATURE_HISTORY_SIZE
+        self.temperature_buffer: Dict[str, TemperatureHistory] = {}
         self.device_repository = None
-        self.temperature_repository = None
+        self.temperature_batcher = None
+        self._listeners: List[Callable[[str], None]] = []
 
-    def set_repositories(self, device_repo, temperature_repo):
+    def set_repositories(self, device_repo, temperature_batcher):
         self.device_repository = device_repo
-        self.temperature_repository = temperature_repo
+        self.temperature_batcher = temperature_batcher
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Callback chamado com o device_id após cada lote de leituras processado."""
+        self._listeners.append(callback)
+
+    @classmethod
+    def classify_temperature(cls, temperature: float) -> str:
+        if temperature > cls.HIGH_TEMPERATURE_THRESHOLD:
+            return "high"
+        if temperature < cls.LOW_TEMPERATURE_THRESHOLD:
+            return "low"
+        return "normal"
+
+    def get_latest_reading(self, device_id: str) -> Optional[Tuple[float, float]]:
+        """(temperatura, timestamp epoch de recebimento) da última leitura do dispositivo."""
+        history = self.temperature_buffer.get(device_id)
+        return history.latest() if history is not None else None
+
+    def get_device_ids(self) -> List[str]:
+        return list(self.temperature_buffer.keys())
 
     def process_temperature_data(self, device_id: str, temperature_data: Dict[str, Any]):
         try:
@@ -27,6 +59,9 @@ class TemperatureService:
 
             logger.info(f"Processando {len(readings)} leituras de temperatura do dispositivo {device_id}")
 
+            received_at = datetime.now(timezone.utc)
+            batch_timestamp = self._parse_timestamp(device_timestamp)
+
             processed_readings = []
             for reading in readings:
                 temperature = reading.get('temperature')
@@ -41,40 +76,84 @@ class TemperatureService:
                     'temperature': float(temperature),
                     'reading_timestamp': reading_timestamp,
                     'device_batch_timestamp': device_timestamp,
-                    'received_at': datetime.now().isoformat()
+                    'received_at': received_at.isoformat()
                 }
 
                 processed_readings.append(processed_reading)
 
             if processed_readings:
-                self._store_temperature_readings(device_id, processed_readings)
+                self._store_temperature_readings(device_id, processed_readings, received_at, batch_timestamp)
                 self._check_temperature_alerts(device_id, processed_readings)
+                self._notify_listeners(device_id)
 
         except Exception as e:
             logger.error(f"Erro ao processar dados de temperatura do dispositivo {device_id}: {e}")
 
-    def _store_temperature_readings(self, device_id: str, readings: List[Dict]):
-        if device_id not in self.temperature_buffer:
-            self.temperature_buffer[device_id] = []
+    def _store_temperature_readings(
+            self,
+            device_id: str,
+            readings: List[Dict],
+            received_at: datetime,
+            batch_timestamp: Optional[datetime]
+    ):
+        history = self.temperature_buffer.get(device_id)
+        if history is None:
+            history = self.temperature_buffer[device_id] = TemperatureHistory(self.history_size)
+
+        received_timestamp = received_at.timestamp()
+        for reading in readings:
+            history.append(reading['temperature'], received_timestamp)
+
+        logger.debug(f"Buffer de temperatura para {device_id}: {len(history)} leituras")
+
+        if self.temperature_batcher:
+            # Só enfileira; a gravação acontece em lote fora do caminho da mensagem
+            self.temperature_batcher.add(
+                TemperatureReading(
+                    device_id=device_id,
+                    temperature=reading['temperature'],
+                    received_at=received_at,
+                    reading_timestamp=self._parse_timestamp(reading['reading_timestamp']),
+                    device_batch_timestamp=batch_timestamp
+                )
+                for reading in readings
+            )
+
+    @staticmethod
+    def _parse_timestamp(value: Any) -> Optional[datetime]:
+        # Dispositivos enviam epoch (s ou ms) ou ISO 8601; o que não for reconhecido vira None
+        if value is None or isinstance(value, bool):
+            return None
+
+        try:
+            if isinstance(value, (int, float)):
+                seconds = value / 1000 if value > 1e11 else value
+                return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+            if isinstance(value, str):
+                parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            pass
 
-        self.temperature_buffer[device_id].extend(readings)
-        logger.debug(f"Buffer de temperatura para {device_id}: {len(self.temperature_buffer[device_id])} leituras")
+        return None
 
-        if self.temperature_repository:
+    def _notify_listeners(self, device_id: str):
+        for callback in self._listeners:
             try:
-                self.temperature_repository.save_temperature_batch(readings)
-                logger.debug(f"Leituras de temperatura salvas no banco: {len(readings)}")
+                callback(device_id)
             except Exception as e:
-                logger.error(f"Erro ao salvar temperaturas no banco: {e}")
+                logger.error(f"Erro ao notificar listener de temperatura: {e}")
 
     def _check_temperature_alerts(self, device_id: str, readings: List[Dict]):
         for reading in readings:
             temperature = reading['temperature']
+            classification = self.classify_temperature(temperature)
 
-            if temperature > 30.0:
+            if classification == "high":
                 logger.warning(f"ALERTA: Temperatura alta no dispositivo {device_id}: {temperature}°C")
                 self._trigger_temperature_alert(device_id, temperature, "high")
-            elif temperature < 5.0:
+            elif classification == "low":
                 logger.warning(f"ALERTA: Temperatura baixa no dispositivo {device_id}: {temperature}°C")
                 self._trigger_temperature_alert(device_id, temperature, "low")
 
@@ -90,13 +169,22 @@ class TemperatureService:
         logger.info(f"Alerta de temperatura disparado: {alert_data}")
 
     def get_latest_temperatures(self, device_id: str, limit: int = 10) -> List[Dict]:
-        if device_id not in self.temperature_buffer:
+        history = self.temperature_buffer.get(device_id)
+        if history is None:
             return []
 
-        return self.temperature_buffer[device_id][-limit:]
+        return [
+            {
+                'device_id': device_id,
+                'temperature': value,
+                'received_at': datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+            }
+            for value, timestamp in history.recent(limit)
+        ]
 
     def get_temperature_stats(self, device_id: str) -> Dict:
-        if device_id not in self.temperature_buffer:
+        history = self.temperature_buffer.get(device_id)
+        if history is None:
             return {
                 "device_id": device_id,
                 "total_readings": 0,
@@ -105,17 +193,19 @@ class TemperatureService:
                 "max_temperature": None
             }
 
-        readings = self.temperature_buffer[device_id]
-        temperatures = [r['temperature'] for r in readings]
+        # Agregados mantidos a cada leitura: custo constante, sem percorrer o histórico
+        totals = history.stats()
+        latest_value, latest_timestamp = history.latest()
 
         return {
             "device_id": device_id,
-            "total_readings": len(temperatures),
-            "avg_temperature": sum(temperatures) / len(temperatures) if temperatures else None,
-            "min_temperature": min(temperatures) if temperatures else None,
-            "max_temperature": max(temperatures) if temperatures else None,
-            "latest_temperature": temperatures[-1] if temperatures else None,
-            "latest_reading_time": readings[-1]['received_at'] if readings else None
+            "total_readings": totals["count"],
+            "avg_temperature": totals["avg"],
+            "min_temperature": totals["min"],
+            "max_temperature": totals["max"],
+            "latest_temperature": latest_value,
+            "latest_reading_time": datetime.fromtimestamp(latest_timestamp, tz=timezone.utc).isoformat(),
+            **history.window_stats(time.time())
         }
 
     def get_all_devices_temperature_stats(self) -> List[Dict]:
@@ -1,12 +1,15 @@
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, AsyncIterator
 
+from application.config import get_config
 from application.dto.input.transaction import ListTransactionsInput
 from application.dto.output.transaction import ListTransactionsOutput, TransactionListItemOutput, ProcedureOutput, \
     MaterialItemOutput
+from application.pagination import encode_cursor, decode_cursor
 from domain.context import Context
 from domain.entities.transaction import Transaction
 from domain.entities.procedure import Procedure
+from domain.entities.procedure_usage import ProcedureUsage
 from domain.entities.material import Material
 from domain.repositories.transaction import TransactionRepository
 from domain.repositories.procedure import ProcedureRepository
@@ -16,6 +19,8 @@ from domain.value_objects.enums import TransactionType, TransactionStatus
 
 logger = logging.getLogger(__name__)
 
+config = get_config()
+
 
 class ListTransactionsUseCase:
     def __init__(
@@ -30,32 +35,115 @@ class ListTransactionsUseCase:
 
     async def execute(self, context: Context, input_data: ListTransactionsInput) -> ListTransactionsOutput:
         filters = self._prepare_filters(input_data)
+        page_size = self._resolve_page_size(input_data.limit)
 
+        # Busca um registro a mais para saber se existe próxima página
         transactions = await self.transaction_repository.find_with_filters(
             laboratory_id=filters.get('laboratory_id'),
             user_id=filters.get('user_id'),
             transaction_type=filters.get('transaction_type'),
             status=filters.get('status'),
             start_date=filters.get('start_date'),
-            end_date=filters.get('end_date')
+            end_date=filters.get('end_date'),
+            cursor=filters.get('cursor'),
+            limit=page_size + 1
         )
 
         if not transactions:
             return ListTransactionsOutput(transactions=[])
 
+        next_cursor = None
+        if len(transactions) > page_size:
+            transactions = transactions[:page_size]
+            last = transactions[-1]
+            next_cursor = encode_cursor(last.created_at, last.transaction_id)
+
         procedures_map = await self._load_procedures(transactions)
+        procedure_materials_map = await self.procedure_repository.find_required_materials_for_many(
+            list(procedures_map.keys())
+        )
         materials_map = await self._load_materials(transactions)
 
-        output_items = []
-        for transaction in transactions:
-            output_item = await self._build_transaction_item(
+        output_items = [
+            self._build_transaction_item(
                 transaction,
                 procedures_map,
+                procedure_materials_map,
                 materials_map
             )
-            output_items.append(output_item)
+            for transaction in transactions
+        ]
+
+        return ListTransactionsOutput(transactions=output_items, next_cursor=next_cursor)
+
+    async def stream(
+            self,
+            context: Context,
+            input_data: ListTransactionsInput
+    ) -> AsyncIterator[List[TransactionListItemOutput]]:
+        """
+        Exporta o histórico completo em lotes, sem materializar o período inteiro.
+        Procedimentos e materiais já carregados são reaproveitados entre lotes,
+        então cada lote só consulta os ids que ainda não apareceram.
+        """
+        filters = self._prepare_filters(input_data)
+
+        procedures_map: Dict[ProcedureId, Procedure] = {}
+        procedure_materials_map: Dict[ProcedureId, List[ProcedureUsage]] = {}
+        materials_map: Dict[MaterialId, Material] = {}
+        seen_procedure_ids = set()
+        seen_material_ids = set()
+
+        batches = self.transaction_repository.stream_with_filters(
+            laboratory_id=filters.get('laboratory_id'),
+            user_id=filters.get('user_id'),
+            transaction_type=filters.get('transaction_type'),
+            status=filters.get('status'),
+            start_date=filters.get('start_date'),
+            end_date=filters.get('end_date'),
+            batch_size=config.TRANSACTIONS_EXPORT_BATCH_SIZE
+        )
+
+        async for transactions in batches:
+            new_transactions = [
+                t for t in transactions
+                if t.procedure_id is not None and t.procedure_id not in seen_procedure_ids
+            ]
+            if new_transactions:
+                new_procedures = await self._load_procedures(new_transactions)
+                seen_procedure_ids.update(t.procedure_id for t in new_transactions)
+                if new_procedures:
+                    procedures_map.update(new_procedures)
+                    procedure_materials_map.update(
+                        await self.procedure_repository.find_required_materials_for_many(
+                            list(new_procedures.keys())
+                        )
+                    )
+
+            pending_materials = [
+                t for t in transactions
+                if any(item.material_id not in seen_material_ids for item in t.items)
+            ]
+            if pending_materials:
+                materials_map.update(await self._load_materials(pending_materials))
+                for transaction in pending_materials:
+                    seen_material_ids.update(item.material_id for item in transaction.items)
+
+            yield [
+                self._build_transaction_item(
+                    transaction,
+                    procedures_map,
+                    procedure_materials_map,
+                    materials_map
+                )
+                for transaction in transactions
+            ]
 
-        return ListTransactionsOutput(transactions=output_items)
+    @staticmethod
+    def _resolve_page_size(limit: Optional[int]) -> int:
+        if not limit or limit <= 0:
+            return config.TRANSACTIONS_PAGE_SIZE
+        return min(limit, config.TRANSACTIONS_MAX_PAGE_SIZE)
 
     def _prepare_filters(self, input_data: ListTransactionsInput) -> Dict:
         filters = {}
@@ -78,6 +166,9 @@ class ListTransactionsUseCase:
         if input_data.end_date:
             filters['end_date'] = input_data.end_date
 
+        if input_data.cursor:
+            filters['cursor'] = decode_cursor(input_data.cursor)
+
         return filters
 
     async def _load_procedures(self, transactions: List[Transaction]) -> Dict[ProcedureId, Procedure]:
@@ -90,13 +181,13 @@ class ListTransactionsUseCase:
         if not procedure_ids:
             return {}
 
-        procedures = []
-        for proc_id in procedure_ids:
-            procedure = await self.procedure_repository.find_by_id(proc_id)
-            if procedure and procedure.is_active():
-                procedures.append(procedure)
+        procedures = await self.procedure_repository.find_by_ids(procedure_ids)
 
-        return {proc.procedure_id: proc for proc in procedures}
+        return {
+            proc_id: proc
+            for proc_id, proc in procedures.items()
+            if proc.is_active()
+        }
 
     async def _load_materials(self, transactions: List[Transaction]) -> Dict[MaterialId, Material]:
         material_ids = []
@@ -117,19 +208,18 @@ class ListTransactionsUseCase:
             if mat.is_active()
         }
 
-    async def _build_transaction_item(
+    def _build_transaction_item(
             self,
             transaction: Transaction,
             procedures_map: Dict[ProcedureId, Procedure],
+            procedure_materials_map: Dict[ProcedureId, List[ProcedureUsage]],
             materials_map: Dict[MaterialId, Material]
     ) -> TransactionListItemOutput:
         procedure_output = None
         if transaction.procedure_id:
             procedure = procedures_map.get(transaction.procedure_id)
             if procedure:
-                procedure_materials = await self.procedure_repository.find_required_materials(
-                    transaction.procedure_id
-                )
+                procedure_materials = procedure_materials_map.get(transaction.procedure_id, [])
 
                 material_items = self._build_material_items(
                     procedure_materials,
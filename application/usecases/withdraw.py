@@ -1,11 +1,16 @@
 import datetime
+import hashlib
 import logging
 import uuid
 from uuid import uuid4
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 
 from application.dto.input.transaction import WithdrawTransactionInput
 from application.dto.output.transaction import WithdrawTransactionOutput, TransactionItemOutput
+from application.services.device_routing_service import DeviceRoutingService
+from application.services.event_hub import EventHub, GLOBAL_CHANNEL
+from application.services.outbox_relay import OutboxRelay
+from application.services.request_coalescer import RequestCoalescer
 from application.exceptions import (
     ProcedureNotFoundError,
     ProcedureNotAvailableInLaboratoryError,
@@ -13,18 +18,27 @@ from application.exceptions import (
     InsufficientMaterialsError,
     MaterialReservationError,
     TransactionCreationError,
+    NoDeviceAvailableError,
+    IdempotencyKeyConflictError,
     MaterialStockInfo
 )
 
 from domain.context import Context
+from domain.entities.device_route import DeviceRoute
+from domain.entities.idempotency_record import IdempotencyRecord
+from domain.entities.outbox_message import OutboxMessage
 from domain.entities.procedure_usage import ProcedureUsage
 from domain.entities.transaction_item import TransactionItem
 from domain.entities.transaction import Transaction
 from domain.entities.procedure import Procedure
 from domain.entities.material_balance import MaterialBalance
+from domain.exceptions import InsufficientStockError
+from domain.repositories.idempotency import IdempotencyRepository
 from domain.repositories.material import MaterialBalanceRepository, MaterialRepository
+from domain.repositories.outbox import OutboxRepository
 from domain.repositories.procedure import ProcedureRepository
 from domain.repositories.transaction import TransactionRepository
+from domain.repositories.unit_of_work import UnitOfWork
 from domain.value_objects.enums import TransactionType, TransactionStatus
 from domain.value_objects.ids import LaboratoryId, ProcedureId, TransactionId, MaterialId, UserId
 
@@ -37,33 +51,134 @@ class WithdrawTransactionUseCase:
             transaction_repository: TransactionRepository,
             procedure_repository: ProcedureRepository,
             material_balance_repository: MaterialBalanceRepository,
-            material_repository: MaterialRepository
+            material_repository: MaterialRepository,
+            unit_of_work: UnitOfWork,
+            event_hub: EventHub,
+            device_routing_service: DeviceRoutingService,
+            idempotency_repository: IdempotencyRepository,
+            request_coalescer: RequestCoalescer,
+            idempotency_ttl: datetime.timedelta,
+            outbox_repository: OutboxRepository,
+            outbox_relay: OutboxRelay
     ):
         self.transaction_repository = transaction_repository
         self.procedure_repository = procedure_repository
         self.material_balance_repository = material_balance_repository
         self.material_repository = material_repository
+        self.unit_of_work = unit_of_work
+        self.event_hub = event_hub
+        self.device_routing_service = device_routing_service
+        self.idempotency_repository = idempotency_repository
+        self.request_coalescer = request_coalescer
+        self.idempotency_ttl = idempotency_ttl
+        self.outbox_repository = outbox_repository
+        self.outbox_relay = outbox_relay
 
     async def execute(self, context: Context, input_data: WithdrawTransactionInput) -> WithdrawTransactionOutput:
         laboratory_id = LaboratoryId.from_string(input_data.laboratory_id)
         procedure_id = ProcedureId.from_string(input_data.procedure_id)
         user_id = UserId.from_string(str(context.user_id))
 
-        await self._validate_procedure_exists(procedure_id)
+        idempotency_key = input_data.idempotency_key
+        if not idempotency_key:
+            return await self._withdraw(laboratory_id, procedure_id, user_id)
+
+        fingerprint = self._fingerprint(laboratory_id, procedure_id, user_id)
+
+        async def run_once() -> WithdrawTransactionOutput:
+            # Retry de uma retirada já concluída: devolve a resposta sem tocar em saldos nem MQTT
+            stored = await self._find_stored_output(idempotency_key, fingerprint)
+            if stored is not None:
+                return stored
+            return await self._withdraw(laboratory_id, procedure_id, user_id, idempotency_key, fingerprint)
+
+        # Duplicatas simultâneas aguardam a primeira execução em vez de rodarem em paralelo
+        return await self.request_coalescer.run(idempotency_key, fingerprint, run_once)
+
+    async def _withdraw(
+            self,
+            laboratory_id: LaboratoryId,
+            procedure_id: ProcedureId,
+            user_id: UserId,
+            idempotency_key: Optional[str] = None,
+            fingerprint: Optional[str] = None
+    ) -> WithdrawTransactionOutput:
+        procedure = await self._validate_procedure_exists(procedure_id)
         slot_id = await self._validate_procedure_available_in_laboratory(procedure_id, laboratory_id)
+        # Antes de reservar: sem dispensador disponível não há o que travar no estoque
+        route = self._resolve_device(laboratory_id, slot_id)
         procedure_materials = await self._get_required_materials(procedure_id)
-        material_balances = await self._validate_stock_availability(procedure_materials, laboratory_id)
-        await self._reserve_materials(material_balances, procedure_materials)
+        reserved_balances = await self._reserve_materials(procedure_materials, laboratory_id)
 
         transaction_items = await self._create_transaction_items(procedure_materials)
         transaction = self._create_transaction(
-            laboratory_id, procedure_id, user_id, transaction_items
+            laboratory_id, procedure_id, user_id, transaction_items, procedure_materials
         )
         await self._save_transaction(transaction)
+        await self._enqueue_dispensation_command(transaction, route)
+
+        output = self._build_output(transaction)
 
-        await self._execute_dispensation_commands(procedure_id, slot_id)
+        if idempotency_key is not None:
+            stored = await self._save_idempotency_record(idempotency_key, fingerprint, output)
+            if stored is not None:
+                return stored
 
-        return self._build_output(transaction)
+        # Único commit da retirada: reservas, transação e comando ao dispositivo ficam visíveis juntos
+        await self.unit_of_work.commit()
+
+        # O envio ao broker fica com o relay; a retirada não espera o PUBACK
+        self.outbox_relay.notify()
+
+        self._publish_events(transaction, procedure, reserved_balances, procedure_materials)
+
+        return output
+
+    @staticmethod
+    def _fingerprint(laboratory_id: LaboratoryId, procedure_id: ProcedureId, user_id: UserId) -> str:
+        raw = f"{laboratory_id.value}|{procedure_id.value}|{user_id.value}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _find_stored_output(self, idempotency_key: str, fingerprint: str) -> Optional[WithdrawTransactionOutput]:
+        record = await self.idempotency_repository.find_by_key(idempotency_key)
+        if record is None:
+            return None
+        if record.fingerprint != fingerprint:
+            raise IdempotencyKeyConflictError(idempotency_key)
+        return _output_from_dict(record.response)
+
+    async def _save_idempotency_record(
+            self,
+            idempotency_key: str,
+            fingerprint: str,
+            output: WithdrawTransactionOutput
+    ) -> Optional[WithdrawTransactionOutput]:
+        """
+        Grava a chave na mesma transação das reservas. Se outra instância gravou a
+        mesma chave antes, desfaz esta retirada e devolve a resposta já registrada.
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        record = IdempotencyRecord(
+            key=idempotency_key,
+            fingerprint=fingerprint,
+            response=_output_to_dict(output),
+            created_at=now,
+            expires_at=now + self.idempotency_ttl
+        )
+
+        if await self.idempotency_repository.save(record):
+            return None
+
+        await self.unit_of_work.rollback()
+        logger.info(f"Chave de idempotência {idempotency_key} já registrada por outra requisição, retirada desfeita")
+
+        stored = await self._find_stored_output(idempotency_key, fingerprint)
+        if stored is None:
+            raise TransactionCreationError(
+                "idempotency key was released while saving",
+                {"idempotency_key": idempotency_key}
+            )
+        return stored
 
     async def _validate_procedure_exists(self, procedure_id: ProcedureId) -> Procedure:
         procedure = await self.procedure_repository.find_by_id(procedure_id)
@@ -87,64 +202,41 @@ class WithdrawTransactionUseCase:
             str(laboratory_id.value)
         )
 
+    def _resolve_device(self, laboratory_id: LaboratoryId, slot_id: int) -> DeviceRoute:
+        route = self.device_routing_service.resolve(laboratory_id, slot_id)
+        if route is None:
+            raise NoDeviceAvailableError(str(laboratory_id.value), slot_id)
+        return route
+
     async def _get_required_materials(self, procedure_id: ProcedureId) -> List[ProcedureUsage]:
         procedure_materials = await self.procedure_repository.find_required_materials(procedure_id)
         if not procedure_materials:
             raise NoMaterialsDefinedError(str(procedure_id.value))
         return procedure_materials
 
-    async def _validate_stock_availability(
+    async def _reserve_materials(
             self,
             procedure_materials: List[ProcedureUsage],
             laboratory_id: LaboratoryId
-    ) -> Dict[MaterialId, MaterialBalance]:
-        material_ids = [pm.material_id for pm in procedure_materials]
-        material_balances = await self.material_balance_repository.find_multiple_by_laboratory(
-            material_ids, laboratory_id
-        )
-
-        balances_map = {balance.material_id: balance for balance in material_balances}
+    ) -> List[MaterialBalance]:
         required_amounts_map = {pm.material_id: pm.required_amount for pm in procedure_materials}
 
-        insufficient_materials = []
-        for material_id, required_amount in required_amounts_map.items():
-            balance = balances_map.get(material_id)
-            if not balance:
-                insufficient_materials.append(MaterialStockInfo(
-                    material_id=str(material_id.value),
-                    required=required_amount,
-                    available=0
-                ))
-            elif not balance.has_sufficient_stock(required_amount):
-                available = balance.available_stock()
-                insufficient_materials.append(MaterialStockInfo(
+        try:
+            return await self.material_balance_repository.reserve_multiple(required_amounts_map, laboratory_id)
+        except InsufficientStockError as e:
+            raise InsufficientMaterialsError([
+                MaterialStockInfo(
                     material_id=str(material_id.value),
-                    required=required_amount,
+                    required=required,
                     available=available
-                ))
-
-        if insufficient_materials:
-            raise InsufficientMaterialsError(insufficient_materials)
-
-        return balances_map
-
-    async def _reserve_materials(
-            self,
-            balances_map: Dict[MaterialId, MaterialBalance],
-            procedure_materials: List[ProcedureUsage]
-    ) -> None:
-        required_amounts_map = {pm.material_id: pm.required_amount for pm in procedure_materials}
-        materials_attempted = []
-
-        try:
-            for material_id, required_amount in required_amounts_map.items():
-                materials_attempted.append(str(material_id.value))
-                balance = balances_map[material_id]
-                balance.reserve(required_amount)
-                await self.material_balance_repository.save(balance)
+                )
+                for material_id, required, available in e.shortages
+            ])
         except Exception as e:
-            # TODO: Implementar rollback das reservas já feitas
-            raise MaterialReservationError(str(e), materials_attempted)
+            raise MaterialReservationError(
+                str(e),
+                [str(material_id.value) for material_id in required_amounts_map]
+            )
 
     async def _create_transaction_items(self, procedure_materials: List[ProcedureUsage]) -> List[TransactionItem]:
         material_ids = [pm.material_id for pm in procedure_materials]
@@ -170,7 +262,8 @@ class WithdrawTransactionUseCase:
             laboratory_id: LaboratoryId,
             procedure_id: ProcedureId,
             user_id,
-            transaction_items: List[TransactionItem]
+            transaction_items: List[TransactionItem],
+            procedure_materials: List[ProcedureUsage]
     ) -> Transaction:
         now = datetime.datetime.now(datetime.UTC)
 
@@ -184,12 +277,17 @@ class WithdrawTransactionUseCase:
             created_at=now,
             authorized_at=now,
             completed_at=None,
-            items=transaction_items
+            items=transaction_items,
+            # Exatamente o que _reserve_materials reservou, para a baixa/liberação bater com a reserva
+            reservations=[
+                TransactionItem(material_id=pm.material_id, quantity=pm.required_amount)
+                for pm in procedure_materials
+            ]
         )
 
     async def _save_transaction(self, transaction: Transaction) -> None:
         try:
-            await self.transaction_repository.save(transaction)
+            await self.transaction_repository.insert_new(transaction)
         except Exception as e:
             raise TransactionCreationError(
                 str(e),
@@ -200,20 +298,63 @@ class WithdrawTransactionUseCase:
                 }
             )
 
-    async def _execute_dispensation_commands(self, procedure_id: ProcedureId, procedure_slot: int) -> None:
-        from infrastructure.mqtt.integration import send_device_command
-
-        device_id = "smartlab_001"
+    def _publish_events(
+            self,
+            transaction: Transaction,
+            procedure: Procedure,
+            reserved_balances: List[MaterialBalance],
+            procedure_materials: List[ProcedureUsage]
+    ) -> None:
+        # Só depois do commit: quem recebe o evento pode consultar o banco e ver o mesmo estado
+        laboratory_channel = str(transaction.laboratory_id.value)
+        reserved_amounts = {pm.material_id: pm.required_amount for pm in procedure_materials}
 
-        success = send_device_command(device_id, "withdraw", slot=procedure_slot)
+        self.event_hub.publish(laboratory_channel, "balance", {
+            "laboratoryId": laboratory_channel,
+            "materials": [
+                {
+                    "materialId": str(balance.material_id.value),
+                    "currentStock": balance.current_stock,
+                    "reservedStock": balance.reserved_stock,
+                    "availableStock": balance.available_stock(),
+                    "reservedDelta": reserved_amounts.get(balance.material_id, 0),
+                    "lastUpdated": balance.last_updated.isoformat() if balance.last_updated else None
+                }
+                for balance in reserved_balances
+            ]
+        })
+
+        transaction_summary = {
+            "transactionId": str(transaction.transaction_id.value),
+            "laboratoryId": laboratory_channel,
+            "employeeId": str(transaction.user_id.value),
+            "status": transaction.status.value,
+            "procedure": {
+                "id": str(procedure.procedure_id.value),
+                "name": procedure.name
+            },
+            "items": [
+                {"id": str(item.material_id.value), "quantity": item.quantity}
+                for item in transaction.items
+            ],
+            "timestamp": transaction.created_at.isoformat()
+        }
+        self.event_hub.publish(laboratory_channel, "transaction", transaction_summary)
+        self.event_hub.publish(GLOBAL_CHANNEL, "transaction", transaction_summary)
 
-        if success:
-            logger.info(f"Comando de dispensação enviado para procedimento {procedure_id.value}, slot {procedure_slot}")
-        else:
-            logger.error(f"Falha ao enviar comando para procedimento {procedure_id.value}, slot {procedure_slot}")
+    async def _enqueue_dispensation_command(self, transaction: Transaction, route: DeviceRoute) -> None:
+        now = datetime.datetime.now(datetime.UTC)
 
-    def _get_procedure_slot(self, procedure_id: ProcedureId) -> int:
-        return int(str(procedure_id.value)[-1]) + 1
+        await self.outbox_repository.add(OutboxMessage(
+            transaction_id=transaction.transaction_id.value,
+            device_id=route.device_id,
+            command_type="withdraw",
+            # O transaction_id vai ao dispositivo: a entrega é pelo menos uma vez e ele descarta repetidos
+            payload={"slot": route.device_slot, "transaction_id": str(transaction.transaction_id.value)},
+            created_at=now,
+            available_at=now
+        ))
+        logger.info(f"Comando de dispensação enfileirado para {route.device_id}, slot {route.device_slot} (transação {transaction.transaction_id.value})")
 
     @staticmethod
     def _build_output(transaction: Transaction) -> WithdrawTransactionOutput:
@@ -232,4 +373,36 @@ class WithdrawTransactionUseCase:
                 )
                 for item in transaction.items
             ],
-        )
\ No newline at end of file
+        )
+
+
+def _output_to_dict(output: WithdrawTransactionOutput) -> Dict[str, Any]:
+    return {
+        "transaction_id": output.transaction_id,
+        "transaction_type": output.transaction_type,
+        "status": output.status,
+        "laboratory_id": output.laboratory_id,
+        "procedure_id": output.procedure_id,
+        "created_at": output.created_at.isoformat(),
+        "authorized_at": output.authorized_at.isoformat(),
+        "items": [
+            {"material_id": item.material_id, "quantity": item.quantity}
+            for item in output.items
+        ]
+    }
+
+
+def _output_from_dict(data: Dict[str, Any]) -> WithdrawTransactionOutput:
+    return WithdrawTransactionOutput(
+        transaction_id=data["transaction_id"],
+        transaction_type=data["transaction_type"],
+        status=data["status"],
+        laboratory_id=data["laboratory_id"],
+        procedure_id=data["procedure_id"],
+        created_at=datetime.datetime.fromisoformat(data["created_at"]),
+        authorized_at=datetime.datetime.fromisoformat(data["authorized_at"]),
+        items=[
+            TransactionItemOutput(material_id=item["material_id"], quantity=item["quantity"])
+            for item in data["items"]
+        ]
+    )
\ No newline at end of file
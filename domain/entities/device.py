@@ -0,0 +1,10 @@
+import datetime
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class Device:
+    device_id: str
+    is_whitelisted: bool = False
+    last_seen_at: Optional[datetime.datetime] = None
\ No newline at end of file
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+from domain.value_objects.ids import LaboratoryId
+
+
+@dataclass(frozen=True)
+class DeviceRoute:
+    laboratory_id: LaboratoryId
+    slot_id: int
+    device_id: str
+    device_slot: int
+    is_stocked: bool = True
\ No newline at end of file
@@ -0,0 +1,15 @@
+import datetime
+from dataclasses import dataclass
+from typing import Any, Dict
+
+
+@dataclass(frozen=True)
+class IdempotencyRecord:
+    key: str
+    fingerprint: str
+    response: Dict[str, Any]
+    created_at: datetime.datetime
+    expires_at: datetime.datetime
+
+    def is_expired(self, now: datetime.datetime) -> bool:
+        return self.expires_at <= now
\ No newline at end of file
@@ -0,0 +1,21 @@
+import datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+
+@dataclass
+class OutboxMessage:
+    device_id: str
+    command_type: str
+    payload: Dict[str, Any]
+    created_at: datetime.datetime
+    available_at: datetime.datetime
+    transaction_id: Optional[UUID] = None
+    message_id: Optional[int] = None
+    attempts: int = 0
+    delivered_at: Optional[datetime.datetime] = None
+    failed_at: Optional[datetime.datetime] = None
+    # Enquanto no futuro, a mensagem está sendo publicada por um relay
+    claimed_until: Optional[datetime.datetime] = None
+    last_error: Optional[str] = field(default=None)
\ No newline at end of file
@@ -0,0 +1,12 @@
+import datetime
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class TemperatureReading:
+    device_id: str
+    temperature: float
+    received_at: datetime.datetime
+    reading_timestamp: Optional[datetime.datetime] = None
+    device_batch_timestamp: Optional[datetime.datetime] = None
\ No newline at end of file
@@ -1,5 +1,5 @@
 import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from typing import Optional, List
 
@@ -22,6 +22,8 @@ class Transaction:
     authorized_at: Optional[datetime.datetime]
     completed_at: Optional[datetime.datetime]
     items: List[TransactionItem]
+    # Quantidades reservadas no saldo; incluem materiais inativos, que não viram item
+    reservations: List[TransactionItem] = field(default_factory=list)
 
     def start_processing(self) -> None:
         if self.status != TransactionStatus.AUTHORIZED:
@@ -46,4 +48,10 @@ class Transaction:
         return self.status == TransactionStatus.COMPLETED
 
     def get_material_quantities(self) -> List[tuple[MaterialId, int]]:
-        return [(item.material_id, item.quantity) for item in self.items]
\ No newline at end of file
+        return [(item.material_id, item.quantity) for item in self.items]
+
+    def get_reserved_quantities(self) -> List[tuple[MaterialId, int]]:
+        # Transações gravadas antes de reservations existir reservaram só os itens
+        if not self.reservations:
+            return self.get_material_quantities()
+        return [(reservation.material_id, reservation.quantity) for reservation in self.reservations]
\ No newline at end of file
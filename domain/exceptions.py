@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 
 
 class DomainError(Exception):
@@ -14,7 +14,10 @@ class InvalidTransactionStateError(DomainError):
     pass
 
 class InsufficientStockError(DomainError):
-    pass
+    def __init__(self, message: str = "", shortages: Optional[List[tuple]] = None):
+        super().__init__(message)
+        # (material_id, required, available) de cada material sem saldo
+        self.shortages = shortages or []
 
 class InvalidReservationError(DomainError):
     pass
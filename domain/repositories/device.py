@@ -0,0 +1,20 @@
+import datetime
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from domain.entities.device import Device
+
+
+class DeviceRepository(ABC):
+
+    @abstractmethod
+    async def find_all(self) -> List[Device]:
+        pass
+
+    @abstractmethod
+    async def save_heartbeats(self, last_seen: Dict[str, datetime.datetime]) -> int:
+        pass
+
+    @abstractmethod
+    async def save_whitelist(self, device_ids: List[str]) -> None:
+        pass
\ No newline at end of file
@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from domain.entities.device_route import DeviceRoute
+
+
+class DeviceRouteRepository(ABC):
+
+    @abstractmethod
+    async def find_all(self) -> List[DeviceRoute]:
+        pass
\ No newline at end of file
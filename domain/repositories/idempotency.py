@@ -0,0 +1,21 @@
+import datetime
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from domain.entities.idempotency_record import IdempotencyRecord
+
+
+class IdempotencyRepository(ABC):
+
+    @abstractmethod
+    async def find_by_key(self, key: str) -> Optional[IdempotencyRecord]:
+        pass
+
+    @abstractmethod
+    async def save(self, record: IdempotencyRecord) -> bool:
+        """Grava na transação corrente; False se a chave já existe e ainda não expirou."""
+        pass
+
+    @abstractmethod
+    async def delete_expired(self, now: datetime.datetime, limit: int) -> int:
+        pass
\ No newline at end of file
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
 from domain.entities.material import Material
 from domain.entities.material_balance import MaterialBalance
@@ -18,6 +18,10 @@ class MaterialRepository(ABC):
     async def exists(self, material_id: MaterialId) -> bool:
         pass
 
+    @abstractmethod
+    async def save(self, material: Material) -> None:
+        pass
+
 
 class MaterialBalanceRepository(ABC):
     @abstractmethod
@@ -41,5 +45,24 @@ class MaterialBalanceRepository(ABC):
             self,
             material_ids: List[MaterialId],
             laboratory_id: LaboratoryId
+    ) -> List[MaterialBalance]:
+        pass
+
+    @abstractmethod
+    async def apply_reservation_changes(
+            self,
+            changes: Dict[Tuple[LaboratoryId, MaterialId], Tuple[int, int]]
+    ) -> int:
+        """
+        Aplica (consumido, liberado) por material/laboratório: o consumido sai da reserva
+        e do estoque, o liberado só da reserva. Retorna quantos saldos foram atualizados.
+        """
+        pass
+
+    @abstractmethod
+    async def reserve_multiple(
+            self,
+            quantities: Dict[MaterialId, int],
+            laboratory_id: LaboratoryId
     ) -> List[MaterialBalance]:
         pass
\ No newline at end of file
@@ -0,0 +1,59 @@
+import datetime
+from abc import ABC, abstractmethod
+from typing import List, Set, Tuple
+from uuid import UUID
+
+from domain.entities.outbox_message import OutboxMessage
+
+
+class OutboxRepository(ABC):
+
+    @abstractmethod
+    async def add(self, message: OutboxMessage) -> None:
+        """Grava na transação corrente, junto com a alteração que originou o comando."""
+        pass
+
+    @abstractmethod
+    async def claim_pending(
+            self,
+            now: datetime.datetime,
+            claimed_until: datetime.datetime,
+            limit: int
+    ) -> List[OutboxMessage]:
+        """
+        Reivindica as mensagens prontas até claimed_until e conta a tentativa. Depois
+        do commit outros relays não as pegam, sem que nenhuma linha fique travada
+        durante a publicação; se o relay morrer, elas voltam à fila no fim do prazo.
+        """
+        pass
+
+    @abstractmethod
+    async def mark_delivered(self, message_ids: List[int], delivered_at: datetime.datetime) -> None:
+        pass
+
+    @abstractmethod
+    async def save_attempts(self, messages: List[OutboxMessage]) -> None:
+        """Grava available_at, failed_at e last_error das mensagens que falharam e libera a reivindicação."""
+        pass
+
+    @abstractmethod
+    async def cancel_pending(self, transaction_ids: List[UUID], reason: str, cancelled_at: datetime.datetime) -> Set[UUID]:
+        """
+        Tira da fila os comandos ainda não entregues dessas transações, pulando (sem
+        esperar) os que o relay tem travados ou está publicando. Devolve as transações
+        com comando pendente que ficou de fora.
+        """
+        pass
+
+    @abstractmethod
+    async def find_open_dispatches(self, device_ids: List[str]) -> List[Tuple[str, int, UUID]]:
+        """
+        (device_id, slot, transaction_id) dos comandos de retirada já publicados ao menos
+        uma vez, entregues ou não, cujas transações seguem abertas, na ordem de enfileiramento.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_delivered_before(self, cutoff: datetime.datetime, limit: int) -> int:
+        """Remove as entregues antes de cutoff, exceto as de transações ainda abertas."""
+        pass
\ No newline at end of file
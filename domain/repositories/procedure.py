@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Dict
 
 from domain.entities.procedure import Procedure, LaboratoryProcedure
 from domain.entities.procedure_usage import ProcedureUsage
@@ -19,6 +19,17 @@ class ProcedureRepository(ABC):
     ) -> List[ProcedureUsage]:
         pass
 
+    @abstractmethod
+    async def find_by_ids(self, procedure_ids: List[ProcedureId]) -> Dict[ProcedureId, Procedure]:
+        pass
+
+    @abstractmethod
+    async def find_required_materials_for_many(
+            self,
+            procedure_ids: List[ProcedureId]
+    ) -> Dict[ProcedureId, List[ProcedureUsage]]:
+        pass
+
     @abstractmethod
     async def exists(self, procedure_id: ProcedureId) -> bool:
         pass
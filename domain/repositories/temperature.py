@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from domain.entities.temperature_reading import TemperatureReading
+
+
+class TemperatureRepository(ABC):
+
+    @abstractmethod
+    async def save_batch(self, readings: List[TemperatureReading]) -> int:
+        pass
\ No newline at end of file
@@ -1,6 +1,6 @@
 import datetime
 from abc import abstractmethod, ABC
-from typing import Optional, List
+from typing import Optional, List, Tuple, AsyncIterator
 
 from domain.entities.transaction import Transaction
 from domain.value_objects.enums import TransactionStatus, TransactionType
@@ -13,10 +13,42 @@ class TransactionRepository(ABC):
     async def save(self, transaction: Transaction) -> None:
         pass
 
+    @abstractmethod
+    async def insert_new(self, transaction: Transaction) -> None:
+        """Insere uma transação recém-criada com seus itens; o id não pode existir."""
+        pass
+
+    @abstractmethod
+    async def update_status(self, transaction: Transaction) -> None:
+        pass
+
     @abstractmethod
     async def find_by_id(self, transaction_id: TransactionId) -> Optional[Transaction]:
         pass
 
+    @abstractmethod
+    async def find_by_ids(self, transaction_ids: List[TransactionId], for_update: bool = False) -> List[Transaction]:
+        pass
+
+    @abstractmethod
+    async def find_stale_open(
+            self,
+            authorized_before: datetime.datetime,
+            in_progress_before: datetime.datetime,
+            limit: int
+    ) -> List[Transaction]:
+        """
+        Transações AUTHORIZED criadas antes de authorized_before e IN_PROGRESS criadas
+        antes de in_progress_before, travadas; as que já estão travadas por outra
+        transação são puladas.
+        """
+        pass
+
+    @abstractmethod
+    async def update_statuses(self, transactions: List[Transaction]) -> None:
+        """Grava status, authorized_at e completed_at de várias transações em um único statement."""
+        pass
+
     @abstractmethod
     async def find_with_filters(
             self,
@@ -25,6 +57,21 @@ class TransactionRepository(ABC):
             transaction_type: Optional[TransactionType] = None,
             status: Optional[TransactionStatus] = None,
             start_date: Optional[datetime.datetime] = None,
-            end_date: Optional[datetime.datetime] = None
+            end_date: Optional[datetime.datetime] = None,
+            cursor: Optional[Tuple[datetime.datetime, TransactionId]] = None,
+            limit: Optional[int] = None
     ) -> List[Transaction]:
+        pass
+
+    @abstractmethod
+    def stream_with_filters(
+            self,
+            laboratory_id: Optional[LaboratoryId] = None,
+            user_id: Optional[UserId] = None,
+            transaction_type: Optional[TransactionType] = None,
+            status: Optional[TransactionStatus] = None,
+            start_date: Optional[datetime.datetime] = None,
+            end_date: Optional[datetime.datetime] = None,
+            batch_size: int = 500
+    ) -> AsyncIterator[List[Transaction]]:
         pass
\ No newline at end of file
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+
+class UnitOfWork(ABC):
+
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
+
+    @abstractmethod
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """Agenda callback para depois do próximo commit; descartado em rollback."""
+        pass
\ No newline at end of file
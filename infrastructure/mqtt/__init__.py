@@ -1,11 +1,14 @@
 from .client import mqtt_client, MQTTConnectionStatus
+from .dispatcher import mqtt_dispatcher, TopicFamily
 from .topics import mqtt_topics, TopicDefinition
 
 __all__ = [
     'mqtt_client',
     'mqtt_topics',
+    'mqtt_dispatcher',
     'MQTTConnectionStatus',
-    'TopicDefinition'
+    'TopicDefinition',
+    'TopicFamily'
 ]
 
 
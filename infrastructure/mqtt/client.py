@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import threading
 import time
@@ -7,6 +8,8 @@ from enum import Enum
 import paho.mqtt.client as mqtt
 
 from application.config import get_config
+from .dispatcher import mqtt_dispatcher, TopicFamily
+from .router import TopicRouter
 
 logger = logging.getLogger(__name__)
 
@@ -37,10 +40,14 @@ class MQTTClient:
         self._client: Optional[mqtt.Client] = None
         self._status = MQTTConnectionStatus.DISCONNECTED
         self._subscriptions: Dict[str, int] = {}
-        self._message_handlers: Dict[str, Callable] = {}
+        # filtro -> (handler, família de despacho), resolvido pela trie a cada mensagem
+        self._message_handlers = TopicRouter()
         self._connection_callbacks: list = []
         self._is_running = False
         self._reconnect_thread: Optional[threading.Thread] = None
+        # Publicações aguardando PUBACK, por message id. Só são tocadas no thread do event loop
+        self._pending_publishes: Dict[int, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._initialized = True
 
     def initialize(self) -> bool:
@@ -54,10 +61,13 @@ class MQTTClient:
             self._client.on_connect = self._on_connect
             self._client.on_disconnect = self._on_disconnect
             self._client.on_message = self._on_message
+            self._client.on_publish = self._on_publish
             self._client.on_subscribe = self._on_subscribe
             self._client.on_unsubscribe = self._on_unsubscribe
             self._client.on_log = self._on_log
 
+            self._client.max_inflight_messages_set(self.config.MQTT_MAX_INFLIGHT)
+
             if self.config.MQTT_USERNAME and self.config.MQTT_PASSWORD:
                 self._client.username_pw_set(
                     self.config.MQTT_USERNAME,
@@ -72,6 +82,10 @@ class MQTTClient:
             return False
 
     def connect(self) -> bool:
+        """
+        Não bloqueia: a conexão é feita pelo thread da paho, que segue tentando
+        enquanto o broker estiver fora. O estado real chega via _on_connect.
+        """
         if not self._client:
             if not self.initialize():
                 return False
@@ -80,7 +94,8 @@ class MQTTClient:
             self._status = MQTTConnectionStatus.CONNECTING
             logger.info(f"Conectando ao broker MQTT {self.config.MQTT_BROKER_HOST}:{self.config.MQTT_BROKER_PORT}")
 
-            self._client.connect(
+            self._client.reconnect_delay_set(min_delay=1, max_delay=60)
+            self._client.connect_async(
                 self.config.MQTT_BROKER_HOST,
                 self.config.MQTT_BROKER_PORT,
                 self.config.MQTT_KEEPALIVE
@@ -104,12 +119,18 @@ class MQTTClient:
             self._client.disconnect()
             self._status = MQTTConnectionStatus.DISCONNECTED
 
-    def subscribe(self, topic: str, qos: int = None, handler: Callable = None) -> bool:
+    def subscribe(
+            self,
+            topic: str,
+            qos: int = None,
+            handler: Callable = None,
+            family: str = TopicFamily.CONTROL
+    ) -> bool:
         if not self._client or self._status != MQTTConnectionStatus.CONNECTED:
             logger.warning(f"Cliente não conectado. Adicionando {topic} à lista de subscrições pendentes")
             self._subscriptions[topic] = qos or self.config.MQTT_QOS
             if handler:
-                self._message_handlers[topic] = handler
+                self._message_handlers.add(topic, (handler, family))
             return False
 
         try:
@@ -119,7 +140,7 @@ class MQTTClient:
             if result[0] == mqtt.MQTT_ERR_SUCCESS:
                 self._subscriptions[topic] = qos
                 if handler:
-                    self._message_handlers[topic] = handler
+                    self._message_handlers.add(topic, (handler, family))
                 logger.info(f"Subscrito no tópico: {topic} (QoS: {qos})")
                 return True
             else:
@@ -139,7 +160,7 @@ class MQTTClient:
             result = self._client.unsubscribe(topic)
             if result[0] == mqtt.MQTT_ERR_SUCCESS:
                 self._subscriptions.pop(topic, None)
-                self._message_handlers.pop(topic, None)
+                self._message_handlers.remove(topic)
                 logger.info(f"Dessubscrito do tópico: {topic}")
                 return True
             else:
@@ -170,6 +191,53 @@ class MQTTClient:
             logger.error(f"Erro ao publicar em {topic}: {e}")
             return False
 
+    async def publish_async(
+            self,
+            topic: str,
+            payload: str,
+            qos: int = None,
+            retain: bool = False,
+            timeout: float = None
+    ) -> bool:
+        """
+        Publica sem bloquear o event loop e aguarda a confirmação do broker
+        (PUBACK no QoS 1, PUBCOMP no QoS 2; no QoS 0 basta a escrita no socket).
+        Retorna False se o cliente estiver desconectado, o envio falhar ou o timeout expirar.
+        """
+        if not self._client or self._status != MQTTConnectionStatus.CONNECTED:
+            logger.warning(f"Cliente não conectado. Não foi possível publicar em {topic}")
+            return False
+
+        qos = self.config.MQTT_QOS if qos is None else qos
+        timeout = self.config.MQTT_PUBLISH_TIMEOUT_SECONDS if timeout is None else timeout
+
+        self._loop = asyncio.get_running_loop()
+        future = self._loop.create_future()
+
+        try:
+            result = self._client.publish(topic, payload, qos, retain)
+        except Exception as e:
+            logger.error(f"Erro ao publicar em {topic}: {e}")
+            return False
+
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.error(f"Erro ao publicar em {topic}: {result}")
+            return False
+
+        # O registro acontece antes de qualquer await: a confirmação, mesmo que já tenha
+        # chegado no thread da paho, só é processada no loop depois deste ponto
+        self._pending_publishes[result.mid] = future
+
+        try:
+            await asyncio.wait_for(future, timeout)
+            logger.debug(f"Mensagem confirmada em {topic}: {payload[:100]}...")
+            return True
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout aguardando confirmação do broker para {topic} (mid {result.mid})")
+            return False
+        finally:
+            self._pending_publishes.pop(result.mid, None)
+
     def get_status(self) -> MQTTConnectionStatus:
         return self._status
 
@@ -216,37 +284,32 @@ class MQTTClient:
 
             logger.debug(f"Mensagem recebida em {topic}: {payload[:100]}...")
 
-            handler_found = False
+            route = self._message_handlers.match(topic)
 
-            for handler_topic, handler in self._message_handlers.items():
-                if self._topic_matches(handler_topic, topic):
-                    handler(topic, payload, message.qos, message.retain)
-                    handler_found = True
-                    break
-
-            if not handler_found:
+            if route is None:
                 self._default_message_handler(topic, payload, message.qos, message.retain)
+                return
+
+            handler, family = route
+            if mqtt_dispatcher.is_running():
+                # Handlers rodam no event loop; este thread só cuida da rede
+                mqtt_dispatcher.submit(family, handler, topic, payload, message.qos, message.retain)
+            else:
+                handler(topic, payload, message.qos, message.retain)
 
         except Exception as e:
             logger.error(f"Erro ao processar mensagem: {e}")
 
-    def _topic_matches(self, pattern: str, topic: str) -> bool:
-        if pattern == topic:
-            return True
-
-        pattern_parts = pattern.split('/')
-        topic_parts = topic.split('/')
-
-        if len(pattern_parts) != len(topic_parts):
-            return False
-
-        for p, t in zip(pattern_parts, topic_parts):
-            if p != '+' and p != '#' and p != t:
-                return False
-            if p == '#':
-                return True
+    def _on_publish(self, client, userdata, mid):
+        # Chamado no thread de rede da paho (ou dentro de publish() no QoS 0)
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._resolve_publish, mid)
 
-        return True
+    def _resolve_publish(self, mid: int):
+        future = self._pending_publishes.get(mid)
+        if future is not None and not future.done():
+            future.set_result(True)
 
     def _on_subscribe(self, client, userdata, mid, granted_qos):
         logger.debug(f"Subscrição confirmada. QoS concedido: {granted_qos}")
@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any
+
+from application.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+class TopicFamily:
+    CONTROL = "control"
+    HEARTBEAT = "heartbeat"
+    TELEMETRY = "telemetry"
+
+
+@dataclass
+class FamilySettings:
+    concurrency: int
+    queue_size: int
+
+
+@dataclass
+class _InboundMessage:
+    handler: Callable
+    topic: str
+    payload: str
+    qos: int
+    retain: bool
+    received_at: float
+
+
+class _FamilyQueue:
+    def __init__(self, name: str, settings: FamilySettings):
+        self.name = name
+        self.settings = settings
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.queue_size)
+        self.workers: List[asyncio.Task] = []
+
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_wait_ms = 0.0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.settings.concurrency,
+            "queue_size": self.queue.qsize(),
+            "queue_capacity": self.settings.queue_size,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "max_wait_ms": round(self.max_wait_ms, 2)
+        }
+
+
+class MQTTDispatcher:
+    """
+    Ponte entre o thread de rede da paho e o event loop da aplicação.
+
+    O callback da paho só decodifica o payload e agenda a mensagem (call_soon_threadsafe)
+    na fila da família do tópico; workers no event loop executam os handlers. Cada família
+    tem fila limitada e concorrência própria, então uma rajada de telemetria enche apenas
+    a própria fila e não atrasa mensagens de controle. Com a fila cheia a mensagem é
+    descartada e contabilizada.
+    """
+
+    def __init__(self):
+        self.config = get_config()
+        self._settings: Dict[str, FamilySettings] = {
+            TopicFamily.CONTROL: FamilySettings(
+                self.config.MQTT_CONTROL_CONCURRENCY, self.config.MQTT_CONTROL_QUEUE_SIZE
+            ),
+            TopicFamily.HEARTBEAT: FamilySettings(
+                self.config.MQTT_HEARTBEAT_CONCURRENCY, self.config.MQTT_HEARTBEAT_QUEUE_SIZE
+            ),
+            TopicFamily.TELEMETRY: FamilySettings(
+                self.config.MQTT_TELEMETRY_CONCURRENCY, self.config.MQTT_TELEMETRY_QUEUE_SIZE
+            ),
+        }
+        self._families: Dict[str, _FamilyQueue] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def is_running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self) -> None:
+        if self._loop is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+
+        for name, settings in self._settings.items():
+            family = _FamilyQueue(name, settings)
+            family.workers = [
+                asyncio.create_task(self._worker(family), name=f"mqtt-{name}-{i}")
+                for i in range(settings.concurrency)
+            ]
+            self._families[name] = family
+
+        logger.info(f"Dispatcher MQTT iniciado: {', '.join(f'{n}={s.concurrency}' for n, s in self._settings.items())}")
+
+    async def stop(self) -> None:
+        if self._loop is None:
+            return
+
+        workers = [task for family in self._families.values() for task in family.workers]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        self._families.clear()
+        self._loop = None
+        logger.info("Dispatcher MQTT finalizado")
+
+    def submit(self, family: str, handler: Callable, topic: str, payload: str, qos: int, retain: bool) -> None:
+        """Chamado no thread da paho; nunca bloqueia."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        message = _InboundMessage(handler, topic, payload, qos, retain, time.monotonic())
+        loop.call_soon_threadsafe(self._enqueue, family, message)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: family.metrics() for name, family in self._families.items()}
+
+    def _enqueue(self, family_name: str, message: _InboundMessage) -> None:
+        family = self._families.get(family_name) or self._families[TopicFamily.CONTROL]
+
+        try:
+            family.queue.put_nowait(message)
+            family.enqueued += 1
+        except asyncio.QueueFull:
+            family.dropped += 1
+            # Loga a primeira e depois a cada 100 para não inundar o log durante a rajada
+            if family.dropped == 1 or family.dropped % 100 == 0:
+                logger.warning(
+                    f"Fila MQTT '{family.name}' cheia ({family.settings.queue_size}); "
+                    f"{family.dropped} mensagens descartadas até agora"
+                )
+
+    async def _worker(self, family: _FamilyQueue) -> None:
+        while True:
+            message = await family.queue.get()
+            try:
+                wait_ms = (time.monotonic() - message.received_at) * 1000
+                family.max_wait_ms = max(family.max_wait_ms, wait_ms)
+
+                result = message.handler(message.topic, message.payload, message.qos, message.retain)
+                if inspect.isawaitable(result):
+                    await result
+
+                family.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                family.failed += 1
+                logger.error(f"Erro ao processar mensagem de {message.topic}: {e}")
+            finally:
+                family.queue.task_done()
+
+            # get() não cede o loop quando a fila tem itens; cede aqui para as outras famílias
+            await asyncio.sleep(0)
+
+
+mqtt_dispatcher = MQTTDispatcher()
\ No newline at end of file
@@ -1,37 +1,70 @@
+import datetime
 import json
 import logging
+import uuid
 from typing import Dict, Any
 
 from .client import mqtt_client
+from .dispatcher import TopicFamily
 from .topics import mqtt_topics
+from application.config import get_config
+from application.services.dispense_ack_processor import DispenseAck
+from domain.value_objects.enums import TransactionStatus
 
 logger = logging.getLogger(__name__)
 
+# Vocabulário aceito no payload dos acks de dispensação
+ACK_STATUSES = {
+    "started": TransactionStatus.IN_PROGRESS,
+    "in_progress": TransactionStatus.IN_PROGRESS,
+    "completed": TransactionStatus.COMPLETED,
+    "done": TransactionStatus.COMPLETED,
+    "ok": TransactionStatus.COMPLETED,
+    "failed": TransactionStatus.FAILED,
+    "error": TransactionStatus.FAILED
+}
+
 
 class MQTTHandlers:
 
     def __init__(self):
         self.device_service = None
         self.temperature_service = None
-
-    def register_services(self, device_service, temperature_service):
+        self.dispense_ack_processor = None
+        self._json_withdraw_devices = {
+            device_id.strip()
+            for device_id in get_config().WITHDRAW_JSON_PAYLOAD_DEVICES.split(',')
+            if device_id.strip()
+        }
+
+    def register_services(self, device_service, temperature_service, dispense_ack_processor=None):
         self.device_service = device_service
         self.temperature_service = temperature_service
+        self.dispense_ack_processor = dispense_ack_processor
 
     def setup_subscriptions(self):
         mqtt_client.subscribe(
             mqtt_topics.device_connection_request.topic,
-            handler=self.handle_connection_request
+            handler=self.handle_connection_request,
+            family=TopicFamily.CONTROL
         )
 
         mqtt_client.subscribe(
             "devices/ping/+",
-            handler=self.handle_device_ping
+            handler=self.handle_device_ping,
+            family=TopicFamily.HEARTBEAT
         )
 
         mqtt_client.subscribe(
             "devices/temperature/+",
-            handler=self.handle_temperature_data
+            handler=self.handle_temperature_data,
+            family=TopicFamily.TELEMETRY
+        )
+
+        mqtt_client.subscribe(
+            mqtt_topics.device_withdraw_ack().topic,
+            handler=self.handle_withdraw_ack,
+            family=TopicFamily.CONTROL
         )
 
         logger.info("MQTT subscriptions configuradas")
@@ -47,10 +80,9 @@ class MQTTHandlers:
                     response_topic = mqtt_topics.device_connection_response(device_id).topic
                     mqtt_client.publish(response_topic, "authorized")
                     logger.info(f"Dispositivo {device_id} autorizado")
+                    self.send_authorize_command(device_id)
                 else:
                     logger.warning(f"Dispositivo {device_id} não autorizado")
-
-                self.send_authorize_command()
             else:
                 response_topic = mqtt_topics.device_connection_response(device_id).topic
                 mqtt_client.publish(response_topic, "authorized")
@@ -94,6 +126,50 @@ class MQTTHandlers:
         except Exception as e:
             logger.error(f"Erro ao processar dados de temperatura: {e}")
 
+    def handle_withdraw_ack(self, topic: str, payload: str, qos: int, retain: bool):
+        """
+        Payload: "completed" / "failed" / "started", ou JSON com "status" e, quando o
+        firmware souber, "transaction_id".
+        """
+        try:
+            device_and_slot = mqtt_topics.extract_device_and_slot_from_withdraw_ack(topic)
+            if not device_and_slot:
+                logger.warning(f"Não foi possível extrair dispositivo/slot do ack: {topic}")
+                return
+
+            device_id, slot = device_and_slot
+            status_value, transaction_id = payload.strip(), None
+
+            if status_value.startswith("{"):
+                data = json.loads(status_value)
+                status_value = str(data.get("status", ""))
+                raw_transaction_id = data.get("transaction_id") or data.get("transactionId")
+                if raw_transaction_id:
+                    transaction_id = uuid.UUID(str(raw_transaction_id))
+
+            status = ACK_STATUSES.get(status_value.lower())
+            if status is None:
+                logger.warning(f"Status de ack desconhecido de {device_id}/{slot}: {status_value}")
+                return
+
+            logger.info(f"Ack {status.value} recebido de {device_id}, slot {slot}")
+
+            if self.dispense_ack_processor:
+                self.dispense_ack_processor.add(DispenseAck(
+                    device_id=device_id,
+                    slot=int(slot),
+                    status=status,
+                    received_at=datetime.datetime.now(datetime.UTC),
+                    transaction_id=transaction_id
+                ))
+            else:
+                logger.warning("Processador de acks não configurado, ack não processado")
+
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Ack de dispensação inválido em {topic}: {e}")
+        except Exception as e:
+            logger.error(f"Erro ao processar ack de dispensação: {e}")
+
     def send_withdraw_command(self, device_id: str, slot: int) -> bool:
         try:
             topic = mqtt_topics.device_withdraw(device_id, str(slot)).topic
@@ -110,10 +186,38 @@ class MQTTHandlers:
             logger.error(f"Erro ao enviar comando de withdraw: {e}")
             return False
 
-    def send_authorize_command(self):
-        mqtt_client.publish(topic="devices/connection/response/smartlab_001", payload=json.dumps({
+    async def send_withdraw_command_async(self, device_id: str, slot: int, transaction_id: str = None) -> bool:
+        """
+        O payload padrão é só o slot. Para os dispositivos em WITHDRAW_JSON_PAYLOAD_DEVICES
+        vai JSON com o transaction_id: o outbox pode reenviar o mesmo comando e o
+        dispositivo usa o id para não dispensar duas vezes (e o devolve no ack).
+        """
+        try:
+            topic = mqtt_topics.device_withdraw(device_id, str(slot)).topic
+            if transaction_id and self._accepts_json_withdraw(device_id):
+                payload = json.dumps({"slot": slot, "transaction_id": transaction_id})
+            else:
+                payload = str(slot)
+            success = await mqtt_client.publish_async(topic, payload)
+
+            if success:
+                logger.info(f"Comando de withdraw confirmado pelo broker para {device_id}, slot {slot}")
+            else:
+                logger.error(f"Falha ao enviar comando de withdraw para {device_id}")
+
+            return success
+
+        except Exception as e:
+            logger.error(f"Erro ao enviar comando de withdraw: {e}")
+            return False
+
+    def _accepts_json_withdraw(self, device_id: str) -> bool:
+        return '*' in self._json_withdraw_devices or device_id in self._json_withdraw_devices
+
+    def send_authorize_command(self, device_id: str):
+        mqtt_client.publish(topic=mqtt_topics.device_connection_response(device_id).topic, payload=json.dumps({
             "status": "approved",
-            "device_id": "smartlab_001"
+            "device_id": device_id
         }))
 
 mqtt_handlers = MQTTHandlers()
\ No newline at end of file
@@ -5,10 +5,10 @@ from .client import mqtt_client
 logger = logging.getLogger(__name__)
 
 
-def setup_mqtt_integration(device_service, temperature_service):
+def setup_mqtt_integration(device_service, temperature_service, dispense_ack_processor=None):
     logger.info("Configurando integração MQTT com services")
 
-    mqtt_handlers.register_services(device_service, temperature_service)
+    mqtt_handlers.register_services(device_service, temperature_service, dispense_ack_processor)
 
     def on_mqtt_connected(connected: bool):
         if connected:
@@ -32,6 +32,22 @@ def send_device_command(device_id: str, command_type: str, **kwargs) -> bool:
             logger.error("Comando withdraw requer parâmetro 'slot'")
             return False
         return mqtt_handlers.send_withdraw_command(device_id, slot)
+    else:
+        logger.error(f"Tipo de comando não suportado: {command_type}")
+        return False
+
+
+async def deliver_outbox_message(message) -> bool:
+    return await send_device_command_async(message.device_id, message.command_type, **message.payload)
+
+
+async def send_device_command_async(device_id: str, command_type: str, **kwargs) -> bool:
+    if command_type == "withdraw":
+        slot = kwargs.get('slot')
+        if slot is None:
+            logger.error("Comando withdraw requer parâmetro 'slot'")
+            return False
+        return await mqtt_handlers.send_withdraw_command_async(device_id, slot, kwargs.get('transaction_id'))
     else:
         logger.error(f"Tipo de comando não suportado: {command_type}")
         return False
\ No newline at end of file
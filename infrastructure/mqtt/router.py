@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Optional
+
+
+class _TopicNode:
+    __slots__ = ("children", "plus", "hash_value", "value", "has_value")
+
+    def __init__(self):
+        self.children: Dict[str, "_TopicNode"] = {}
+        self.plus: Optional["_TopicNode"] = None
+        self.hash_value: Any = None
+        self.value: Any = None
+        self.has_value = False
+
+
+_NO_MATCH = object()
+
+
+class TopicRouter:
+    """
+    Trie de filtros MQTT, montada uma vez na subscrição.
+
+    Resolve um tópico percorrendo só os níveis do tópico (O(profundidade) no caso
+    comum, sem varrer os filtros), seguindo a especificação MQTT 3.1.1:
+    '+' casa exatamente um nível, '#' casa o nível pai e todos os seguintes
+    ("a/#" casa "a"), e curingas no primeiro nível não casam tópicos '$SYS/...'.
+    Quando mais de um filtro casa, vence o mais específico (literal > '+' > '#').
+    """
+
+    def __init__(self):
+        self._root = _TopicNode()
+        self._filters: Dict[str, Any] = {}
+
+    def add(self, topic_filter: str, value: Any) -> None:
+        levels = topic_filter.split('/')
+        node = self._root
+
+        for index, level in enumerate(levels):
+            if level == '#':
+                if index != len(levels) - 1:
+                    raise ValueError(f"'#' deve ser o último nível do filtro: {topic_filter}")
+                # Guardado no próprio nó pai: casa o pai e qualquer sufixo
+                node.hash_value = (value,)
+                break
+
+            if level == '+':
+                if node.plus is None:
+                    node.plus = _TopicNode()
+                node = node.plus
+            else:
+                if '+' in level or '#' in level:
+                    raise ValueError(f"Curinga inválido no filtro: {topic_filter}")
+                node = node.children.setdefault(level, _TopicNode())
+        else:
+            node.value = value
+            node.has_value = True
+
+        self._filters[topic_filter] = value
+
+    def remove(self, topic_filter: str) -> None:
+        if topic_filter not in self._filters:
+            return
+
+        # Remoções são raras (unsubscribe); reconstruir mantém a trie sem nós órfãos
+        filters = dict(self._filters)
+        del filters[topic_filter]
+        self._root = _TopicNode()
+        self._filters = {}
+        for existing_filter, value in filters.items():
+            self.add(existing_filter, value)
+
+    def match(self, topic: str) -> Any:
+        """Retorna o valor do filtro mais específico que casa o tópico, ou None."""
+        levels = topic.split('/')
+        result = self._match(self._root, levels, 0, topic.startswith('$'))
+        return None if result is _NO_MATCH else result
+
+    def _match(self, node: _TopicNode, levels: List[str], index: int, system_topic: bool) -> Any:
+        if index == len(levels):
+            if node.has_value:
+                return node.value
+            if node.hash_value is not None:
+                return node.hash_value[0]
+            return _NO_MATCH
+
+        # Tópicos iniciados por '$' não casam curingas no primeiro nível
+        wildcards_allowed = not (index == 0 and system_topic)
+
+        child = node.children.get(levels[index])
+        if child is not None:
+            result = self._match(child, levels, index + 1, system_topic)
+            if result is not _NO_MATCH:
+                return result
+
+        if wildcards_allowed:
+            if node.plus is not None:
+                result = self._match(node.plus, levels, index + 1, system_topic)
+                if result is not _NO_MATCH:
+                    return result
+
+            if node.hash_value is not None:
+                return node.hash_value[0]
+
+        return _NO_MATCH
+
+    def __contains__(self, topic_filter: str) -> bool:
+        return topic_filter in self._filters
+
+    def __len__(self) -> int:
+        return len(self._filters)
+
+    def items(self):
+        return self._filters.items()
\ No newline at end of file
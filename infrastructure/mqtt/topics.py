@@ -45,6 +45,13 @@ class MQTTTopics:
             description=f"Comandos de dispensação para {device_id}"
         )
 
+    def device_withdraw_ack(self, device_id: str = "+", slot: str = "+") -> TopicDefinition:
+        return TopicDefinition(
+            f"devices/withdraw/{device_id}/{slot}/ack",
+            qos=1,
+            description=f"Resultado das dispensações de {device_id}"
+        )
+
     def device_temperature(self, device_id: str) -> TopicDefinition:
         return TopicDefinition(
             f"devices/temperature/{device_id}",
@@ -92,6 +99,12 @@ class MQTTTopics:
         parts = topic.split('/')
         return parts[2] if len(parts) >= 3 else None
 
+    def extract_device_and_slot_from_withdraw_ack(self, topic: str) -> tuple[str, str] | None:
+        parts = topic.split('/')
+        if len(parts) == 5 and parts[0] == "devices" and parts[1] == "withdraw" and parts[4] == "ack":
+            return parts[2], parts[3]
+        return None
+
     def extract_device_and_slot_from_withdraw(self, topic: str) -> tuple[str, str] | None:
         if not topic.startswith("devices/withdraw/"):
             return None
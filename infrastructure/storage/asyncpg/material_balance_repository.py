@@ -0,0 +1,65 @@
+from typing import Optional, List
+
+from domain.entities.material_balance import MaterialBalance
+from domain.value_objects.ids import MaterialId, LaboratoryId
+from infrastructure.storage.asyncpg.prepared import PreparedQuery
+from infrastructure.storage.repositories.material_balance_repository import MaterialBalanceRepositoryImpl
+
+_COLUMNS = "material_id, laboratory_id, current_stock, reserved_stock, last_updated"
+
+BALANCE_BY_MATERIAL_AND_LABORATORY = PreparedQuery(
+    "balance_by_material_and_laboratory",
+    f"SELECT {_COLUMNS} FROM material_balances WHERE material_id = $1 AND laboratory_id = $2"
+)
+
+BALANCES_BY_LABORATORY = PreparedQuery(
+    "balances_by_laboratory",
+    f"SELECT {_COLUMNS} FROM material_balances WHERE laboratory_id = $1"
+)
+
+# Array em vez de IN (...): o SQL não muda com a quantidade de materiais, então um único preparo serve
+BALANCES_BY_MATERIALS = PreparedQuery(
+    "balances_by_materials",
+    f"SELECT {_COLUMNS} FROM material_balances WHERE laboratory_id = $1 AND material_id = ANY($2::uuid[])"
+)
+
+
+def _to_domain(record) -> MaterialBalance:
+    return MaterialBalance(
+        material_id=MaterialId(record['material_id']),
+        laboratory_id=LaboratoryId(record['laboratory_id']),
+        current_stock=record['current_stock'],
+        reserved_stock=record['reserved_stock'],
+        last_updated=record['last_updated']
+    )
+
+
+class AsyncpgMaterialBalanceRepository(MaterialBalanceRepositoryImpl):
+    """Leituras de saldo direto no asyncpg; escritas e reservas seguem na implementação do ORM."""
+
+    async def find_by_material_and_laboratory(
+            self,
+            material_id: MaterialId,
+            laboratory_id: LaboratoryId
+    ) -> Optional[MaterialBalance]:
+        record = await BALANCE_BY_MATERIAL_AND_LABORATORY.fetchrow(
+            self.session, material_id.value, laboratory_id.value
+        )
+        return _to_domain(record) if record else None
+
+    async def find_by_laboratory(self, laboratory_id: LaboratoryId) -> List[MaterialBalance]:
+        records = await BALANCES_BY_LABORATORY.fetch(self.session, laboratory_id.value)
+        return [_to_domain(record) for record in records]
+
+    async def find_multiple_by_laboratory(
+            self,
+            material_ids: List[MaterialId],
+            laboratory_id: LaboratoryId
+    ) -> List[MaterialBalance]:
+        if not material_ids:
+            return []
+
+        records = await BALANCES_BY_MATERIALS.fetch(
+            self.session, laboratory_id.value, [material_id.value for material_id in material_ids]
+        )
+        return [_to_domain(record) for record in records]
\ No newline at end of file
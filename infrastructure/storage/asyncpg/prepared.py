@@ -0,0 +1,59 @@
+import weakref
+from typing import Dict
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Conexão asyncpg -> {chave: statement preparado}. Fraco: some junto com a conexão do pool
+_statements: "weakref.WeakKeyDictionary[asyncpg.Connection, Dict[str, asyncpg.prepared_stmt.PreparedStatement]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def driver_connection(session: AsyncSession) -> asyncpg.Connection:
+    """
+    Conexão asyncpg por trás da sessão do request. As consultas rodam na mesma
+    transação que o ORM abriu, então a unit of work continua valendo.
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+
+    # O adaptador do SQLAlchemy só manda o BEGIN na primeira consulta que passa por ele.
+    # Sem isso, uma consulta preparada que rode antes do ORM no request cai em autocommit
+    if not raw_connection.dbapi_connection._started:
+        await connection.exec_driver_sql("SELECT 1")
+
+    return raw_connection.driver_connection
+
+
+class PreparedQuery:
+    """
+    Um SQL fixo preparado uma vez por conexão do pool. Depois da primeira
+    chamada em cada conexão, executar é só bind + execute, sem compilar
+    a consulta no SQLAlchemy nem repassar o parse/plan no Postgres.
+    """
+
+    def __init__(self, key: str, sql: str):
+        self.key = key
+        self.sql = sql
+
+    async def fetch(self, session: AsyncSession, *args):
+        connection = await driver_connection(session)
+        statements = _statements.setdefault(connection, {})
+
+        statement = statements.get(self.key)
+        if statement is None:
+            statement = await connection.prepare(self.sql)
+            statements[self.key] = statement
+
+        try:
+            return await statement.fetch(*args)
+        except asyncpg.exceptions.InvalidCachedStatementError:
+            # Schema mudou (migration) desde o prepare. Dentro da transação não dá para
+            # repetir: descarta o statement e o próximo request prepara de novo
+            statements.pop(self.key, None)
+            raise
+
+    async def fetchrow(self, session: AsyncSession, *args):
+        rows = await self.fetch(session, *args)
+        return rows[0] if rows else None
\ No newline at end of file
@@ -0,0 +1,90 @@
+from typing import List, Dict
+
+from domain.entities.procedure import Procedure, LaboratoryProcedure
+from domain.entities.procedure_usage import ProcedureUsage
+from domain.value_objects.ids import ProcedureId, LaboratoryId, MaterialId
+from infrastructure.storage.asyncpg.prepared import PreparedQuery
+from infrastructure.storage.repositories.procedure_repository import ProcedureRepositoryImpl
+
+LABORATORY_PROCEDURES = PreparedQuery(
+    "laboratory_procedures",
+    "SELECT laboratory_id, procedure_id, slot, created_at FROM laboratory_procedures WHERE laboratory_id = $1"
+)
+
+PROCEDURES_BY_LABORATORY = PreparedQuery(
+    "procedures_by_laboratory",
+    "SELECT p.procedure_id, p.name, p.description, p.created_at, p.updated_at, p.is_deleted, p.deleted_at "
+    "FROM procedures p JOIN laboratory_procedures lp ON lp.procedure_id = p.procedure_id "
+    "WHERE lp.laboratory_id = $1 AND p.is_deleted = false"
+)
+
+PROCEDURE_USAGES = PreparedQuery(
+    "procedure_usages",
+    "SELECT procedure_id, material_id, required_amount FROM procedure_usages WHERE procedure_id = $1"
+)
+
+PROCEDURE_USAGES_FOR_MANY = PreparedQuery(
+    "procedure_usages_for_many",
+    "SELECT procedure_id, material_id, required_amount FROM procedure_usages WHERE procedure_id = ANY($1::uuid[])"
+)
+
+
+def _usage_to_domain(record) -> ProcedureUsage:
+    return ProcedureUsage(
+        procedure_id=ProcedureId(record['procedure_id']),
+        material_id=MaterialId(record['material_id']),
+        required_amount=record['required_amount']
+    )
+
+
+class AsyncpgProcedureRepository(ProcedureRepositoryImpl):
+    """Consultas do caminho da retirada e da listagem direto no asyncpg; o restante usa o ORM."""
+
+    async def find_required_materials(self, procedure_id: ProcedureId) -> List[ProcedureUsage]:
+        records = await PROCEDURE_USAGES.fetch(self.session, procedure_id.value)
+        return [_usage_to_domain(record) for record in records]
+
+    async def find_required_materials_for_many(
+            self,
+            procedure_ids: List[ProcedureId]
+    ) -> Dict[ProcedureId, List[ProcedureUsage]]:
+        if not procedure_ids:
+            return {}
+
+        records = await PROCEDURE_USAGES_FOR_MANY.fetch(
+            self.session, [procedure_id.value for procedure_id in procedure_ids]
+        )
+
+        usages_map = {procedure_id: [] for procedure_id in procedure_ids}
+        for record in records:
+            usage = _usage_to_domain(record)
+            usages_map[usage.procedure_id].append(usage)
+
+        return usages_map
+
+    async def find_by_laboratory_procedure(self, laboratory_id: LaboratoryId) -> List[LaboratoryProcedure]:
+        records = await LABORATORY_PROCEDURES.fetch(self.session, laboratory_id.value)
+        return [
+            LaboratoryProcedure(
+                laboratory_id=LaboratoryId(record['laboratory_id']),
+                procedure_id=ProcedureId(record['procedure_id']),
+                slot_id=record['slot'],
+                created_at=record['created_at']
+            )
+            for record in records
+        ]
+
+    async def find_by_laboratory(self, laboratory_id: LaboratoryId) -> List[Procedure]:
+        records = await PROCEDURES_BY_LABORATORY.fetch(self.session, laboratory_id.value)
+        return [
+            Procedure(
+                procedure_id=ProcedureId(record['procedure_id']),
+                name=record['name'],
+                description=record['description'],
+                created_at=record['created_at'],
+                updated_at=record['updated_at'],
+                is_deleted=record['is_deleted'],
+                deleted_at=record['deleted_at']
+            )
+            for record in records
+        ]
\ No newline at end of file
@@ -0,0 +1,46 @@
+import json
+
+from domain.entities.transaction import Transaction
+from infrastructure.storage.asyncpg.prepared import PreparedQuery
+from infrastructure.storage.mappers.transaction import TransactionMapper
+from infrastructure.storage.repositories.transaction_repository import TransactionRepositoryImpl
+
+# Itens como arrays paralelos em unnest: um único SQL (e um único preparo) para qualquer tamanho de kit
+INSERT_TRANSACTION_WITH_ITEMS = PreparedQuery(
+    "insert_transaction_with_items",
+    "WITH new_transaction AS ("
+    " INSERT INTO transactions (transaction_id, transaction_type, status, laboratory_id, user_id,"
+    " procedure_id, created_at, authorized_at, completed_at, reserved_materials)"
+    " VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10::jsonb)"
+    " RETURNING transaction_id"
+    ") "
+    "INSERT INTO transaction_items (transaction_id, material_id, quantity) "
+    "SELECT new_transaction.transaction_id, items.material_id, items.quantity "
+    "FROM new_transaction, unnest($11::uuid[], $12::int[]) AS items (material_id, quantity)"
+)
+
+
+class AsyncpgTransactionRepository(TransactionRepositoryImpl):
+    """insert_new direto no asyncpg; consultas e atualizações seguem na implementação do ORM."""
+
+    async def insert_new(self, transaction: Transaction) -> None:
+        await INSERT_TRANSACTION_WITH_ITEMS.fetch(
+            self.session,
+            transaction.transaction_id.value,
+            transaction.transaction_type.value,
+            transaction.status.value,
+            transaction.laboratory_id.value,
+            transaction.user_id.value,
+            transaction.procedure_id.value if transaction.procedure_id else None,
+            transaction.created_at,
+            transaction.authorized_at,
+            transaction.completed_at,
+            _json_or_none(TransactionMapper.reservations_to_json(transaction)),
+            [item.material_id.value for item in transaction.items],
+            [item.quantity for item in transaction.items]
+        )
+
+
+def _json_or_none(value):
+    # asyncpg recebe jsonb como texto
+    return None if value is None else json.dumps(value)
\ No newline at end of file
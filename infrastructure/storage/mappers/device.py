@@ -0,0 +1,13 @@
+from domain.entities.device import Device
+from infrastructure.storage.models.device import DeviceModel
+
+
+class DeviceMapper:
+
+    @staticmethod
+    def to_domain(model: DeviceModel) -> Device:
+        return Device(
+            device_id=model.device_id,
+            is_whitelisted=model.is_whitelisted,
+            last_seen_at=model.last_seen_at
+        )
\ No newline at end of file
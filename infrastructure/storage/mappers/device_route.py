@@ -0,0 +1,16 @@
+from domain.entities.device_route import DeviceRoute
+from domain.value_objects.ids import LaboratoryId
+from infrastructure.storage.models.device_route import DeviceRouteModel
+
+
+class DeviceRouteMapper:
+
+    @staticmethod
+    def to_domain(model: DeviceRouteModel) -> DeviceRoute:
+        return DeviceRoute(
+            laboratory_id=LaboratoryId(model.laboratory_id),
+            slot_id=model.slot_id,
+            device_id=model.device_id,
+            device_slot=model.device_slot,
+            is_stocked=model.is_stocked
+        )
\ No newline at end of file
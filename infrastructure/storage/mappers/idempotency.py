@@ -0,0 +1,25 @@
+from domain.entities.idempotency_record import IdempotencyRecord
+from infrastructure.storage.models.idempotency import IdempotencyKeyModel
+
+
+class IdempotencyMapper:
+
+    @staticmethod
+    def to_domain(model: IdempotencyKeyModel) -> IdempotencyRecord:
+        return IdempotencyRecord(
+            key=model.key,
+            fingerprint=model.fingerprint,
+            response=model.response,
+            created_at=model.created_at,
+            expires_at=model.expires_at
+        )
+
+    @staticmethod
+    def to_values(record: IdempotencyRecord) -> dict:
+        return {
+            "key": record.key,
+            "fingerprint": record.fingerprint,
+            "response": record.response,
+            "created_at": record.created_at,
+            "expires_at": record.expires_at
+        }
\ No newline at end of file
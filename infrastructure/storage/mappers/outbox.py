@@ -0,0 +1,39 @@
+from domain.entities.outbox_message import OutboxMessage
+from infrastructure.storage.models.outbox import OutboxMessageModel
+
+
+class OutboxMapper:
+
+    @staticmethod
+    def to_domain(model: OutboxMessageModel) -> OutboxMessage:
+        return OutboxMessage(
+            message_id=model.message_id,
+            transaction_id=model.transaction_id,
+            device_id=model.device_id,
+            command_type=model.command_type,
+            payload=model.payload,
+            attempts=model.attempts,
+            available_at=model.available_at,
+            created_at=model.created_at,
+            delivered_at=model.delivered_at,
+            failed_at=model.failed_at,
+            claimed_until=model.claimed_until,
+            last_error=model.last_error
+        )
+
+    @staticmethod
+    def to_model(entity: OutboxMessage) -> OutboxMessageModel:
+        return OutboxMessageModel(
+            message_id=entity.message_id,
+            transaction_id=entity.transaction_id,
+            device_id=entity.device_id,
+            command_type=entity.command_type,
+            payload=entity.payload,
+            attempts=entity.attempts,
+            available_at=entity.available_at,
+            created_at=entity.created_at,
+            delivered_at=entity.delivered_at,
+            failed_at=entity.failed_at,
+            claimed_until=entity.claimed_until,
+            last_error=entity.last_error
+        )
\ No newline at end of file
@@ -0,0 +1,29 @@
+from typing import Tuple
+
+from domain.entities.temperature_reading import TemperatureReading
+from infrastructure.storage.models.temperature import TemperatureReadingModel
+
+
+class TemperatureReadingMapper:
+    # Ordem das colunas usada no COPY
+    COLUMNS = ('device_id', 'temperature', 'reading_timestamp', 'device_batch_timestamp', 'received_at')
+
+    @staticmethod
+    def to_domain(model: TemperatureReadingModel) -> TemperatureReading:
+        return TemperatureReading(
+            device_id=model.device_id,
+            temperature=model.temperature,
+            received_at=model.received_at,
+            reading_timestamp=model.reading_timestamp,
+            device_batch_timestamp=model.device_batch_timestamp
+        )
+
+    @staticmethod
+    def to_record(entity: TemperatureReading) -> Tuple:
+        return (
+            entity.device_id,
+            entity.temperature,
+            entity.reading_timestamp,
+            entity.device_batch_timestamp,
+            entity.received_at
+        )
\ No newline at end of file
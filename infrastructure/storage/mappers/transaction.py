@@ -39,7 +39,8 @@ class TransactionMapper:
             created_at=model.created_at,
             authorized_at=model.authorized_at,
             completed_at=model.completed_at,
-            items=[TransactionItemMapper.to_domain(item) for item in model.items]
+            items=[TransactionItemMapper.to_domain(item) for item in model.items],
+            reservations=TransactionMapper.reservations_from_json(model.reserved_materials)
         )
 
     @staticmethod
@@ -53,9 +54,42 @@ class TransactionMapper:
             procedure_id=entity.procedure_id.value if entity.procedure_id else None,  # Passa o UUID diretamente
             created_at=entity.created_at,
             authorized_at=entity.authorized_at,
-            completed_at=entity.completed_at
+            completed_at=entity.completed_at,
+            reserved_materials=TransactionMapper.reservations_to_json(entity)
         )
 
+    @staticmethod
+    def to_values(entity: Transaction) -> dict:
+        # Mesmas colunas do to_model, para INSERTs em Core sem passar pela unit of work do ORM
+        return {
+            "transaction_id": entity.transaction_id.value,
+            "transaction_type": entity.transaction_type.value,
+            "status": entity.status.value,
+            "laboratory_id": entity.laboratory_id.value,
+            "user_id": entity.user_id.value,
+            "procedure_id": entity.procedure_id.value if entity.procedure_id else None,
+            "created_at": entity.created_at,
+            "authorized_at": entity.authorized_at,
+            "completed_at": entity.completed_at,
+            "reserved_materials": TransactionMapper.reservations_to_json(entity)
+        }
+
+    @staticmethod
+    def reservations_to_json(entity: Transaction):
+        if not entity.reservations:
+            return None
+        return [
+            {"material_id": str(reservation.material_id.value), "quantity": reservation.quantity}
+            for reservation in entity.reservations
+        ]
+
+    @staticmethod
+    def reservations_from_json(data) -> list:
+        return [
+            TransactionItem(material_id=MaterialId(uuid.UUID(entry["material_id"])), quantity=entry["quantity"])
+            for entry in data or []
+        ]
+
 
 class TransactionItemMapper:
 
@@ -24,6 +24,11 @@ from infrastructure.storage.models.transaction import (
     TransactionModel,
     TransactionItemModel
 )
+from infrastructure.storage.models.temperature import TemperatureReadingModel
+from infrastructure.storage.models.device import DeviceModel
+from infrastructure.storage.models.device_route import DeviceRouteModel
+from infrastructure.storage.models.idempotency import IdempotencyKeyModel
+from infrastructure.storage.models.outbox import OutboxMessageModel
 
 # this is the Alembic Config object
 config = context.config
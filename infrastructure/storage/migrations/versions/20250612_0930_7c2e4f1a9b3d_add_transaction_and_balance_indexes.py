@@ -0,0 +1,83 @@
+"""add_transaction_and_balance_indexes
+
+Revision ID: 7c2e4f1a9b3d
+Revises: 3bb8b41c0a04
+Create Date: 2025-06-12 09:30:41.518204
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4f1a9b3d'
+down_revision: Union[str, None] = '3bb8b41c0a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # CONCURRENTLY não roda dentro de transação; cada índice é criado sem bloquear escritas
+    with op.get_context().autocommit_block():
+        # Listagem por laboratório: WHERE laboratory_id = ? ORDER BY created_at DESC, transaction_id DESC
+        op.create_index(
+            'ix_transactions_laboratory_created',
+            'transactions',
+            ['laboratory_id', sa.text('created_at DESC'), sa.text('transaction_id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # Listagem por usuário, mesma ordenação
+        op.create_index(
+            'ix_transactions_user_created',
+            'transactions',
+            ['user_id', sa.text('created_at DESC'), sa.text('transaction_id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # Listagens sem filtro de dono (/recent, exportação) paginam só pelo keyset
+        op.create_index(
+            'ix_transactions_created',
+            'transactions',
+            [sa.text('created_at DESC'), sa.text('transaction_id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # Transações ainda abertas são poucas; o índice parcial fica pequeno e quente
+        op.create_index(
+            'ix_transactions_open_created',
+            'transactions',
+            ['created_at'],
+            postgresql_where=sa.text("status IN ('AUTHORIZED', 'IN_PROGRESS')"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # A PK de material_balances começa por material_id; o saldo do laboratório filtra só por laboratory_id
+        op.create_index(
+            'ix_material_balances_laboratory',
+            'material_balances',
+            ['laboratory_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_material_balances_laboratory', table_name='material_balances',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transactions_open_created', table_name='transactions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transactions_created', table_name='transactions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transactions_user_created', table_name='transactions',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transactions_laboratory_created', table_name='transactions',
+                      postgresql_concurrently=True, if_exists=True)
\ No newline at end of file
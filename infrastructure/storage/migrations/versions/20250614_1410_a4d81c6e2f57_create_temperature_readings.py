@@ -0,0 +1,50 @@
+"""create_temperature_readings
+
+Revision ID: a4d81c6e2f57
+Revises: 7c2e4f1a9b3d
+Create Date: 2025-06-14 14:10:07.332815
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d81c6e2f57'
+down_revision: Union[str, None] = '7c2e4f1a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table('temperature_readings',
+        sa.Column('reading_id', sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column('device_id', sa.String(64), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=False),
+        sa.Column('reading_timestamp', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('device_batch_timestamp', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=False)
+    )
+
+    # As leituras chegam em ordem de received_at, então o BRIN cobre consultas por período com poucas páginas
+    op.create_index(
+        'ix_temperature_readings_received_brin',
+        'temperature_readings',
+        ['received_at'],
+        postgresql_using='brin'
+    )
+
+    op.create_index(
+        'ix_temperature_readings_device_received',
+        'temperature_readings',
+        ['device_id', 'received_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_temperature_readings_device_received', table_name='temperature_readings')
+    op.drop_index('ix_temperature_readings_received_brin', table_name='temperature_readings')
+    op.drop_table('temperature_readings')
\ No newline at end of file
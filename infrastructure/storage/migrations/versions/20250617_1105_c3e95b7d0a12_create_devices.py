@@ -0,0 +1,33 @@
+"""create_devices
+
+Revision ID: c3e95b7d0a12
+Revises: a4d81c6e2f57
+Create Date: 2025-06-17 11:05:52.904117
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e95b7d0a12'
+down_revision: Union[str, None] = 'a4d81c6e2f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table('devices',
+        sa.Column('device_id', sa.String(64), primary_key=True),
+        sa.Column('is_whitelisted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('devices')
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""create_device_routes
+
+Revision ID: 5f2a7b9c1d84
+Revises: c3e95b7d0a12
+Create Date: 2025-06-19 16:20:37.118204
+
+"""
+import datetime
+import uuid
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2a7b9c1d84'
+down_revision: Union[str, None] = 'c3e95b7d0a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_LAB_ID = uuid.UUID('12345678-1234-5678-1234-123456789012')
+SECONDARY_LAB_ID = uuid.UUID('87654321-8765-4321-8765-876543218765')
+DEFAULT_DEVICE_ID = 'smartlab_001'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    device_routes = op.create_table('device_routes',
+        sa.Column('laboratory_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('slot_id', sa.Integer(), nullable=False),
+        sa.Column('device_id', sa.String(64), nullable=False),
+        sa.Column('device_slot', sa.Integer(), nullable=False),
+        sa.Column('is_stocked', sa.Boolean(), nullable=False, server_default='true'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('laboratory_id', 'slot_id', 'device_id')
+    )
+    op.create_index('ix_device_routes_device', 'device_routes', ['device_id'])
+
+    # Mantém o comportamento anterior: todos os slots dos laboratórios iniciais saem pelo smartlab_001
+    now = datetime.datetime.now(datetime.UTC)
+
+    op.bulk_insert(device_routes, [
+        {
+            'laboratory_id': laboratory_id,
+            'slot_id': slot,
+            'device_id': DEFAULT_DEVICE_ID,
+            'device_slot': slot,
+            'is_stocked': True,
+            'created_at': now,
+            'updated_at': now
+        }
+        for laboratory_id in (DEFAULT_LAB_ID, SECONDARY_LAB_ID)
+        for slot in range(1, 5)
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_device_routes_device', table_name='device_routes')
+    op.drop_table('device_routes')
\ No newline at end of file
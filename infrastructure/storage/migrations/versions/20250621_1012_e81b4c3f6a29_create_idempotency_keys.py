@@ -0,0 +1,37 @@
+"""create_idempotency_keys
+
+Revision ID: e81b4c3f6a29
+Revises: 5f2a7b9c1d84
+Create Date: 2025-06-21 10:12:08.441930
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b4c3f6a29'
+down_revision: Union[str, None] = '5f2a7b9c1d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table('idempotency_keys',
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('fingerprint', sa.String(64), nullable=False),
+        sa.Column('response', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False)
+    )
+    # Limpeza periódica: DELETE ... WHERE expires_at <= now()
+    op.create_index('ix_idempotency_keys_expires', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotency_keys_expires', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
\ No newline at end of file
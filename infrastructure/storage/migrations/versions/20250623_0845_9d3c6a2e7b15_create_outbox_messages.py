@@ -0,0 +1,56 @@
+"""create_outbox_messages
+
+Revision ID: 9d3c6a2e7b15
+Revises: e81b4c3f6a29
+Create Date: 2025-06-23 08:45:19.530772
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3c6a2e7b15'
+down_revision: Union[str, None] = 'e81b4c3f6a29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table('outbox_messages',
+        sa.Column('message_id', sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column('transaction_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('device_id', sa.String(64), nullable=False),
+        sa.Column('command_type', sa.String(32), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True)
+    )
+
+    op.create_index(
+        'ix_outbox_messages_pending',
+        'outbox_messages',
+        ['available_at', 'message_id'],
+        postgresql_where=sa.text('delivered_at IS NULL AND failed_at IS NULL')
+    )
+
+    op.create_index(
+        'ix_outbox_messages_delivered',
+        'outbox_messages',
+        ['delivered_at'],
+        postgresql_where=sa.text('delivered_at IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_messages_delivered', table_name='outbox_messages')
+    op.drop_index('ix_outbox_messages_pending', table_name='outbox_messages')
+    op.drop_table('outbox_messages')
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""add_outbox_claims
+
+Revision ID: b7e2d4a91c36
+Revises: 9d3c6a2e7b15
+Create Date: 2025-06-25 09:15:07.284416
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4a91c36'
+down_revision: Union[str, None] = '9d3c6a2e7b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # Prazo da publicação em andamento: o relay reivindica a mensagem, faz commit e só então publica
+    op.add_column('outbox_messages', sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('outbox_messages', 'claimed_until')
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""add_transaction_reserved_materials
+
+Revision ID: 4a9f1e6c2d78
+Revises: b7e2d4a91c36
+Create Date: 2025-06-26 10:30:52.617903
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9f1e6c2d78'
+down_revision: Union[str, None] = 'b7e2d4a91c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # O que a retirada reservou, que pode incluir materiais inativos sem item; nulo nas transações antigas
+    op.add_column('transactions', sa.Column('reserved_materials', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('transactions', 'reserved_materials')
\ No newline at end of file
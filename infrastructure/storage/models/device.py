@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, Boolean
+
+from infrastructure.storage.models.base import BaseModel
+
+
+class DeviceModel(BaseModel):
+    __tablename__ = 'devices'
+
+    device_id = Column(String(64), primary_key=True)
+    is_whitelisted = Column(Boolean, nullable=False, default=False)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, Boolean, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from infrastructure.storage.models.base import BaseModel
+
+
+class DeviceRouteModel(BaseModel):
+    __tablename__ = 'device_routes'
+    __table_args__ = (
+        Index('ix_device_routes_device', 'device_id'),
+    )
+
+    laboratory_id = Column(UUID(as_uuid=True), primary_key=True)
+    slot_id = Column(Integer, primary_key=True)
+    device_id = Column(String(64), primary_key=True)
+    device_slot = Column(Integer, nullable=False)
+    is_stocked = Column(Boolean, nullable=False, default=True)
\ No newline at end of file
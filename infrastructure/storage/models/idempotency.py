@@ -0,0 +1,19 @@
+import datetime
+
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+from infrastructure.storage.models.base import Base
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        Index('ix_idempotency_keys_expires', 'expires_at'),
+    )
+
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    response = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.now(datetime.UTC), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from infrastructure.storage.models.base import Base
@@ -14,3 +14,8 @@ class MaterialBalanceModel(Base):
     current_stock = Column(Integer, nullable=False, default=0)
     reserved_stock = Column(Integer, nullable=False, default=0)
     last_updated = Column(DateTime(timezone=True), default=datetime.datetime.now(datetime.UTC), nullable=False)
+
+
+    __table_args__ = (
+        Index('ix_material_balances_laboratory', 'laboratory_id'),
+    )
\ No newline at end of file
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Text, Index, Identity, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from infrastructure.storage.models.base import Base
+
+
+class OutboxMessageModel(Base):
+    __tablename__ = 'outbox_messages'
+
+    message_id = Column(BigInteger, Identity(), primary_key=True)
+    transaction_id = Column(UUID(as_uuid=True), nullable=True)
+    device_id = Column(String(64), nullable=False)
+    command_type = Column(String(32), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Fila do relay: só as pendentes, que são poucas perto do histórico entregue
+        Index(
+            'ix_outbox_messages_pending',
+            'available_at', 'message_id',
+            postgresql_where=text('delivered_at IS NULL AND failed_at IS NULL')
+        ),
+        Index(
+            'ix_outbox_messages_delivered',
+            'delivered_at',
+            postgresql_where=text('delivered_at IS NOT NULL')
+        ),
+    )
\ No newline at end of file
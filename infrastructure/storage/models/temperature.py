@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, Float, BigInteger, Index, Identity
+
+from infrastructure.storage.models.base import Base
+
+
+class TemperatureReadingModel(Base):
+    __tablename__ = 'temperature_readings'
+
+    reading_id = Column(BigInteger, Identity(), primary_key=True)
+    device_id = Column(String(64), nullable=False)
+    temperature = Column(Float, nullable=False)
+    reading_timestamp = Column(DateTime(timezone=True), nullable=True)
+    device_batch_timestamp = Column(DateTime(timezone=True), nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Tabela append-only em ordem de chegada: BRIN fica minúsculo e atende consultas por período
+        Index('ix_temperature_readings_received_brin', 'received_at', postgresql_using='brin'),
+        Index('ix_temperature_readings_device_received', 'device_id', 'received_at'),
+    )
\ No newline at end of file
@@ -1,8 +1,8 @@
 import uuid
 import datetime
 
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
 from infrastructure.storage.models.base import Base
@@ -20,9 +20,22 @@ class TransactionModel(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.datetime.now(datetime.UTC), nullable=False)
     authorized_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    reserved_materials = Column(JSONB, nullable=True)
 
     items = relationship("TransactionItemModel", back_populates="transaction")
 
+    # Espelham os índices da migration 7c2e4f1a9b3d (ordem igual à do keyset da listagem)
+    __table_args__ = (
+        Index('ix_transactions_laboratory_created', 'laboratory_id', created_at.desc(), transaction_id.desc()),
+        Index('ix_transactions_user_created', 'user_id', created_at.desc(), transaction_id.desc()),
+        Index('ix_transactions_created', created_at.desc(), transaction_id.desc()),
+        Index(
+            'ix_transactions_open_created',
+            'created_at',
+            postgresql_where=text("status IN ('AUTHORIZED', 'IN_PROGRESS')")
+        ),
+    )
+
 
 class TransactionItemModel(Base):
     __tablename__ = 'transaction_items'
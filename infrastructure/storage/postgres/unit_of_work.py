@@ -0,0 +1,40 @@
+import logging
+from typing import Callable, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.repositories.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+# Chave em session.info: os callbacks pertencem à sessão do request, não à unit of work compartilhada
+_ON_COMMIT_KEY = 'on_commit_callbacks'
+
+
+class SqlAlchemyUnitOfWork(UnitOfWork):
+
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
+
+    async def commit(self) -> None:
+        session = self.session
+        await session.commit()
+
+        callbacks: List[Callable[[], None]] = session.info.pop(_ON_COMMIT_KEY, [])
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Erro ao executar callback pós-commit: {e}")
+
+    async def rollback(self) -> None:
+        session = self.session
+        session.info.pop(_ON_COMMIT_KEY, None)
+        await session.rollback()
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        self.session.info.setdefault(_ON_COMMIT_KEY, []).append(callback)
\ No newline at end of file
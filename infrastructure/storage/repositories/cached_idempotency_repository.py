@@ -0,0 +1,41 @@
+import datetime
+from typing import Optional, Dict, Any
+
+from domain.entities.idempotency_record import IdempotencyRecord
+from domain.repositories.idempotency import IdempotencyRepository
+from infrastructure.cache.ttl_cache import TTLCache, MISSING
+
+
+class CachedIdempotencyRepository(IdempotencyRepository):
+    """
+    LRU em memória na frente da tabela idempotency_keys. Só respostas já gravadas
+    entram no cache (pela leitura), nunca o que ainda está em uma transação aberta:
+    se o commit falhar, nenhuma resposta fantasma fica para trás. Chaves ausentes
+    não são cacheadas, já que podem ser gravadas a qualquer momento.
+    """
+
+    def __init__(self, inner: IdempotencyRepository, max_size: int, ttl_seconds: float):
+        self._inner = inner
+        self._records = TTLCache(max_size, ttl_seconds)
+
+    async def find_by_key(self, key: str) -> Optional[IdempotencyRecord]:
+        record = self._records.get(key)
+        if record is not MISSING:
+            return record
+
+        record = await self._inner.find_by_key(key)
+        if record is not None:
+            remaining = (record.expires_at - datetime.datetime.now(datetime.UTC)).total_seconds()
+            if remaining > 0:
+                self._records.set(key, record, ttl_seconds=min(remaining, self._records.ttl_seconds))
+
+        return record
+
+    async def save(self, record: IdempotencyRecord) -> bool:
+        return await self._inner.save(record)
+
+    async def delete_expired(self, now: datetime.datetime, limit: int) -> int:
+        return await self._inner.delete_expired(now, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._records.stats()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import logging
+from typing import Optional, List, Dict, Any
+
+from domain.entities.material import Material
+from domain.repositories.material import MaterialRepository
+from domain.repositories.unit_of_work import UnitOfWork
+from domain.value_objects.ids import MaterialId
+from infrastructure.cache.ttl_cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+
+class CachedMaterialRepository(MaterialRepository):
+    """
+    Read-through em memória para os metadados de materiais, compartilhado por todos os use cases.
+    Como o repositório original, só devolve materiais ativos; ids inexistentes ou
+    removidos ficam cacheados como None para não voltarem ao banco a cada chamada.
+
+    Escritas só invalidam depois do commit da unit of work; antes disso uma leitura
+    concorrente recolocaria no cache a linha antiga, que ficaria lá pelo TTL inteiro.
+    """
+
+    def __init__(
+            self,
+            inner: MaterialRepository,
+            ttl_seconds: float,
+            max_size: int,
+            unit_of_work: Optional[UnitOfWork] = None
+    ):
+        self._inner = inner
+        self._unit_of_work = unit_of_work
+        self._materials = TTLCache(max_size, ttl_seconds)
+        # Incrementado a cada invalidação: uma leitura que começou antes não grava no cache
+        self._generation = 0
+
+    async def find_by_id(self, material_id: MaterialId) -> Optional[Material]:
+        materials = await self.find_by_multiple_ids([material_id])
+        return materials[0] if materials else None
+
+    async def find_by_multiple_ids(self, material_ids: List[MaterialId]) -> List[Material]:
+        if not material_ids:
+            return []
+
+        cached: Dict[MaterialId, Optional[Material]] = {}
+        missing_ids = []
+
+        for material_id in dict.fromkeys(material_ids):
+            material = self._materials.get(material_id)
+            if material is MISSING:
+                missing_ids.append(material_id)
+            else:
+                cached[material_id] = material
+
+        if missing_ids:
+            generation = self._generation
+            # Todos os misses em uma única consulta IN
+            loaded = {
+                material.id: material
+                for material in await self._inner.find_by_multiple_ids(missing_ids)
+            }
+            for material_id in missing_ids:
+                material = loaded.get(material_id)
+                if generation == self._generation:
+                    self._materials.set(material_id, material)
+                cached[material_id] = material
+
+        return [material for material in cached.values() if material is not None]
+
+    async def exists(self, material_id: MaterialId) -> bool:
+        return await self.find_by_id(material_id) is not None
+
+    async def save(self, material: Material) -> None:
+        await self._inner.save(material)
+
+        if self._unit_of_work is None:
+            self.invalidate(material.id)
+        else:
+            material_id = material.id
+            self._unit_of_work.on_commit(lambda: self.invalidate(material_id))
+
+    def invalidate(self, material_id: MaterialId) -> None:
+        self._generation += 1
+        self._materials.invalidate(material_id)
+        logger.info(f"Cache do material {material_id.value} invalidado")
+
+    def invalidate_all(self) -> None:
+        self._generation += 1
+        self._materials.clear()
+        logger.info("Cache de materiais invalidado")
+
+    def stats(self) -> Dict[str, Any]:
+        return self._materials.stats()
\ No newline at end of file
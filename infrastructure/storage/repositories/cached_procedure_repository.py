@@ -0,0 +1,137 @@
+import logging
+from typing import Optional, List, Dict, Any
+
+from domain.entities.procedure import Procedure, LaboratoryProcedure
+from domain.entities.procedure_usage import ProcedureUsage
+from domain.repositories.procedure import ProcedureRepository
+from domain.value_objects.ids import ProcedureId, LaboratoryId
+from infrastructure.cache.ttl_cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+
+class CachedProcedureRepository(ProcedureRepository):
+    """
+    Read-through em memória para o catálogo de procedimentos e a composição dos kits.
+    Consultas que não estão no cache (ou expiraram) são delegadas ao repositório
+    original, que continua usando a sessão do request.
+    """
+
+    def __init__(self, inner: ProcedureRepository, ttl_seconds: float, max_size: int):
+        self._inner = inner
+        self._procedures = TTLCache(max_size, ttl_seconds)
+        self._required_materials = TTLCache(max_size, ttl_seconds)
+        self._laboratory_procedures = TTLCache(max_size, ttl_seconds)
+        self._laboratory_catalog = TTLCache(max_size, ttl_seconds)
+
+    async def find_by_id(self, procedure_id: ProcedureId) -> Optional[Procedure]:
+        procedure = self._procedures.get(procedure_id)
+        if procedure is not MISSING:
+            return procedure
+
+        procedure = await self._inner.find_by_id(procedure_id)
+        if procedure:
+            self._procedures.set(procedure_id, procedure)
+
+        return procedure
+
+    async def find_required_materials(
+            self,
+            procedure_id: ProcedureId
+    ) -> List[ProcedureUsage]:
+        usages = self._required_materials.get(procedure_id)
+        if usages is MISSING:
+            usages = await self._inner.find_required_materials(procedure_id)
+            self._required_materials.set(procedure_id, usages)
+
+        return list(usages)
+
+    async def find_by_ids(self, procedure_ids: List[ProcedureId]) -> Dict[ProcedureId, Procedure]:
+        found = {}
+        missing_ids = []
+
+        for procedure_id in procedure_ids:
+            procedure = self._procedures.get(procedure_id)
+            if procedure is MISSING:
+                missing_ids.append(procedure_id)
+            else:
+                found[procedure_id] = procedure
+
+        if missing_ids:
+            loaded = await self._inner.find_by_ids(missing_ids)
+            for procedure_id, procedure in loaded.items():
+                self._procedures.set(procedure_id, procedure)
+            found.update(loaded)
+
+        return found
+
+    async def find_required_materials_for_many(
+            self,
+            procedure_ids: List[ProcedureId]
+    ) -> Dict[ProcedureId, List[ProcedureUsage]]:
+        usages_map = {}
+        missing_ids = []
+
+        for procedure_id in procedure_ids:
+            usages = self._required_materials.get(procedure_id)
+            if usages is MISSING:
+                missing_ids.append(procedure_id)
+            else:
+                usages_map[procedure_id] = list(usages)
+
+        if missing_ids:
+            loaded = await self._inner.find_required_materials_for_many(missing_ids)
+            for procedure_id, usages in loaded.items():
+                self._required_materials.set(procedure_id, usages)
+                usages_map[procedure_id] = list(usages)
+
+        return usages_map
+
+    async def exists(self, procedure_id: ProcedureId) -> bool:
+        procedure = await self.find_by_id(procedure_id)
+        return procedure is not None and procedure.is_active()
+
+    async def find_by_laboratory(self, laboratory_id: LaboratoryId) -> List[Procedure]:
+        procedures = self._laboratory_catalog.get(laboratory_id)
+        if procedures is MISSING:
+            procedures = await self._inner.find_by_laboratory(laboratory_id)
+            self._laboratory_catalog.set(laboratory_id, procedures)
+
+        return list(procedures)
+
+    async def find_by_laboratory_procedure(self, laboratory_id: LaboratoryId) -> List[LaboratoryProcedure]:
+        lab_procedures = self._laboratory_procedures.get(laboratory_id)
+        if lab_procedures is MISSING:
+            lab_procedures = await self._inner.find_by_laboratory_procedure(laboratory_id)
+            self._laboratory_procedures.set(laboratory_id, lab_procedures)
+
+        return list(lab_procedures)
+
+    def invalidate_procedure(self, procedure_id: ProcedureId) -> None:
+        """Chamar após persistir alterações em um procedimento ou na composição do kit."""
+        self._procedures.invalidate(procedure_id)
+        self._required_materials.invalidate(procedure_id)
+        # O catálogo por laboratório embute o procedimento, não há índice reverso
+        self._laboratory_catalog.clear()
+        logger.info(f"Cache do procedimento {procedure_id.value} invalidado")
+
+    def invalidate_laboratory(self, laboratory_id: LaboratoryId) -> None:
+        """Chamar após alterar os slots/procedimentos disponíveis em um laboratório."""
+        self._laboratory_procedures.invalidate(laboratory_id)
+        self._laboratory_catalog.invalidate(laboratory_id)
+        logger.info(f"Cache de procedimentos do laboratório {laboratory_id.value} invalidado")
+
+    def invalidate_all(self) -> None:
+        self._procedures.clear()
+        self._required_materials.clear()
+        self._laboratory_procedures.clear()
+        self._laboratory_catalog.clear()
+        logger.info("Cache de procedimentos invalidado")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "procedures": self._procedures.stats(),
+            "required_materials": self._required_materials.stats(),
+            "laboratory_procedures": self._laboratory_procedures.stats(),
+            "laboratory_catalog": self._laboratory_catalog.stats()
+        }
\ No newline at end of file
@@ -0,0 +1,100 @@
+import datetime
+from typing import Dict, List
+
+from sqlalchemy import select, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from domain.entities.device import Device
+from domain.repositories.device import DeviceRepository
+from infrastructure.storage.mappers.device import DeviceMapper
+from infrastructure.storage.models.device import DeviceModel
+
+# Linhas por INSERT: 5 parâmetros cada, longe do limite de 32767 do protocolo do Postgres
+HEARTBEAT_CHUNK_SIZE = 1000
+
+
+class DeviceRepositoryImpl(DeviceRepository):
+    """
+    Usado no startup e pela gravação de heartbeats em background, fora de
+    qualquer request: cada operação abre a própria sessão.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker):
+        self._session_factory = session_factory
+
+    async def find_all(self) -> List[Device]:
+        async with self._session_factory() as session:
+            result = await session.execute(select(DeviceModel))
+            return [DeviceMapper.to_domain(model) for model in result.scalars().all()]
+
+    async def save_heartbeats(self, last_seen: Dict[str, datetime.datetime]) -> int:
+        if not last_seen:
+            return 0
+
+        now = datetime.datetime.now(datetime.UTC)
+
+        # Ordenado por id: instâncias concorrentes travam as linhas na mesma ordem.
+        # is_whitelisted só vale para dispositivos novos; o conflito não toca na coluna
+        rows = [
+            {
+                "device_id": device_id,
+                "is_whitelisted": False,
+                "last_seen_at": seen_at,
+                "created_at": now,
+                "updated_at": now
+            }
+            for device_id, seen_at in sorted(last_seen.items())
+        ]
+
+        async with self._session_factory() as session:
+            # Um commit para todos os pedaços: o lote grava inteiro ou volta inteiro para a fila
+            for start in range(0, len(rows), HEARTBEAT_CHUNK_SIZE):
+                stmt = insert(DeviceModel).values(rows[start:start + HEARTBEAT_CHUNK_SIZE])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[DeviceModel.device_id],
+                    set_={
+                        # Nunca volta no tempo se outra instância já gravou um heartbeat mais novo
+                        "last_seen_at": func.greatest(DeviceModel.last_seen_at, stmt.excluded.last_seen_at),
+                        "updated_at": stmt.excluded.updated_at
+                    }
+                )
+                await session.execute(stmt)
+
+            await session.commit()
+
+        return len(rows)
+
+    async def save_whitelist(self, device_ids: List[str]) -> None:
+        """Substitui a whitelist inteira: os ids informados ficam liberados e o resto não."""
+        now = datetime.datetime.now(datetime.UTC)
+        device_ids = sorted(set(device_ids))
+
+        async with self._session_factory() as session:
+            revoke = (
+                update(DeviceModel)
+                .where(DeviceModel.is_whitelisted.is_(True))
+                .values(is_whitelisted=False, updated_at=now)
+            )
+            if device_ids:
+                revoke = revoke.where(DeviceModel.device_id.not_in(device_ids))
+            await session.execute(revoke)
+
+            if device_ids:
+                stmt = insert(DeviceModel).values([
+                    {
+                        "device_id": device_id,
+                        "is_whitelisted": True,
+                        "created_at": now,
+                        "updated_at": now
+                    }
+                    for device_id in device_ids
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[DeviceModel.device_id],
+                    set_={"is_whitelisted": True, "updated_at": stmt.excluded.updated_at},
+                    where=DeviceModel.is_whitelisted.is_(False)
+                )
+                await session.execute(stmt)
+
+            await session.commit()
\ No newline at end of file
@@ -0,0 +1,27 @@
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from domain.entities.device_route import DeviceRoute
+from domain.repositories.device_route import DeviceRouteRepository
+from infrastructure.storage.mappers.device_route import DeviceRouteMapper
+from infrastructure.storage.models.device_route import DeviceRouteModel
+
+
+class DeviceRouteRepositoryImpl(DeviceRouteRepository):
+    """Lido pelo serviço de roteamento fora de requests; abre a própria sessão."""
+
+    def __init__(self, session_factory: async_sessionmaker):
+        self._session_factory = session_factory
+
+    async def find_all(self) -> List[DeviceRoute]:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(DeviceRouteModel).order_by(
+                    DeviceRouteModel.laboratory_id,
+                    DeviceRouteModel.slot_id,
+                    DeviceRouteModel.device_id
+                )
+            )
+            return [DeviceRouteMapper.to_domain(model) for model in result.scalars().all()]
\ No newline at end of file
@@ -0,0 +1,64 @@
+import datetime
+from typing import Optional, Callable
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entities.idempotency_record import IdempotencyRecord
+from domain.repositories.idempotency import IdempotencyRepository
+from infrastructure.storage.mappers.idempotency import IdempotencyMapper
+from infrastructure.storage.models.idempotency import IdempotencyKeyModel
+
+
+class IdempotencyRepositoryImpl(IdempotencyRepository):
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
+
+    async def find_by_key(self, key: str) -> Optional[IdempotencyRecord]:
+        stmt = select(IdempotencyKeyModel).where(
+            IdempotencyKeyModel.key == key,
+            IdempotencyKeyModel.expires_at > datetime.datetime.now(datetime.UTC)
+        )
+        result = await self.session.execute(stmt)
+        model = result.scalar_one_or_none()
+
+        if model is None:
+            return None
+
+        return IdempotencyMapper.to_domain(model)
+
+    async def save(self, record: IdempotencyRecord) -> bool:
+        stmt = insert(IdempotencyKeyModel).values(IdempotencyMapper.to_values(record))
+
+        # Uma chave expirada que a limpeza ainda não removeu pode ser reaproveitada
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKeyModel.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "response": stmt.excluded.response,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at
+            },
+            where=IdempotencyKeyModel.expires_at <= stmt.excluded.created_at
+        ).returning(IdempotencyKeyModel.key)
+
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+    async def delete_expired(self, now: datetime.datetime, limit: int) -> int:
+        expired = (
+            select(IdempotencyKeyModel.key)
+            .where(IdempotencyKeyModel.expires_at <= now)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            delete(IdempotencyKeyModel).where(IdempotencyKeyModel.key.in_(expired))
+        )
+        return result.rowcount
\ No newline at end of file
@@ -1,9 +1,12 @@
-from typing import Optional, List
+import datetime
+from typing import Optional, List, Dict, Callable, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, update, values, column, Integer
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from domain.entities.material_balance import MaterialBalance
+from domain.exceptions import InsufficientStockError
 from domain.repositories.material import MaterialBalanceRepository
 from domain.value_objects.ids import MaterialId, LaboratoryId
 from infrastructure.storage.mappers.material_balance import MaterialBalanceMapper
@@ -12,14 +15,18 @@ from infrastructure.storage.models.material_balance import MaterialBalanceModel
 
 class MaterialBalanceRepositoryImpl(MaterialBalanceRepository):
 
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
 
     async def save(self, balance: MaterialBalance) -> None:
         balance_model = MaterialBalanceMapper.to_model(balance)
 
         await self.session.merge(balance_model)
-        await self.session.commit()
+        await self.session.flush()
 
     async def find_by_material_and_laboratory(
             self,
@@ -61,4 +68,121 @@ class MaterialBalanceRepositoryImpl(MaterialBalanceRepository):
         result = await self.session.execute(stmt)
         models = result.scalars().all()
 
-        return [MaterialBalanceMapper.to_domain(model) for model in models]
\ No newline at end of file
+        return [MaterialBalanceMapper.to_domain(model) for model in models]
+
+    async def apply_reservation_changes(
+            self,
+            changes: Dict[Tuple[LaboratoryId, MaterialId], Tuple[int, int]]
+    ) -> int:
+        """
+        Todas as baixas e liberações de um lote de transações em um único UPDATE ... FROM (VALUES ...).
+        Saldos cuja reserva não cobre a alteração ficam intocados e não entram na contagem.
+        """
+        if not changes:
+            return 0
+
+        # Mesma ordem de travamento do reserve_multiple
+        rows = sorted(
+            (laboratory_id.value, material_id.value, consumed, released)
+            for (laboratory_id, material_id), (consumed, released) in changes.items()
+        )
+
+        settled = values(
+            column('laboratory_id', UUID(as_uuid=True)),
+            column('material_id', UUID(as_uuid=True)),
+            column('consumed', Integer),
+            column('released', Integer),
+            name='settled'
+        ).data(rows)
+
+        stmt = (
+            update(MaterialBalanceModel)
+            .where(
+                MaterialBalanceModel.laboratory_id == settled.c.laboratory_id,
+                MaterialBalanceModel.material_id == settled.c.material_id,
+                MaterialBalanceModel.reserved_stock >= settled.c.consumed + settled.c.released
+            )
+            .values(
+                reserved_stock=MaterialBalanceModel.reserved_stock - settled.c.consumed - settled.c.released,
+                current_stock=MaterialBalanceModel.current_stock - settled.c.consumed,
+                last_updated=datetime.datetime.now(datetime.UTC)
+            )
+            .returning(MaterialBalanceModel.material_id)
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.session.execute(stmt)
+        return len(result.all())
+
+    async def reserve_multiple(
+            self,
+            quantities: Dict[MaterialId, int],
+            laboratory_id: LaboratoryId
+    ) -> List[MaterialBalance]:
+        """
+        Reserva todos os materiais do kit em um único UPDATE condicional.
+        Se algum material não tiver saldo disponível, InsufficientStockError é
+        lançado com os materiais em falta e o rollback fica a cargo da unit of work.
+        """
+        if not quantities:
+            return []
+
+        requested = values(
+            column('material_id', UUID(as_uuid=True)),
+            column('quantity', Integer),
+            name='requested'
+        ).data([(material_id.value, quantity) for material_id, quantity in quantities.items()])
+
+        # Trava as linhas sempre na mesma ordem para evitar deadlock entre kits concorrentes
+        locked = (
+            select(MaterialBalanceModel.material_id)
+            .where(
+                MaterialBalanceModel.laboratory_id == laboratory_id.value,
+                MaterialBalanceModel.material_id.in_([material_id.value for material_id in quantities])
+            )
+            .order_by(MaterialBalanceModel.material_id)
+            .with_for_update()
+            .cte('locked')
+        )
+
+        stmt = (
+            update(MaterialBalanceModel)
+            .where(
+                MaterialBalanceModel.laboratory_id == laboratory_id.value,
+                MaterialBalanceModel.material_id == requested.c.material_id,
+                MaterialBalanceModel.material_id.in_(select(locked.c.material_id)),
+                MaterialBalanceModel.current_stock - MaterialBalanceModel.reserved_stock >= requested.c.quantity
+            )
+            .values(
+                reserved_stock=MaterialBalanceModel.reserved_stock + requested.c.quantity,
+                last_updated=datetime.datetime.now(datetime.UTC)
+            )
+            .returning(
+                MaterialBalanceModel.material_id,
+                MaterialBalanceModel.laboratory_id,
+                MaterialBalanceModel.current_stock,
+                MaterialBalanceModel.reserved_stock,
+                MaterialBalanceModel.last_updated
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.session.execute(stmt)
+        reserved = [MaterialBalanceMapper.to_domain(row) for row in result.all()]
+
+        if len(reserved) < len(quantities):
+            # As linhas em falta não foram tocadas pelo UPDATE, então o saldo lido ainda é o original
+            reserved_ids = {balance.material_id for balance in reserved}
+            missing_ids = [material_id for material_id in quantities if material_id not in reserved_ids]
+            missing_balances = await self.find_multiple_by_laboratory(missing_ids, laboratory_id)
+            available_map = {balance.material_id: balance.available_stock() for balance in missing_balances}
+
+            raise InsufficientStockError(
+                f"Insufficient stock for {len(missing_ids)} material(s) in laboratory {laboratory_id.value}",
+                shortages=[
+                    (material_id, quantities[material_id], available_map.get(material_id, 0))
+                    for material_id in missing_ids
+                ]
+            )
+
+        return reserved
\ No newline at end of file
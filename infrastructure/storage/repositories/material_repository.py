@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Callable
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,8 +11,12 @@ from infrastructure.storage.models.material import MaterialModel
 
 
 class MaterialRepositoryImpl(MaterialRepository):
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
 
     async def find_by_id(self, material_id: MaterialId) -> Optional[Material]:
         stmt = select(MaterialModel).where(
@@ -49,4 +53,9 @@ class MaterialRepositoryImpl(MaterialRepository):
             MaterialModel.is_deleted == False
         )
         result = await self.session.execute(stmt)
-        return result.scalar() is not None
\ No newline at end of file
+        return result.scalar() is not None
+
+    async def save(self, material: Material) -> None:
+        # Persiste update_info / soft_delete / restore; o commit fica com a unit of work
+        await self.session.merge(MaterialMapper.to_model(material))
+        await self.session.flush()
\ No newline at end of file
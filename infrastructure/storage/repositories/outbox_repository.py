@@ -0,0 +1,183 @@
+import datetime
+from typing import List, Callable, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, update, delete, bindparam, or_, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entities.outbox_message import OutboxMessage
+from domain.repositories.outbox import OutboxRepository
+from infrastructure.storage.mappers.outbox import OutboxMapper
+from infrastructure.storage.models.outbox import OutboxMessageModel
+from infrastructure.storage.models.transaction import TransactionModel
+from domain.value_objects.enums import TransactionStatus
+
+
+class OutboxRepositoryImpl(OutboxRepository):
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
+
+    async def add(self, message: OutboxMessage) -> None:
+        self.session.add(OutboxMapper.to_model(message))
+        await self.session.flush()
+
+    async def claim_pending(
+            self,
+            now: datetime.datetime,
+            claimed_until: datetime.datetime,
+            limit: int
+    ) -> List[OutboxMessage]:
+        # SKIP LOCKED: várias instâncias do relay dividem a fila sem enviar a mesma mensagem
+        ready = (
+            select(OutboxMessageModel.message_id)
+            .where(
+                OutboxMessageModel.delivered_at.is_(None),
+                OutboxMessageModel.failed_at.is_(None),
+                OutboxMessageModel.available_at <= now,
+                or_(OutboxMessageModel.claimed_until.is_(None), OutboxMessageModel.claimed_until <= now)
+            )
+            .order_by(OutboxMessageModel.available_at, OutboxMessageModel.message_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        stmt = (
+            update(OutboxMessageModel)
+            .where(OutboxMessageModel.message_id.in_(ready))
+            .values(claimed_until=claimed_until, attempts=OutboxMessageModel.attempts + 1)
+            .returning(OutboxMessageModel)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        messages = [OutboxMapper.to_domain(model) for model in result.scalars().all()]
+        return sorted(messages, key=lambda message: (message.available_at, message.message_id))
+
+    async def mark_delivered(self, message_ids: List[int], delivered_at: datetime.datetime) -> None:
+        if not message_ids:
+            return
+
+        await self.session.execute(
+            update(OutboxMessageModel)
+            .where(
+                OutboxMessageModel.message_id.in_(message_ids),
+                OutboxMessageModel.delivered_at.is_(None)
+            )
+            .values(delivered_at=delivered_at, claimed_until=None, last_error=None)
+        )
+
+    async def save_attempts(self, messages: List[OutboxMessage]) -> None:
+        if not messages:
+            return
+
+        # executemany de um único UPDATE parametrizado
+        # Uma entrega confirmada por outro relay (prazo vencido) não é desfeita
+        table = OutboxMessageModel.__table__
+        stmt = (
+            update(table)
+            .where(table.c.message_id == bindparam('b_message_id'), table.c.delivered_at.is_(None))
+            .values(
+                available_at=bindparam('b_available_at'),
+                failed_at=bindparam('b_failed_at'),
+                last_error=bindparam('b_last_error'),
+                claimed_until=None
+            )
+        )
+        await self.session.execute(stmt, [
+            {
+                "b_message_id": message.message_id,
+                "b_available_at": message.available_at,
+                "b_failed_at": message.failed_at,
+                "b_last_error": message.last_error
+            }
+            for message in messages
+        ])
+
+    async def cancel_pending(self, transaction_ids: List[UUID], reason: str, cancelled_at: datetime.datetime) -> Set[UUID]:
+        if not transaction_ids:
+            return set()
+
+        pending = (
+            OutboxMessageModel.transaction_id.in_(transaction_ids),
+            OutboxMessageModel.delivered_at.is_(None),
+            OutboxMessageModel.failed_at.is_(None)
+        )
+
+        # Reivindicada e dentro do prazo = em publicação; travada = o relay está reivindicando
+        cancellable = (
+            select(OutboxMessageModel.message_id)
+            .where(
+                *pending,
+                or_(OutboxMessageModel.claimed_until.is_(None), OutboxMessageModel.claimed_until <= cancelled_at)
+            )
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        await self.session.execute(
+            update(OutboxMessageModel)
+            .where(OutboxMessageModel.message_id.in_(cancellable))
+            .values(failed_at=cancelled_at, last_error=reason)
+            .execution_options(synchronize_session=False)
+        )
+
+        # O que continua pendente depois do UPDATE ficou de fora
+        result = await self.session.execute(
+            select(OutboxMessageModel.transaction_id).where(*pending).distinct()
+        )
+        return set(result.scalars().all())
+
+    async def find_open_dispatches(self, device_ids: List[str]) -> List[Tuple[str, int, UUID]]:
+        if not device_ids:
+            return []
+
+        slot = OutboxMessageModel.payload['slot'].astext.cast(Integer)
+        stmt = (
+            select(OutboxMessageModel.device_id, slot, OutboxMessageModel.transaction_id)
+            .join(TransactionModel, TransactionModel.transaction_id == OutboxMessageModel.transaction_id)
+            .where(
+                OutboxMessageModel.device_id.in_(device_ids),
+                OutboxMessageModel.command_type == 'withdraw',
+                # Já publicado ao menos uma vez: o ack pode chegar antes de a entrega ser registrada
+                or_(OutboxMessageModel.delivered_at.is_not(None), OutboxMessageModel.attempts > 0),
+                TransactionModel.status.in_([
+                    TransactionStatus.AUTHORIZED.value,
+                    TransactionStatus.IN_PROGRESS.value
+                ])
+            )
+            .order_by(OutboxMessageModel.message_id)
+        )
+
+        result = await self.session.execute(stmt)
+        return [(device_id, slot_value, transaction_id) for device_id, slot_value, transaction_id in result.all()]
+
+    async def delete_delivered_before(self, cutoff: datetime.datetime, limit: int) -> int:
+        # O comando de uma transação aberta ainda é usado para casar os acks do dispositivo
+        still_open = (
+            select(TransactionModel.transaction_id)
+            .where(
+                TransactionModel.transaction_id == OutboxMessageModel.transaction_id,
+                TransactionModel.status.in_([
+                    TransactionStatus.AUTHORIZED.value,
+                    TransactionStatus.IN_PROGRESS.value
+                ])
+            )
+            .exists()
+        )
+        delivered = (
+            select(OutboxMessageModel.message_id)
+            .where(
+                OutboxMessageModel.delivered_at.is_not(None),
+                OutboxMessageModel.delivered_at < cutoff,
+                ~still_open
+            )
+            .limit(limit)
+            .scalar_subquery()
+        )
+        result = await self.session.execute(
+            delete(OutboxMessageModel).where(OutboxMessageModel.message_id.in_(delivered))
+        )
+        return result.rowcount
\ No newline at end of file
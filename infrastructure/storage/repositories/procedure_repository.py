@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Callable, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -11,8 +11,12 @@ from infrastructure.storage.mappers.procedure import ProcedureMapper, ProcedureU
 
 
 class ProcedureRepositoryImpl(ProcedureRepository):
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
 
     async def find_by_id(self, procedure_id: ProcedureId) -> Optional[Procedure]:
         stmt = select(ProcedureModel).where(
@@ -37,6 +41,41 @@ class ProcedureRepositoryImpl(ProcedureRepository):
 
         return [ProcedureUsageMapper.to_domain(model) for model in models]
 
+    async def find_by_ids(self, procedure_ids: List[ProcedureId]) -> Dict[ProcedureId, Procedure]:
+        if not procedure_ids:
+            return {}
+
+        stmt = select(ProcedureModel).where(
+            ProcedureModel.procedure_id.in_([pid.value for pid in procedure_ids])
+        )
+
+        result = await self.session.execute(stmt)
+        models = result.scalars().all()
+
+        procedures = [ProcedureMapper.to_domain(model) for model in models]
+        return {procedure.procedure_id: procedure for procedure in procedures}
+
+    async def find_required_materials_for_many(
+            self,
+            procedure_ids: List[ProcedureId]
+    ) -> Dict[ProcedureId, List[ProcedureUsage]]:
+        if not procedure_ids:
+            return {}
+
+        stmt = select(ProcedureUsageModel).where(
+            ProcedureUsageModel.procedure_id.in_([pid.value for pid in procedure_ids])
+        )
+
+        result = await self.session.execute(stmt)
+        models = result.scalars().all()
+
+        usages_map = {procedure_id: [] for procedure_id in procedure_ids}
+        for model in models:
+            usage = ProcedureUsageMapper.to_domain(model)
+            usages_map[usage.procedure_id].append(usage)
+
+        return usages_map
+
     async def exists(self, procedure_id: ProcedureId) -> bool:
         stmt = select(ProcedureModel.procedure_id).where(
             ProcedureModel.procedure_id == procedure_id.value,
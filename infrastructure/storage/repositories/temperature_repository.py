@@ -0,0 +1,38 @@
+from typing import List
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from domain.entities.temperature_reading import TemperatureReading
+from domain.repositories.temperature import TemperatureRepository
+from infrastructure.storage.mappers.temperature import TemperatureReadingMapper
+from infrastructure.storage.models.temperature import TemperatureReadingModel
+
+
+class TemperatureRepositoryImpl(TemperatureRepository):
+    """
+    Usado pela ingestão em background, fora de qualquer request: cada lote abre
+    a própria sessão em vez de depender da sessão do request.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker):
+        self._session_factory = session_factory
+
+    async def save_batch(self, readings: List[TemperatureReading]) -> int:
+        if not readings:
+            return 0
+
+        records = [TemperatureReadingMapper.to_record(reading) for reading in readings]
+
+        async with self._session_factory() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+
+            # COPY binário do asyncpg: um round trip por lote, ordens de grandeza acima de INSERTs
+            await raw_connection.driver_connection.copy_records_to_table(
+                TemperatureReadingModel.__tablename__,
+                records=records,
+                columns=TemperatureReadingMapper.COLUMNS
+            )
+            await session.commit()
+
+        return len(records)
\ No newline at end of file
@@ -1,7 +1,8 @@
 import datetime
-from typing import Optional, List
+from typing import Optional, List, Callable, Tuple, AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, insert, update, values, column, true, and_, or_, tuple_, bindparam, Integer, Select
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import selectinload
 
 from domain.entities.transaction import Transaction
@@ -9,13 +10,17 @@ from domain.repositories.transaction import TransactionRepository
 from domain.value_objects.ids import TransactionId, LaboratoryId, UserId
 from domain.value_objects.enums import TransactionType, TransactionStatus
 from infrastructure.storage.mappers.transaction import TransactionMapper, TransactionItemMapper
-from infrastructure.storage.models.transaction import TransactionModel
+from infrastructure.storage.models.transaction import TransactionModel, TransactionItemModel
 
 
 class TransactionRepositoryImpl(TransactionRepository):
 
-    def __init__(self, session: AsyncSession):
-        self.session = session
+    def __init__(self, session_provider: Callable[[], AsyncSession]):
+        self._session_provider = session_provider
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._session_provider()
 
     async def save(self, transaction: Transaction) -> None:
         transaction_model = TransactionMapper.to_model(transaction)
@@ -33,7 +38,41 @@ class TransactionRepositoryImpl(TransactionRepository):
                 item_model = TransactionItemMapper.to_model(item, transaction.transaction_id)
                 self.session.add(item_model)
 
-        await self.session.commit()
+        await self.session.flush()
+
+    async def insert_new(self, transaction: Transaction) -> None:
+        """
+        Transação e itens em um único statement (INSERT ... RETURNING em CTE
+        alimentando o INSERT dos itens), sem SELECT prévio e sem a unit of work do ORM.
+        Um id repetido falha na PK como qualquer INSERT.
+        """
+        transactions_table = TransactionModel.__table__
+        items_table = TransactionItemModel.__table__
+
+        insert_transaction = insert(transactions_table).values(TransactionMapper.to_values(transaction))
+
+        if not transaction.items:
+            await self.session.execute(insert_transaction)
+            return
+
+        new_transaction = insert_transaction.returning(transactions_table.c.transaction_id).cte('new_transaction')
+
+        items = values(
+            column('material_id', UUID(as_uuid=True)),
+            column('quantity', Integer),
+            name='items'
+        ).data([(item.material_id.value, item.quantity) for item in transaction.items])
+
+        stmt = insert(items_table).from_select(
+            ['transaction_id', 'material_id', 'quantity'],
+            select(new_transaction.c.transaction_id, items.c.material_id, items.c.quantity)
+            .select_from(new_transaction.join(items, true()))
+        )
+
+        await self.session.execute(stmt)
+
+    async def update_status(self, transaction: Transaction) -> None:
+        await self.update_statuses([transaction])
 
     async def find_by_id(self, transaction_id: TransactionId) -> Optional[Transaction]:
         stmt = (
@@ -47,6 +86,85 @@ class TransactionRepositoryImpl(TransactionRepository):
 
         return TransactionMapper.to_domain(model) if model else None
 
+    async def find_by_ids(self, transaction_ids: List[TransactionId], for_update: bool = False) -> List[Transaction]:
+        if not transaction_ids:
+            return []
+
+        stmt = (
+            select(TransactionModel)
+            .options(selectinload(TransactionModel.items))
+            .where(TransactionModel.transaction_id.in_([tid.value for tid in transaction_ids]))
+            # Ordem fixa: quem trava várias transações sempre trava na mesma sequência
+            .order_by(TransactionModel.transaction_id)
+        )
+
+        if for_update:
+            stmt = stmt.with_for_update(of=TransactionModel)
+
+        result = await self.session.execute(stmt)
+        return [TransactionMapper.to_domain(model) for model in result.scalars().all()]
+
+    async def find_stale_open(
+            self,
+            authorized_before: datetime.datetime,
+            in_progress_before: datetime.datetime,
+            limit: int
+    ) -> List[Transaction]:
+        # O predicado repete o do índice parcial ix_transactions_open_created para o planner usá-lo;
+        # o corte mais recente limita a faixa de created_at lida no índice
+        stmt = (
+            select(TransactionModel)
+            .options(selectinload(TransactionModel.items))
+            .where(
+                TransactionModel.status.in_([
+                    TransactionStatus.AUTHORIZED.value,
+                    TransactionStatus.IN_PROGRESS.value
+                ]),
+                TransactionModel.created_at < max(authorized_before, in_progress_before),
+                or_(
+                    and_(
+                        TransactionModel.status == TransactionStatus.AUTHORIZED.value,
+                        TransactionModel.created_at < authorized_before
+                    ),
+                    and_(
+                        TransactionModel.status == TransactionStatus.IN_PROGRESS.value,
+                        TransactionModel.created_at < in_progress_before
+                    )
+                )
+            )
+            .order_by(TransactionModel.created_at)
+            .limit(limit)
+            .with_for_update(of=TransactionModel, skip_locked=True)
+        )
+
+        result = await self.session.execute(stmt)
+        return [TransactionMapper.to_domain(model) for model in result.scalars().all()]
+
+    async def update_statuses(self, transactions: List[Transaction]) -> None:
+        if not transactions:
+            return
+
+        table = TransactionModel.__table__
+        stmt = (
+            update(table)
+            .where(table.c.transaction_id == bindparam('b_transaction_id'))
+            .values(
+                status=bindparam('b_status'),
+                authorized_at=bindparam('b_authorized_at'),
+                completed_at=bindparam('b_completed_at')
+            )
+        )
+
+        await self.session.execute(stmt, [
+            {
+                "b_transaction_id": transaction.transaction_id.value,
+                "b_status": transaction.status.value,
+                "b_authorized_at": transaction.authorized_at,
+                "b_completed_at": transaction.completed_at
+            }
+            for transaction in sorted(transactions, key=lambda t: t.transaction_id.value)
+        ])
+
     async def exists(self, transaction_id: TransactionId) -> bool:
         stmt = select(TransactionModel.transaction_id).where(
             TransactionModel.transaction_id == transaction_id.value
@@ -62,12 +180,71 @@ class TransactionRepositoryImpl(TransactionRepository):
         transaction_type: Optional[TransactionType] = None,
         status: Optional[TransactionStatus] = None,
         start_date: Optional[datetime.datetime] = None,
-        end_date: Optional[datetime.datetime] = None
+        end_date: Optional[datetime.datetime] = None,
+        cursor: Optional[Tuple[datetime.datetime, TransactionId]] = None,
+        limit: Optional[int] = None
     ) -> List[Transaction]:
         """
         Busca transações com filtros opcionais.
         Todos os filtros são aplicados como AND.
+        A paginação é por keyset em (created_at, transaction_id): o cursor é a
+        última transação da página anterior.
         """
+        stmt = self._build_filtered_query(
+            laboratory_id, user_id, transaction_type, status, start_date, end_date, cursor
+        )
+
+        if limit:
+            stmt = stmt.limit(limit)
+
+        # Executa query
+        result = await self.session.execute(stmt)
+        models = result.scalars().all()
+
+        # Converte para domínio
+        return [TransactionMapper.to_domain(model) for model in models]
+
+    async def stream_with_filters(
+        self,
+        laboratory_id: Optional[LaboratoryId] = None,
+        user_id: Optional[UserId] = None,
+        transaction_type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Transaction]]:
+        """
+        Percorre as transações filtradas com um cursor no servidor, entregando
+        lotes de até batch_size. Os models de cada lote são removidos da sessão
+        depois de convertidos, então a memória não cresce com o período exportado.
+        """
+        stmt = self._build_filtered_query(
+            laboratory_id, user_id, transaction_type, status, start_date, end_date
+        ).execution_options(yield_per=batch_size)
+
+        result = await self.session.stream(stmt)
+
+        async for models in result.scalars().partitions():
+            transactions = [TransactionMapper.to_domain(model) for model in models]
+
+            for model in models:
+                for item in model.items:
+                    self.session.expunge(item)
+                self.session.expunge(model)
+
+            yield transactions
+
+    @staticmethod
+    def _build_filtered_query(
+        laboratory_id: Optional[LaboratoryId] = None,
+        user_id: Optional[UserId] = None,
+        transaction_type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        cursor: Optional[Tuple[datetime.datetime, TransactionId]] = None
+    ) -> Select:
         # Monta a query base com eager loading dos items
         stmt = (
             select(TransactionModel)
@@ -96,16 +273,16 @@ class TransactionRepositoryImpl(TransactionRepository):
         if end_date:
             conditions.append(TransactionModel.created_at <= end_date)
 
+        if cursor:
+            cursor_created_at, cursor_transaction_id = cursor
+            conditions.append(
+                tuple_(TransactionModel.created_at, TransactionModel.transaction_id)
+                < tuple_(cursor_created_at, cursor_transaction_id.value)
+            )
+
         # Aplica todas as condições com AND
         if conditions:
             stmt = stmt.where(and_(*conditions))
 
-        # Ordena por data de criação (mais recentes primeiro)
-        stmt = stmt.order_by(TransactionModel.created_at.desc())
-
-        # Executa query
-        result = await self.session.execute(stmt)
-        models = result.scalars().all()
-
-        # Converte para domínio
-        return [TransactionMapper.to_domain(model) for model in models]
\ No newline at end of file
+        # Ordena por data de criação (mais recentes primeiro), com o id como desempate estável
+        return stmt.order_by(TransactionModel.created_at.desc(), TransactionModel.transaction_id.desc())
\ No newline at end of file
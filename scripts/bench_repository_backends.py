@@ -0,0 +1,152 @@
+"""
+Benchmark das consultas quentes nos dois backends de repositório:
+ORM (SQLAlchemy) contra asyncpg com statements preparados.
+
+Precisa de um banco migrado e com dados (usa as variáveis POSTGRES_* da aplicação).
+Cada backend roda em uma transação explícita, desfeita no fim: os INSERTs de
+transação não ficam no banco.
+
+Uso, a partir da raiz do projeto:
+    python -m scripts.bench_repository_backends [--iterations 2000] [--warmup 50] [--laboratory-id UUID]
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select
+
+from domain.entities.transaction import Transaction
+from domain.entities.transaction_item import TransactionItem
+from domain.value_objects.enums import TransactionType, TransactionStatus
+from domain.value_objects.ids import LaboratoryId, MaterialId, ProcedureId, TransactionId, UserId
+from infrastructure.storage.asyncpg.material_balance_repository import AsyncpgMaterialBalanceRepository
+from infrastructure.storage.asyncpg.procedure_repository import AsyncpgProcedureRepository
+from infrastructure.storage.asyncpg.transaction_repository import AsyncpgTransactionRepository
+from infrastructure.storage.models.procedure import LaboratoryProcedureModel
+from infrastructure.storage.postgres.database import async_session_factory, engine
+from infrastructure.storage.repositories.material_balance_repository import MaterialBalanceRepositoryImpl
+from infrastructure.storage.repositories.procedure_repository import ProcedureRepositoryImpl
+from infrastructure.storage.repositories.transaction_repository import TransactionRepositoryImpl
+
+BACKENDS = {
+    'orm': (ProcedureRepositoryImpl, MaterialBalanceRepositoryImpl, TransactionRepositoryImpl),
+    'asyncpg': (AsyncpgProcedureRepository, AsyncpgMaterialBalanceRepository, AsyncpgTransactionRepository),
+}
+
+
+async def find_laboratory(session) -> LaboratoryId:
+    result = await session.execute(select(LaboratoryProcedureModel.laboratory_id).limit(1))
+    laboratory_id = result.scalar_one_or_none()
+    if laboratory_id is None:
+        raise SystemExit("Nenhum laboratório com procedimentos no banco; informe --laboratory-id")
+    return LaboratoryId(laboratory_id)
+
+
+def new_transaction(laboratory_id: LaboratoryId, procedure_id: ProcedureId, material_ids: list) -> Transaction:
+    return Transaction(
+        transaction_id=TransactionId(uuid.uuid4()),
+        transaction_type=TransactionType.WITHDRAW,
+        status=TransactionStatus.AUTHORIZED,
+        laboratory_id=laboratory_id,
+        user_id=UserId(uuid.uuid4()),
+        procedure_id=procedure_id,
+        created_at=datetime.datetime.now(datetime.UTC),
+        authorized_at=datetime.datetime.now(datetime.UTC),
+        completed_at=None,
+        items=[TransactionItem(material_id, 1) for material_id in material_ids]
+    )
+
+
+async def measure(iterations: int, warmup: int, operation) -> list:
+    for _ in range(warmup):
+        await operation()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await operation()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run_backend(name: str, laboratory_id: LaboratoryId, iterations: int, warmup: int) -> dict:
+    procedure_class, balance_class, transaction_class = BACKENDS[name]
+
+    async with async_session_factory() as session:
+        async with session.begin() as transaction:
+            try:
+                procedures = procedure_class(lambda: session)
+                balances = balance_class(lambda: session)
+                transactions = transaction_class(lambda: session)
+
+                laboratory_procedures = await procedures.find_by_laboratory_procedure(laboratory_id)
+                if not laboratory_procedures:
+                    raise SystemExit(f"Laboratório {laboratory_id.value} sem procedimentos")
+                procedure_ids = [lp.procedure_id for lp in laboratory_procedures]
+                usages = await procedures.find_required_materials_for_many(procedure_ids)
+                material_ids = sorted(
+                    {usage.material_id for procedure_usages in usages.values() for usage in procedure_usages},
+                    key=lambda material_id: material_id.value
+                )
+
+                operations = {
+                    'saldos por laboratório': lambda: balances.find_by_laboratory(laboratory_id),
+                    'saldos por materiais': lambda: balances.find_multiple_by_laboratory(material_ids, laboratory_id),
+                    'procedimentos do laboratório': lambda: procedures.find_by_laboratory_procedure(laboratory_id),
+                    'composição dos kits': lambda: procedures.find_required_materials_for_many(procedure_ids),
+                    'insert da transação': lambda: transactions.insert_new(
+                        new_transaction(laboratory_id, procedure_ids[0], material_ids)
+                    ),
+                }
+
+                results = {}
+                for label, operation in operations.items():
+                    results[label] = await measure(iterations, warmup, operation)
+            finally:
+                # Nada do benchmark fica no banco
+                await transaction.rollback()
+
+    return results
+
+
+def report(results: dict) -> None:
+    labels = next(iter(results.values())).keys()
+    print(f"{'consulta':<30}{'backend':>10}{'p50 (us)':>12}{'p99 (us)':>12}{'média (us)':>12}")
+    for label in labels:
+        for backend, backend_results in results.items():
+            samples = sorted(backend_results[label])
+            p50 = samples[len(samples) // 2] * 1e6
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6
+            mean = statistics.fmean(samples) * 1e6
+            print(f"{label:<30}{backend:>10}{p50:>12.1f}{p99:>12.1f}{mean:>12.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--laboratory-id', type=uuid.UUID, default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.laboratory_id:
+            laboratory_id = LaboratoryId(args.laboratory_id)
+        else:
+            async with async_session_factory() as session:
+                laboratory_id = await find_laboratory(session)
+
+        results = {}
+        for backend in BACKENDS:
+            results[backend] = await run_backend(backend, laboratory_id, args.iterations, args.warmup)
+
+        print(f"Laboratório {laboratory_id.value}, {args.iterations} iterações, {args.warmup} de aquecimento")
+        report(results)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Microbenchmark do roteamento de tópicos MQTT: varredura linear antiga
+(_topic_matches sobre todos os handlers) contra o TopicRouter.
+
+Uso, a partir da raiz do projeto:
+    python -m scripts.bench_topic_router [--subscriptions 10000] [--messages 1000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+from infrastructure.mqtt.router import TopicRouter
+
+WILDCARD_FILTERS = [
+    "devices/connection/request",
+    "devices/ping/+",
+    "devices/temperature/+",
+]
+
+
+def legacy_topic_matches(pattern: str, topic: str) -> bool:
+    # Cópia do MQTTClient._topic_matches anterior ao TopicRouter
+    if pattern == topic:
+        return True
+
+    pattern_parts = pattern.split('/')
+    topic_parts = topic.split('/')
+
+    if len(pattern_parts) != len(topic_parts):
+        return False
+
+    for p, t in zip(pattern_parts, topic_parts):
+        if p != '+' and p != '#' and p != t:
+            return False
+        if p == '#':
+            return True
+
+    return True
+
+
+def build_filters(subscriptions: int) -> list:
+    # Um filtro literal por dispositivo, mais as subscrições curinga da aplicação
+    per_device = [
+        f"devices/withdraw/smartlab_{index:05d}/+/ack"
+        for index in range(subscriptions - len(WILDCARD_FILTERS))
+    ]
+    return per_device + WILDCARD_FILTERS
+
+
+def build_topics(subscriptions: int, messages: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [f"devices/temperature/smartlab_{rng.randrange(subscriptions):05d}" for _ in range(messages)]
+
+
+def run_legacy(handlers: dict, topics: list) -> int:
+    matched = 0
+    for topic in topics:
+        for pattern in handlers:
+            if legacy_topic_matches(pattern, topic):
+                matched += 1
+                break
+    return matched
+
+
+def run_router(router: TopicRouter, topics: list) -> int:
+    matched = 0
+    for topic in topics:
+        if router.match(topic) is not None:
+            matched += 1
+    return matched
+
+
+def best_of(repeat: int, func, *args) -> tuple:
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscriptions', type=int, default=10_000)
+    parser.add_argument('--messages', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    filters = build_filters(args.subscriptions)
+    topics = build_topics(args.subscriptions, args.messages)
+
+    handlers = {topic_filter: topic_filter for topic_filter in filters}
+    router = TopicRouter()
+    for topic_filter in filters:
+        router.add(topic_filter, topic_filter)
+
+    legacy_seconds, legacy_matched = best_of(args.repeat, run_legacy, handlers, topics)
+    router_seconds, router_matched = best_of(args.repeat, run_router, router, topics)
+
+    if legacy_matched != router_matched:
+        raise SystemExit(f"Resultados divergentes: linear={legacy_matched} trie={router_matched}")
+
+    print(f"{len(filters)} subscrições, {len(topics)} mensagens, melhor de {args.repeat}")
+    print(f"  varredura linear: {legacy_seconds / len(topics) * 1e6:10.1f} us/mensagem")
+    print(f"  trie:             {router_seconds / len(topics) * 1e6:10.1f} us/mensagem")
+    print(f"  ganho:            {legacy_seconds / router_seconds:10.0f}x")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+import uuid
+
+from domain.entities.material import Material
+from domain.value_objects.ids import MaterialId
+from infrastructure.storage.repositories.cached_material_repository import CachedMaterialRepository
+
+
+def _material(material_id: MaterialId, name: str = "Luvas") -> Material:
+    now = datetime.datetime.now(datetime.UTC)
+    return Material(material_id, name, "", now, now)
+
+
+class FakeMaterialRepository:
+    def __init__(self, materials):
+        self.materials = {material.id: material for material in materials}
+        self.queries = []
+
+    async def find_by_multiple_ids(self, material_ids):
+        self.queries.append(list(material_ids))
+        return [self.materials[material_id] for material_id in material_ids if material_id in self.materials]
+
+    async def save(self, material):
+        self.materials[material.id] = material
+
+
+class FakeUnitOfWork:
+    def __init__(self):
+        self.callbacks = []
+
+    def on_commit(self, callback):
+        self.callbacks.append(callback)
+
+    async def commit(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def test_misses_are_loaded_in_one_query_and_then_served_from_cache():
+    async def scenario():
+        first, second = MaterialId(uuid.uuid4()), MaterialId(uuid.uuid4())
+        inner = FakeMaterialRepository([_material(first), _material(second)])
+        repository = CachedMaterialRepository(inner, ttl_seconds=60, max_size=10)
+
+        assert len(await repository.find_by_multiple_ids([first, second, first])) == 2
+        assert len(await repository.find_by_multiple_ids([second, first])) == 2
+
+        assert inner.queries == [[first, second]]
+
+    asyncio.run(scenario())
+
+
+def test_unknown_id_is_cached_as_absent():
+    async def scenario():
+        unknown = MaterialId(uuid.uuid4())
+        inner = FakeMaterialRepository([])
+        repository = CachedMaterialRepository(inner, ttl_seconds=60, max_size=10)
+
+        assert await repository.find_by_id(unknown) is None
+        assert await repository.exists(unknown) is False
+        assert len(inner.queries) == 1
+
+    asyncio.run(scenario())
+
+
+def test_save_invalidates_only_after_commit():
+    async def scenario():
+        material_id = MaterialId(uuid.uuid4())
+        inner = FakeMaterialRepository([_material(material_id, "Antigo")])
+        unit_of_work = FakeUnitOfWork()
+        repository = CachedMaterialRepository(inner, ttl_seconds=60, max_size=10, unit_of_work=unit_of_work)
+
+        await repository.find_by_id(material_id)
+        await repository.save(_material(material_id, "Novo"))
+
+        # Antes do commit a entrada antiga continua valendo
+        assert (await repository.find_by_id(material_id)).name == "Antigo"
+
+        await unit_of_work.commit()
+        assert (await repository.find_by_id(material_id)).name == "Novo"
+
+    asyncio.run(scenario())
+
+
+def test_read_started_before_invalidation_does_not_repopulate_cache():
+    async def scenario():
+        material_id = MaterialId(uuid.uuid4())
+        inner = FakeMaterialRepository([_material(material_id, "Antigo")])
+        repository = CachedMaterialRepository(inner, ttl_seconds=60, max_size=10)
+        loading = asyncio.Event()
+        release = asyncio.Event()
+        original_find = inner.find_by_multiple_ids
+
+        async def slow_find(material_ids):
+            result = await original_find(material_ids)
+            loading.set()
+            await release.wait()
+            return result
+
+        inner.find_by_multiple_ids = slow_find
+        stale_read = asyncio.create_task(repository.find_by_id(material_id))
+        await loading.wait()
+
+        inner.materials[material_id] = _material(material_id, "Novo")
+        repository.invalidate(material_id)
+        release.set()
+        assert (await stale_read).name == "Antigo"
+
+        inner.find_by_multiple_ids = original_find
+        assert (await repository.find_by_id(material_id)).name == "Novo"
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from application.services import device_service as device_service_module
+from application.services.device_service import DeviceService
+from domain.entities.device import Device
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Só o relógio do módulo; o event loop continua com o time.monotonic real
+    fake = FakeClock()
+    monkeypatch.setattr(device_service_module, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def _service(events):
+    service = DeviceService(heartbeat_timeout=timedelta(seconds=10))
+    service.add_status_listener(lambda device_id, connected: events.append((device_id, connected)))
+    return service
+
+
+def test_heartbeat_extends_deadline_without_new_heap_entry(clock):
+    events = []
+    service = _service(events)
+    service.authorize_device("d1")
+
+    for _ in range(5):
+        clock.now += 5
+        service.update_device_heartbeat("d1")
+
+    # Um único item por dispositivo, por mais heartbeats que cheguem
+    assert len(service._expiry_heap) == 1
+    assert events == [("d1", True)]
+
+    clock.now += 9
+    service._expire_due()
+    assert service.is_device_connected("d1")
+
+
+def test_stale_heap_entry_is_repositioned_then_expires(clock):
+    events = []
+    service = _service(events)
+    service.authorize_device("d1")
+
+    clock.now += 8
+    service.update_device_heartbeat("d1")
+
+    # Entrada original venceu, mas o prazo real é 1018
+    clock.now += 3
+    service._expire_due()
+    assert service.is_device_connected("d1")
+    assert service._expiry_heap == [(1018.0, "d1")]
+
+    clock.now = 1018
+    service._expire_due()
+    assert not service.is_device_connected("d1")
+    assert service._expiry_heap == []
+    assert events == [("d1", True), ("d1", False)]
+    assert service.get_disconnected_devices() == ["d1"]
+
+
+def test_devices_expire_in_deadline_order(clock):
+    events = []
+    service = _service(events)
+    for device_id in ("d1", "d2", "d3"):
+        service.authorize_device(device_id)
+        clock.now += 1
+
+    clock.now = 1011.5
+    service._expire_due()
+
+    assert events[3:] == [("d1", False), ("d2", False)]
+    assert service.get_connected_devices() == ["d3"]
+
+
+def test_reconnect_after_expiry_emits_transition_again(clock):
+    events = []
+    service = _service(events)
+    service.authorize_device("d1")
+
+    clock.now += 10
+    service._expire_due()
+    service.update_device_heartbeat("d1")
+
+    assert events == [("d1", True), ("d1", False), ("d1", True)]
+    assert len(service._expiry_heap) == 1
+
+
+def test_unknown_device_heartbeat_is_ignored(clock):
+    service = _service([])
+    service.update_device_heartbeat("d1")
+
+    assert service.get_device_status("d1")["status"] == "never_connected"
+    assert service._expiry_heap == []
+
+
+def test_whitelist_rejects_unlisted_device(clock):
+    events = []
+    service = _service(events)
+    service.set_device_whitelist(["d1"])
+
+    assert service.authorize_device("d2") is False
+    assert events == []
+
+
+def test_load_registry_restores_remaining_deadline(clock):
+    events = []
+    service = _service(events)
+    now = datetime.now(timezone.utc)
+
+    restored = service.load_registry([
+        Device("recente", is_whitelisted=True, last_seen_at=now - timedelta(seconds=4)),
+        Device("antigo", is_whitelisted=True, last_seen_at=now - timedelta(seconds=30)),
+        Device("nunca", is_whitelisted=True)
+    ])
+
+    assert restored == 1
+    assert events == [("recente", True)]
+    assert service.get_device_status("antigo")["status"] == "disconnected"
+
+    clock.now += 7
+    service._expire_due()
+    assert events == [("recente", True), ("recente", False)]
+
+
+def test_background_task_wakes_up_for_new_earlier_deadline():
+    async def scenario():
+        events = []
+        service = _service(events)
+        await service.start()
+        try:
+            service.heartbeat_timeout = timedelta(seconds=0.05)
+            service.authorize_device("d1")
+            await asyncio.sleep(0.2)
+        finally:
+            await service.stop()
+
+        assert events == [("d1", True), ("d1", False)]
+
+    asyncio.run(scenario())
\ No newline at end of file
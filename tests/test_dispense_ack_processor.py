@@ -0,0 +1,296 @@
+import asyncio
+import datetime
+import uuid
+from contextlib import asynccontextmanager
+
+from application.services.dispense_ack_processor import DispenseAck, DispenseAckProcessor
+from application.services.event_hub import EventHub
+from domain.entities.transaction import Transaction
+from domain.entities.transaction_item import TransactionItem
+from domain.value_objects.enums import TransactionStatus, TransactionType
+from domain.value_objects.ids import LaboratoryId, MaterialId, TransactionId, UserId
+
+LABORATORY_ID = LaboratoryId(uuid.uuid4())
+MATERIAL_ID = MaterialId(uuid.uuid4())
+INACTIVE_MATERIAL_ID = MaterialId(uuid.uuid4())
+
+
+def _transaction() -> Transaction:
+    now = datetime.datetime.now(datetime.UTC)
+    return Transaction(
+        transaction_id=TransactionId(uuid.uuid4()),
+        transaction_type=TransactionType.WITHDRAW,
+        status=TransactionStatus.AUTHORIZED,
+        laboratory_id=LABORATORY_ID,
+        user_id=UserId(uuid.uuid4()),
+        procedure_id=None,
+        created_at=now,
+        authorized_at=now,
+        completed_at=None,
+        items=[TransactionItem(MATERIAL_ID, 2)],
+        reservations=[TransactionItem(MATERIAL_ID, 2), TransactionItem(INACTIVE_MATERIAL_ID, 1)]
+    )
+
+
+def _ack(status: TransactionStatus, slot: int = 1, transaction_id=None, device_id: str = "d1") -> DispenseAck:
+    return DispenseAck(
+        device_id=device_id,
+        slot=slot,
+        status=status,
+        received_at=datetime.datetime.now(datetime.UTC),
+        transaction_id=transaction_id
+    )
+
+
+class FakeTransactionRepository:
+    def __init__(self, transactions):
+        self.transactions = {transaction.transaction_id.value: transaction for transaction in transactions}
+        self.updated = []
+
+    async def find_by_ids(self, transaction_ids, for_update=False):
+        return [self.transactions[tid.value] for tid in transaction_ids if tid.value in self.transactions]
+
+    async def update_statuses(self, transactions):
+        self.updated.extend(transactions)
+
+
+class FakeBalanceRepository:
+    def __init__(self):
+        self.changes = []
+
+    async def apply_reservation_changes(self, changes):
+        self.changes.append(changes)
+        return len(changes)
+
+
+class FakeOutboxRepository:
+    def __init__(self, dispatches=()):
+        self.dispatches = list(dispatches)
+
+    async def find_open_dispatches(self, device_ids):
+        return [dispatch for dispatch in self.dispatches if dispatch[0] in device_ids]
+
+
+class FakeUnitOfWork:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+@asynccontextmanager
+async def _session_scope():
+    yield
+
+
+def _processor(transactions=(), dispatches=(), max_attempts=3, batch_size=10):
+    processor = DispenseAckProcessor(
+        _session_scope,
+        FakeTransactionRepository(transactions),
+        FakeBalanceRepository(),
+        FakeOutboxRepository(dispatches),
+        FakeUnitOfWork(),
+        EventHub(),
+        batch_size=batch_size,
+        flush_interval_ms=10,
+        max_pending=100,
+        max_attempts=max_attempts
+    )
+    return processor
+
+
+def test_ack_with_transaction_id_settles_everything_that_was_reserved():
+    transaction = _transaction()
+    processor = _processor([transaction])
+
+    processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction.transaction_id.value))
+    asyncio.run(processor.flush())
+
+    assert transaction.status == TransactionStatus.COMPLETED
+    assert processor.material_balance_repository.changes == [{
+        (LABORATORY_ID, MATERIAL_ID): (2, 0),
+        (LABORATORY_ID, INACTIVE_MATERIAL_ID): (1, 0)
+    }]
+    assert processor.metrics()["applied"] == 1
+
+
+def test_anonymous_acks_follow_the_dispatch_order_per_slot():
+    first, second, other_slot = _transaction(), _transaction(), _transaction()
+    processor = _processor(
+        [first, second, other_slot],
+        dispatches=[
+            ("d1", 1, first.transaction_id.value),
+            ("d1", 2, other_slot.transaction_id.value),
+            ("d1", 1, second.transaction_id.value),
+        ]
+    )
+
+    processor.add(_ack(TransactionStatus.COMPLETED))
+    processor.add(_ack(TransactionStatus.FAILED))
+    asyncio.run(processor.flush())
+
+    assert first.status == TransactionStatus.COMPLETED
+    assert second.status == TransactionStatus.FAILED
+    assert other_slot.status == TransactionStatus.AUTHORIZED
+
+
+def test_started_ack_does_not_advance_to_the_next_dispatch():
+    first, second = _transaction(), _transaction()
+    processor = _processor(
+        [first, second],
+        dispatches=[("d1", 1, first.transaction_id.value), ("d1", 1, second.transaction_id.value)]
+    )
+
+    processor.add(_ack(TransactionStatus.IN_PROGRESS))
+    processor.add(_ack(TransactionStatus.COMPLETED))
+    asyncio.run(processor.flush())
+
+    assert first.status == TransactionStatus.COMPLETED
+    assert second.status == TransactionStatus.AUTHORIZED
+    # Só a transação encerrada mexe no saldo
+    assert processor.material_balance_repository.changes[-1] == {
+        (LABORATORY_ID, MATERIAL_ID): (2, 0),
+        (LABORATORY_ID, INACTIVE_MATERIAL_ID): (1, 0)
+    }
+
+
+def test_anonymous_ack_skips_transactions_claimed_by_explicit_acks():
+    first, second = _transaction(), _transaction()
+    processor = _processor(
+        [first, second],
+        dispatches=[("d1", 1, first.transaction_id.value), ("d1", 1, second.transaction_id.value)]
+    )
+
+    processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=first.transaction_id.value))
+    processor.add(_ack(TransactionStatus.COMPLETED))
+    asyncio.run(processor.flush())
+
+    assert first.status == TransactionStatus.COMPLETED
+    assert second.status == TransactionStatus.COMPLETED
+
+
+def test_ack_without_open_dispatch_is_ignored():
+    processor = _processor()
+
+    processor.add(_ack(TransactionStatus.COMPLETED))
+    asyncio.run(processor.flush())
+
+    assert processor.metrics()["ignored"] == 1
+    assert processor.metrics()["pending"] == 0
+
+
+def test_repeated_final_ack_is_ignored():
+    transaction = _transaction()
+    processor = _processor([transaction])
+    transaction_id = transaction.transaction_id.value
+
+    processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction_id))
+    processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction_id))
+    asyncio.run(processor.flush())
+
+    assert processor.metrics()["applied"] == 1
+    assert processor.metrics()["ignored"] == 1
+
+
+def _failing_on(processor, bad_slots, down=None):
+    apply_batch = processor._apply_batch
+
+    async def failing_apply(batch):
+        if (down and down[0]) or any(ack.slot in bad_slots for ack in batch):
+            raise RuntimeError("falha simulada")
+        await apply_batch(batch)
+
+    processor._apply_batch = failing_apply
+
+
+def test_failing_ack_is_dead_lettered_without_blocking_the_others():
+    transactions = [_transaction() for _ in range(4)]
+    processor = _processor(transactions, max_attempts=3)
+    _failing_on(processor, bad_slots={99})
+
+    for transaction in transactions[:2]:
+        processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction.transaction_id.value))
+    processor.add(_ack(TransactionStatus.COMPLETED, slot=99, transaction_id=uuid.uuid4()))
+    for transaction in transactions[2:]:
+        processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction.transaction_id.value))
+
+    asyncio.run(processor.flush())
+
+    assert all(transaction.status == TransactionStatus.COMPLETED for transaction in transactions)
+    assert processor.metrics()["pending"] == 1
+
+    for _ in range(2):
+        asyncio.run(processor.flush())
+
+    metrics = processor.metrics()
+    assert metrics["pending"] == 0
+    assert metrics["dead_lettered"] == 1
+    assert metrics["dead_letters"][0]["slot"] == 99
+
+
+def test_database_outage_keeps_every_ack_queued():
+    transactions = [_transaction() for _ in range(3)]
+    processor = _processor(transactions, max_attempts=2)
+    down = [True]
+    _failing_on(processor, bad_slots=set(), down=down)
+
+    for transaction in transactions:
+        processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction.transaction_id.value))
+
+    for _ in range(5):
+        asyncio.run(processor.flush())
+
+    assert processor.metrics()["pending"] == 3
+    assert processor.metrics()["dead_lettered"] == 0
+
+    down[0] = False
+    asyncio.run(processor.flush())
+
+    assert all(transaction.status == TransactionStatus.COMPLETED for transaction in transactions)
+
+
+def test_stop_finishes_the_batch_in_flight():
+    transaction = _transaction()
+    processor = _processor([transaction], batch_size=1)
+    apply_batch = processor._apply_batch
+
+    async def slow_apply(batch):
+        await asyncio.sleep(0.05)
+        await apply_batch(batch)
+
+    processor._apply_batch = slow_apply
+
+    async def scenario():
+        await processor.start()
+        processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=transaction.transaction_id.value))
+        # Deixa o ciclo acordar e começar o lote
+        await asyncio.sleep(0.01)
+        await processor.stop()
+
+    asyncio.run(scenario())
+
+    assert transaction.status == TransactionStatus.COMPLETED
+    assert processor.metrics()["pending"] == 0
+
+
+def test_cancelled_flush_puts_the_batch_back():
+    processor = _processor()
+
+    async def scenario():
+        blocked = asyncio.Event()
+
+        async def blocking_apply(batch):
+            blocked.set()
+            await asyncio.sleep(10)
+
+        processor._apply_batch = blocking_apply
+        processor.add(_ack(TransactionStatus.COMPLETED, transaction_id=uuid.uuid4()))
+        task = asyncio.create_task(processor.flush())
+        await blocked.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert processor.metrics()["pending"] == 1
\ No newline at end of file
@@ -0,0 +1,90 @@
+import asyncio
+
+from quart import Quart
+
+from application.services.event_hub import EventHub, encode_event
+
+
+def test_publish_fans_out_same_frame_to_channel_subscribers():
+    async def scenario():
+        hub = EventHub(queue_size=10, keepalive_seconds=1)
+        first = hub.subscribe("lab-1")
+        second = hub.subscribe("lab-1")
+        other = hub.subscribe("lab-2")
+
+        hub.publish("lab-1", "monitoring", {"value": 1})
+
+        frame = encode_event("monitoring", {"value": 1})
+        assert await first.__anext__() == frame
+        assert await second.__anext__() == frame
+        assert other.queue.empty()
+        assert hub.metrics()["published"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_publish_without_subscribers_does_not_encode():
+    hub = EventHub()
+    hub.publish("lab-1", "monitoring", {"value": 1})
+    assert hub.metrics()["published"] == 0
+
+
+def test_slow_subscriber_is_dropped_and_stream_ends():
+    async def scenario():
+        hub = EventHub(queue_size=2, keepalive_seconds=1)
+        slow = hub.subscribe("lab-1")
+
+        for value in range(3):
+            hub.publish("lab-1", "monitoring", {"value": value})
+
+        assert hub.metrics()["dropped_subscribers"] == 1
+        assert hub.metrics()["subscribers"] == 0
+        # Atraso descartado: o próximo item já é o fim do stream
+        assert [frame async for frame in slow] == []
+
+    asyncio.run(scenario())
+
+
+def test_keepalive_is_sent_when_channel_is_idle():
+    async def scenario():
+        hub = EventHub(queue_size=2, keepalive_seconds=0.01)
+        subscription = hub.subscribe("lab-1")
+        assert await subscription.__anext__() == b": keepalive\n\n"
+
+    asyncio.run(scenario())
+
+
+def test_close_removes_empty_channel():
+    hub = EventHub()
+    subscription = hub.subscribe("lab-1")
+    subscription.close()
+    assert subscription.closed
+    assert hub.metrics() == {"channels": 0, "subscribers": 0, "published": 0, "dropped_subscribers": 0}
+
+
+def test_event_stream_subscribes_only_while_body_is_consumed():
+    from app.api.blueprints import laboratory
+    from application.container import container
+
+    async def scenario():
+        hub = EventHub(queue_size=10, keepalive_seconds=1)
+        app = Quart(__name__)
+        original_hub = container._event_hub
+        container._event_hub = hub
+        try:
+            async with app.app_context():
+                # Resposta montada e descartada sem iterar o corpo: nada no hub
+                await laboratory._event_stream_response("lab-1", b"{}")
+                assert hub.metrics()["subscribers"] == 0
+
+                response = await laboratory._event_stream_response("lab-1", b"{}")
+                body = response.response.__aiter__()
+                assert await body.__anext__() == encode_event("monitoring", b"{}")
+                assert hub.metrics()["subscribers"] == 1
+
+                await body.aclose()
+                assert hub.metrics()["subscribers"] == 0
+        finally:
+            container._event_hub = original_hub
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+
+from application.services.event_hub import GLOBAL_CHANNEL
+from application.services.monitoring_service import MonitoringService
+
+
+class FakeTemperatureService:
+    def __init__(self):
+        self.latest = {}
+
+    def add_listener(self, callback):
+        pass
+
+    def get_latest_reading(self, device_id):
+        return self.latest.get(device_id)
+
+    def classify_temperature(self, value):
+        return "normal"
+
+
+class FakeDeviceService:
+    def add_status_listener(self, callback):
+        pass
+
+    def is_device_connected(self, device_id):
+        return True
+
+
+class RecordingEventHub:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, event_type, data):
+        self.published.append((channel, event_type, data))
+
+
+def _service(publish_interval_ms=20):
+    temperatures = FakeTemperatureService()
+    hub = RecordingEventHub()
+    service = MonitoringService(temperatures, FakeDeviceService(), event_hub=hub, publish_interval_ms=publish_interval_ms)
+    service.set_device_laboratories({"d1": {"lab-1"}})
+    return service, temperatures, hub
+
+
+def test_burst_of_readings_is_published_once_per_channel():
+    service, temperatures, hub = _service()
+
+    async def scenario():
+        for second in range(50):
+            temperatures.latest["d1"] = (20.0 + second / 10, 1_700_000_000 + second)
+            service.refresh_device("d1")
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+    published = {channel: body for channel, _, body in hub.published}
+    assert len(hub.published) == 2
+    # O snapshot enviado é o da última leitura da rajada
+    assert published["lab-1"] == service.get_laboratory_snapshot("lab-1")
+    assert published[GLOBAL_CHANNEL] == service.get_global_snapshot()
+
+
+def test_unchanged_snapshot_is_not_published_again():
+    service, temperatures, hub = _service()
+    temperatures.latest["d1"] = (21.0, 1_700_000_000)
+
+    async def scenario():
+        service.refresh_device("d1")
+        await asyncio.sleep(0.05)
+        service.refresh_device("d1")
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+    assert len(hub.published) == 2
\ No newline at end of file
@@ -0,0 +1,37 @@
+import base64
+import datetime
+import uuid
+
+import pytest
+
+from application.exceptions import InvalidCursorError
+from application.pagination import decode_cursor, encode_cursor
+from domain.value_objects.ids import TransactionId
+
+
+def test_cursor_round_trip_keeps_timestamp_and_id():
+    created_at = datetime.datetime(2025, 6, 12, 9, 30, 15, 123456, tzinfo=datetime.UTC)
+    transaction_id = TransactionId(uuid.uuid4())
+
+    cursor = encode_cursor(created_at, transaction_id)
+
+    assert decode_cursor(cursor) == (created_at, transaction_id)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime.datetime.now(datetime.UTC), TransactionId(uuid.uuid4()))
+    assert all(char not in cursor for char in "+/")
+
+
+@pytest.mark.parametrize("cursor", [
+    "não-é-base64",
+    "%%%",
+    base64.urlsafe_b64encode(b"sem-separador").decode("ascii"),
+    base64.urlsafe_b64encode(b"2025-06-12T09:30:00|nao-e-uuid").decode("ascii"),
+    base64.urlsafe_b64encode(f"ontem|{uuid.uuid4()}".encode()).decode("ascii"),
+    base64.urlsafe_b64encode(f"2025-06-12T09:30:00|{uuid.uuid4()}|extra".encode()).decode("ascii"),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode("ascii"),
+])
+def test_malformed_cursor_raises_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
\ No newline at end of file
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from application.exceptions import IdempotencyKeyConflictError
+from application.services.request_coalescer import RequestCoalescer
+
+
+def test_concurrent_duplicates_share_one_execution():
+    async def scenario():
+        coalescer = RequestCoalescer()
+        calls = []
+        release = asyncio.Event()
+
+        async def operation():
+            calls.append(1)
+            await release.wait()
+            return {"transaction_id": "t1"}
+
+        first = asyncio.create_task(coalescer.run("k1", "fp", operation))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(coalescer.run("k1", "fp", operation))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await first == await second == {"transaction_id": "t1"}
+        assert len(calls) == 1
+        assert coalescer.metrics() == {"in_flight": 0, "coalesced": 1}
+
+    asyncio.run(scenario())
+
+
+def test_waiters_receive_the_same_exception():
+    async def scenario():
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+
+        async def operation():
+            await release.wait()
+            raise RuntimeError("estoque")
+
+        first = asyncio.create_task(coalescer.run("k1", "fp", operation))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(coalescer.run("k1", "fp", operation))
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        assert [str(result) for result in results] == ["estoque", "estoque"]
+        assert coalescer.metrics()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_same_key_with_different_fingerprint_conflicts():
+    async def scenario():
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+
+        async def operation():
+            await release.wait()
+            return "ok"
+
+        first = asyncio.create_task(coalescer.run("k1", "fp-a", operation))
+        await asyncio.sleep(0)
+
+        with pytest.raises(IdempotencyKeyConflictError):
+            await coalescer.run("k1", "fp-b", operation)
+
+        release.set()
+        assert await first == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_original_execution():
+    async def scenario():
+        coalescer = RequestCoalescer()
+        release = asyncio.Event()
+
+        async def operation():
+            await release.wait()
+            return "ok"
+
+        first = asyncio.create_task(coalescer.run("k1", "fp", operation))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(coalescer.run("k1", "fp", operation))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        release.set()
+
+        assert await first == "ok"
+        assert waiter.cancelled()
+
+    asyncio.run(scenario())
+
+
+def test_key_is_released_after_completion():
+    async def scenario():
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def operation():
+            calls.append(1)
+            return len(calls)
+
+        assert await coalescer.run("k1", "fp", operation) == 1
+        assert await coalescer.run("k1", "fp", operation) == 2
+        assert coalescer.metrics() == {"in_flight": 0, "coalesced": 0}
+
+    asyncio.run(scenario())
\ No newline at end of file
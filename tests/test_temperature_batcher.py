@@ -0,0 +1,46 @@
+import asyncio
+
+from application.services.temperature_batcher import TemperatureBatcher
+
+
+class SlowTemperatureRepository:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.saved = []
+
+    async def save_batch(self, batch):
+        await asyncio.sleep(self.delay)
+        self.saved.extend(batch)
+        return len(batch)
+
+
+def test_stop_finishes_the_batch_in_flight_and_the_rest():
+    repository = SlowTemperatureRepository()
+    batcher = TemperatureBatcher(repository, batch_size=2, flush_interval_ms=10, max_pending=100)
+
+    async def scenario():
+        await batcher.start()
+        batcher.add([1, 2, 3])
+        # Deixa o ciclo acordar e começar a gravar o primeiro lote
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+
+    asyncio.run(scenario())
+
+    assert repository.saved == [1, 2, 3]
+    assert batcher.metrics()["pending"] == 0
+
+
+def test_cancelled_flush_puts_the_batch_back():
+    batcher = TemperatureBatcher(SlowTemperatureRepository(delay=10), batch_size=2, flush_interval_ms=10, max_pending=100)
+
+    async def scenario():
+        batcher.add([1, 2, 3])
+        task = asyncio.create_task(batcher.flush())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert list(batcher._pending) == [1, 2, 3]
\ No newline at end of file
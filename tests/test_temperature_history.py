@@ -0,0 +1,58 @@
+import pytest
+
+from application.services.temperature_history import TemperatureHistory
+
+
+def test_empty_history():
+    history = TemperatureHistory(capacity=3)
+
+    assert len(history) == 0
+    assert history.latest() is None
+    assert history.recent(10) == []
+    assert history.stats() == {"count": 0, "avg": None, "min": None, "max": None}
+
+
+def test_ring_keeps_only_the_newest_readings_in_order():
+    history = TemperatureHistory(capacity=3)
+    for second, value in enumerate([1.0, 2.0, 3.0, 4.0, 5.0]):
+        history.append(value, float(second))
+
+    assert len(history) == 3
+    assert history.latest() == (5.0, 4.0)
+    assert history.recent(10) == [(3.0, 2.0), (4.0, 3.0), (5.0, 4.0)]
+    assert history.recent(2) == [(4.0, 3.0), (5.0, 4.0)]
+
+
+def test_totals_cover_readings_already_overwritten_in_the_ring():
+    history = TemperatureHistory(capacity=2)
+    for second, value in enumerate([10.0, -2.0, 4.0]):
+        history.append(value, float(second))
+
+    assert history.stats() == {"count": 3, "avg": 4.0, "min": -2.0, "max": 10.0}
+
+
+def test_window_stats_drop_readings_older_than_the_window():
+    history = TemperatureHistory(capacity=100)
+    history.append(20.0, 0.0)
+    history.append(30.0, 30.0)
+    history.append(40.0, 70.0)
+
+    windows = history.window_stats(now=70.0)
+
+    # A leitura de 0s já saiu do último minuto (janela cobre 11s..70s)
+    assert windows["last_minute"] == {"count": 2, "avg": 35.0, "min": 30.0, "max": 40.0}
+    assert windows["last_hour"]["count"] == 3
+
+
+def test_window_bucket_reused_after_a_full_turn_is_reset():
+    history = TemperatureHistory(capacity=100)
+    history.append(99.0, 5.0)
+    # Mesmo slot do anel de 60 buckets, uma volta depois
+    history.append(1.0, 65.0)
+
+    assert history.window_stats(now=65.0)["last_minute"] == {"count": 1, "avg": 1.0, "min": 1.0, "max": 1.0}
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        TemperatureHistory(capacity=0)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import pytest
+
+from infrastructure.mqtt.router import TopicRouter
+
+
+def _router(*filters):
+    router = TopicRouter()
+    for topic_filter in filters:
+        router.add(topic_filter, topic_filter)
+    return router
+
+
+def test_plus_matches_exactly_one_level():
+    router = _router("devices/+/temperature")
+
+    assert router.match("devices/d1/temperature") == "devices/+/temperature"
+    assert router.match("devices/temperature") is None
+    assert router.match("devices/d1/x/temperature") is None
+
+
+def test_hash_matches_parent_and_any_suffix():
+    router = _router("devices/#")
+
+    assert router.match("devices") == "devices/#"
+    assert router.match("devices/d1") == "devices/#"
+    assert router.match("devices/d1/withdraw/3") == "devices/#"
+    assert router.match("other/d1") is None
+
+
+def test_wildcards_in_first_level_do_not_match_system_topics():
+    router = _router("#", "+/uptime")
+
+    assert router.match("$SYS/broker/uptime") is None
+    assert router.match("$SYS/uptime") is None
+    assert router.match("broker/uptime") == "+/uptime"
+    assert router.match("anything/else") == "#"
+
+
+def test_system_topics_match_explicit_filters():
+    router = _router("$SYS/#")
+
+    assert router.match("$SYS/broker/uptime") == "$SYS/#"
+
+
+def test_most_specific_filter_wins():
+    router = _router("devices/#", "devices/+/temperature", "devices/d1/temperature")
+
+    assert router.match("devices/d1/temperature") == "devices/d1/temperature"
+    assert router.match("devices/d2/temperature") == "devices/+/temperature"
+    assert router.match("devices/d2/ping") == "devices/#"
+
+
+def test_literal_branch_falls_back_to_wildcard_when_it_dead_ends():
+    router = _router("devices/d1/ping", "devices/+/temperature")
+
+    assert router.match("devices/d1/temperature") == "devices/+/temperature"
+
+
+def test_remove_rebuilds_without_the_filter():
+    router = _router("devices/+/temperature", "devices/#")
+
+    router.remove("devices/+/temperature")
+
+    assert router.match("devices/d1/temperature") == "devices/#"
+    assert "devices/+/temperature" not in router
+    assert len(router) == 1
+
+
+@pytest.mark.parametrize("topic_filter", ["devices/#/temperature", "devices/d+/temperature", "devices/a#"])
+def test_invalid_filters_are_rejected(topic_filter):
+    with pytest.raises(ValueError):
+        TopicRouter().add(topic_filter, None)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import pytest
+
+from infrastructure.cache.ttl_cache import MISSING, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_value_until_ttl_expires():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+
+    clock.now = 5.0
+    assert cache.get("a") is MISSING
+    # Expirada é removida na leitura
+    assert len(cache) == 0
+
+
+def test_none_is_cached_and_distinct_from_missing():
+    cache = TTLCache(max_size=10, ttl_seconds=5, clock=FakeClock())
+    cache.set("ausente", None)
+
+    assert cache.get("ausente") is None
+    assert cache.get("outra") is MISSING
+    assert cache.get("outra", default="x") == "x"
+
+
+def test_per_entry_ttl_overrides_default():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl_seconds=60, clock=clock)
+    cache.set("curta", 1, ttl_seconds=1)
+    cache.set("longa", 2)
+
+    clock.now = 2
+    assert cache.get("curta") is MISSING
+    assert cache.get("longa") == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2, ttl_seconds=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Leitura renova "a"; "b" passa a ser a mais antiga
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_set_existing_key_refreshes_value_and_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4
+    cache.set("a", 2)
+
+    clock.now = 8
+    assert cache.get("a") == 2
+    assert len(cache) == 1
+
+
+def test_invalidate_and_clear():
+    cache = TTLCache(max_size=10, ttl_seconds=5, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    cache.invalidate("inexistente")
+    assert cache.get("a") is MISSING
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache(max_size=10, ttl_seconds=5, clock=FakeClock())
+    assert cache.stats()["hit_rate"] == 0.0
+
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 1)
+    assert stats["hit_rate"] == 0.6667
+
+
+def test_max_size_must_be_positive():
+    with pytest.raises(ValueError):
+        TTLCache(max_size=0, ttl_seconds=5)
\ No newline at end of file
@@ -0,0 +1,329 @@
+import asyncio
+import datetime
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from application.dto.input.transaction import WithdrawTransactionInput
+from application.exceptions import IdempotencyKeyConflictError
+from application.services.request_coalescer import RequestCoalescer
+from application.usecases.withdraw import WithdrawTransactionUseCase, _output_to_dict
+from domain.entities.device_route import DeviceRoute
+from domain.entities.idempotency_record import IdempotencyRecord
+from domain.entities.material import Material
+from domain.entities.material_balance import MaterialBalance
+from domain.entities.procedure import LaboratoryProcedure, Procedure
+from domain.entities.procedure_usage import ProcedureUsage
+from domain.value_objects.ids import LaboratoryId, MaterialId, ProcedureId, UserId
+
+LABORATORY_ID = LaboratoryId(uuid.uuid4())
+PROCEDURE_ID = ProcedureId(uuid.uuid4())
+MATERIAL_ID = MaterialId(uuid.uuid4())
+TTL = datetime.timedelta(hours=24)
+
+
+class FakeDatabase:
+    """Escritas ficam pendentes até o commit; rollback descarta, como na sessão real."""
+
+    def __init__(self):
+        self.reserved = 0
+        self.transactions = []
+        self.outbox = []
+        self.idempotency = {}
+        self._pending = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def stage(self, apply):
+        self._pending.append(apply)
+
+    async def commit(self):
+        for apply in self._pending:
+            apply()
+        self._pending.clear()
+        self.commits += 1
+
+    async def rollback(self):
+        self._pending.clear()
+        self.rollbacks += 1
+
+
+class FakeProcedureRepository:
+    async def find_by_id(self, procedure_id):
+        now = datetime.datetime.now(datetime.UTC)
+        return Procedure(procedure_id, "Kit", "Kit de teste", now, now)
+
+    async def find_by_laboratory_procedure(self, laboratory_id):
+        return [LaboratoryProcedure(LABORATORY_ID, PROCEDURE_ID, 1, datetime.datetime.now(datetime.UTC))]
+
+    async def find_required_materials(self, procedure_id):
+        return [ProcedureUsage(PROCEDURE_ID, MATERIAL_ID, 2)]
+
+
+class FakeMaterialRepository:
+    async def find_by_multiple_ids(self, material_ids):
+        now = datetime.datetime.now(datetime.UTC)
+        return [Material(material_id, "Luvas", "", now, now) for material_id in material_ids]
+
+
+class FakeBalanceRepository:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def reserve_multiple(self, amounts, laboratory_id):
+        # Cede o loop como a ida ao banco, para duplicatas concorrentes se encontrarem
+        await asyncio.sleep(0)
+        amount = amounts[MATERIAL_ID]
+
+        def apply():
+            self.database.reserved += amount
+
+        self.database.stage(apply)
+        return [MaterialBalance(MATERIAL_ID, laboratory_id, 100, amount, datetime.datetime.now(datetime.UTC))]
+
+
+class FakeTransactionRepository:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def insert_new(self, transaction):
+        self.database.stage(lambda: self.database.transactions.append(transaction))
+
+
+class FakeOutboxRepository:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def add(self, message):
+        self.database.stage(lambda: self.database.outbox.append(message))
+
+
+class FakeIdempotencyRepository:
+    """Mesmo contrato do Impl: chaves expiradas são invisíveis e podem ser regravadas."""
+
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        # Gravado por "outra instância" entre a busca e o insert desta requisição
+        self.concurrent_record = None
+
+    async def find_by_key(self, key):
+        record = self.database.idempotency.get(key)
+        if record is None or record.is_expired(datetime.datetime.now(datetime.UTC)):
+            return None
+        return record
+
+    async def save(self, record):
+        if self.concurrent_record is not None:
+            self.database.idempotency[self.concurrent_record.key] = self.concurrent_record
+            self.concurrent_record = None
+
+        existing = self.database.idempotency.get(record.key)
+        if existing is not None and not existing.is_expired(record.created_at):
+            return False
+
+        self.database.stage(lambda: self.database.idempotency.__setitem__(record.key, record))
+        return True
+
+    async def delete_expired(self, now, limit):
+        return 0
+
+
+class FakeUnitOfWork:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def commit(self):
+        await self.database.commit()
+
+    async def rollback(self):
+        await self.database.rollback()
+
+
+class FakeRoutingService:
+    def resolve(self, laboratory_id, slot_id):
+        return DeviceRoute(laboratory_id, slot_id, "d1", slot_id)
+
+
+class RecordingEventHub:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, event_type, data):
+        self.published.append((channel, event_type))
+
+
+class FakeOutboxRelay:
+    def __init__(self):
+        self.notified = 0
+
+    def notify(self):
+        self.notified += 1
+
+
+def _use_case():
+    database = FakeDatabase()
+    idempotency = FakeIdempotencyRepository(database)
+    use_case = WithdrawTransactionUseCase(
+        transaction_repository=FakeTransactionRepository(database),
+        procedure_repository=FakeProcedureRepository(),
+        material_balance_repository=FakeBalanceRepository(database),
+        material_repository=FakeMaterialRepository(),
+        unit_of_work=FakeUnitOfWork(database),
+        event_hub=RecordingEventHub(),
+        device_routing_service=FakeRoutingService(),
+        idempotency_repository=idempotency,
+        request_coalescer=RequestCoalescer(),
+        idempotency_ttl=TTL,
+        outbox_repository=FakeOutboxRepository(database),
+        outbox_relay=FakeOutboxRelay()
+    )
+    return use_case, database, idempotency
+
+
+def _context(user_id=None):
+    return SimpleNamespace(user_id=str(user_id or uuid.uuid4()))
+
+
+def _input(key="chave-1"):
+    return WithdrawTransactionInput(
+        laboratory_id=str(LABORATORY_ID.value),
+        procedure_id=str(PROCEDURE_ID.value),
+        idempotency_key=key
+    )
+
+
+def _stored_record(use_case, context, key, *, expires_in, other_user=False):
+    """Registro como outra requisição o teria gravado, com a resposta dela."""
+    user_id = uuid.uuid4() if other_user else uuid.UUID(context.user_id)
+    fingerprint = use_case._fingerprint(LABORATORY_ID, PROCEDURE_ID, UserId(user_id))
+    now = datetime.datetime.now(datetime.UTC)
+    response = {
+        "transaction_id": str(uuid.uuid4()),
+        "transaction_type": "WITHDRAW",
+        "status": "AUTHORIZED",
+        "laboratory_id": str(LABORATORY_ID.value),
+        "procedure_id": str(PROCEDURE_ID.value),
+        "created_at": now.isoformat(),
+        "authorized_at": now.isoformat(),
+        "items": [{"material_id": str(MATERIAL_ID.value), "quantity": 2}]
+    }
+    return IdempotencyRecord(key, fingerprint, response, now - TTL, now + expires_in)
+
+
+def test_retry_after_commit_returns_stored_response_without_reserving_again():
+    async def scenario():
+        use_case, database, _ = _use_case()
+        context = _context()
+
+        first = await use_case.execute(context, _input())
+        retry = await use_case.execute(context, _input())
+
+        assert retry == first
+        assert database.reserved == 2
+        assert len(database.transactions) == 1
+        assert len(database.outbox) == 1
+        assert use_case.outbox_relay.notified == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_duplicates_are_coalesced_into_one_withdraw():
+    async def scenario():
+        use_case, database, _ = _use_case()
+        context = _context()
+
+        first, second = await asyncio.gather(
+            use_case.execute(context, _input()),
+            use_case.execute(context, _input())
+        )
+
+        assert first == second
+        assert database.reserved == 2
+        assert len(database.transactions) == 1
+        assert use_case.request_coalescer.metrics()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_key_reused_by_another_request_conflicts():
+    async def scenario():
+        use_case, database, _ = _use_case()
+        await use_case.execute(_context(), _input())
+
+        with pytest.raises(IdempotencyKeyConflictError):
+            await use_case.execute(_context(), _input())
+
+        assert database.reserved == 2
+        assert len(database.transactions) == 1
+
+    asyncio.run(scenario())
+
+
+def test_lost_insert_race_rolls_back_and_returns_winner_response():
+    async def scenario():
+        use_case, database, idempotency = _use_case()
+        context = _context()
+        winner = _stored_record(use_case, context, "chave-1", expires_in=TTL)
+        idempotency.concurrent_record = winner
+
+        output = await use_case.execute(context, _input())
+
+        assert _output_to_dict(output) == winner.response
+        assert database.rollbacks == 1
+        assert database.commits == 0
+        # Reserva, transação e comando desta tentativa foram desfeitos
+        assert database.reserved == 0
+        assert database.transactions == []
+        assert database.outbox == []
+        assert use_case.event_hub.published == []
+        assert use_case.outbox_relay.notified == 0
+
+    asyncio.run(scenario())
+
+
+def test_lost_insert_race_with_different_request_conflicts_after_rollback():
+    async def scenario():
+        use_case, database, idempotency = _use_case()
+        context = _context()
+        idempotency.concurrent_record = _stored_record(use_case, context, "chave-1", expires_in=TTL, other_user=True)
+
+        with pytest.raises(IdempotencyKeyConflictError):
+            await use_case.execute(context, _input())
+
+        assert database.rollbacks == 1
+        assert database.reserved == 0
+        assert database.outbox == []
+
+    asyncio.run(scenario())
+
+
+def test_expired_key_is_reused_for_a_new_withdraw():
+    async def scenario():
+        use_case, database, _ = _use_case()
+        context = _context()
+        expired = _stored_record(use_case, context, "chave-1", expires_in=-datetime.timedelta(seconds=1), other_user=True)
+        database.idempotency["chave-1"] = expired
+
+        output = await use_case.execute(context, _input())
+
+        assert output.transaction_id != expired.response["transaction_id"]
+        assert database.reserved == 2
+        assert database.idempotency["chave-1"].response == _output_to_dict(output)
+        assert database.idempotency["chave-1"].expires_at > datetime.datetime.now(datetime.UTC)
+
+    asyncio.run(scenario())
+
+
+def test_requests_without_key_are_not_deduplicated():
+    async def scenario():
+        use_case, database, _ = _use_case()
+        context = _context()
+
+        await use_case.execute(context, _input(key=None))
+        await use_case.execute(context, _input(key=None))
+
+        assert database.reserved == 4
+        assert database.idempotency == {}
+
+    asyncio.run(scenario())
\ No newline at end of file